@@ -0,0 +1,323 @@
+"""
+Headless batch processing of many data sets with the GLA / GTA.
+
+The data sets and their settings are read from a manifest (JSON, CSV or,
+if PyYAML is installed, YAML) and fitted in parallel processes with the
+non-interactive Agg backend. The results of every data set are saved in
+its "analysis" folder as usual and a summary table is written.
+
+Usage:
+    python Batch.py manifest.json --workers 4 --summary summary.csv
+"""
+import argparse
+import copy
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+
+DEFAULTS = {
+    "model": 0,
+    "tau": [],
+    "vary": None,
+    "d_limits": [None, None],
+    "l_limits": [None, None],
+    "opt_method": "least_squares",
+    "ivp_method": "analytic",
+    "tau_low": [],
+    "tau_high": [],
+    "C_0": [],
+    "K": None,
+    "varpro": False,
+    "svd_rank": None,
+    "irf": None,
+    "chirp": "auto",
+    "trace": False,
+    "n_starts": None,
+    "start_workers": 1,
+    "n_bootstrap": 0,
+    "profile": False,
+    "ci_workers": 1,
+    "text_export": False,
+    "labels": ["$\\lambda$ / nm", "delay / ps", "$\\Delta A$"],
+}
+
+
+def runDataset(settings):
+    """
+    Fits a single data set with the given settings. Used by the worker
+    processes, so Controller is only imported with the Agg backend set.
+
+    Parameters
+    ----------
+    settings : dict
+        The settings of the data set, see DEFAULTS.
+
+    Returns
+    -------
+    result : dict
+        The path, model, status, runtime, fitted lifetimes, sum of the
+        squared residuals and the error message of the data set.
+
+    """
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    import numpy as np
+    import Controller as Cont
+
+    start = time.time()
+    result = {"path": settings["path"], "model": settings["model"],
+              "status": "ok", "runtime_s": None, "tau_fit": None,
+              "chisqr": None, "error": ""}
+    try:
+        controller = Cont.Controller(settings["path"])
+        controller.labels = settings["labels"]
+        controller.text_export = settings["text_export"]
+        chirp = settings["chirp"]
+        if chirp == "auto":
+            chirp = controller.chirp
+        irf = settings["irf"]
+        if irf is not None:
+            irf = [tuple(value) for value in irf]
+        vary = settings["vary"]
+        if vary is None:
+            vary = [True for tau in settings["tau"]]
+        preparam = list(zip(settings["tau"], vary))
+        model = settings["model"]
+        if model == 0:
+            tau_fit, spec, res, D_fit, fit_report = controller.calcDAS(
+                preparam, settings["d_limits"], settings["l_limits"],
+                settings["opt_method"], varpro=settings["varpro"],
+                svd_rank=settings["svd_rank"], irf=irf, chirp=chirp,
+                trace=settings["trace"], n_bootstrap=settings["n_bootstrap"],
+                profile=settings["profile"], ci_workers=settings["ci_workers"])
+        else:
+            K = settings["K"]
+            if K is not None:
+                K = np.array(K, dtype="float64")
+            if model == "custom matrix":
+                preparam = []
+            tau_fit, spec, res, D_fit, fit_report = controller.calcSAS(
+                K, preparam, settings["C_0"], settings["d_limits"],
+                settings["l_limits"], model, settings["tau_low"],
+                settings["tau_high"], settings["opt_method"],
+                settings["ivp_method"], varpro=settings["varpro"],
+                svd_rank=settings["svd_rank"], irf=irf, chirp=chirp,
+                trace=settings["trace"], n_starts=settings["n_starts"],
+                start_workers=settings["start_workers"],
+                n_bootstrap=settings["n_bootstrap"], profile=settings["profile"],
+                ci_workers=settings["ci_workers"])
+        result["tau_fit"] = np.asarray(tau_fit).tolist()
+        result["chisqr"] = float(np.sum(np.square(res)))
+    except Exception as error:
+        result["status"] = "failed"
+        result["error"] = f"{type(error).__name__}: {error}"
+    result["runtime_s"] = round(time.time() - start, 3)
+    return result
+
+
+class BatchRunner():
+    def __init__(self, manifest, workers=None, threads=1):
+        """
+        Initiates the batch runner for the data sets of the manifest.
+
+        Parameters
+        ----------
+        manifest : string
+            The path to the manifest (*.json, *.csv, *.yaml or *.yml).
+        workers : int, optional
+            The number of worker processes. The default is None, which uses
+            the number of cores.
+        threads : int, optional
+            The number of BLAS threads of every worker, so that the workers
+            do not compete for the cores. The default is 1.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.manifest = manifest
+        self.workers = workers
+        self.threads = threads
+        self.datasets = self.readManifest(manifest)
+
+    def readValue(self, value):
+        """
+        Converts a cell of a CSV manifest into a number, list, boolean or
+        None, if it is valid JSON, otherwise it stays a string.
+
+        Parameters
+        ----------
+        value : string
+            The content of the cell.
+
+        Returns
+        -------
+        value : object
+            The converted value.
+
+        """
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+
+    def readManifest(self, manifest):
+        """
+        Reads the manifest. It either is a list of data sets or contains
+        "defaults" for all data sets and the list "datasets". Every data set
+        needs a "path", the folder containing the data, which may be relative
+        to the manifest. All other settings default to DEFAULTS.
+        In a CSV manifest every row is a data set and lists are written as
+        JSON, e.g. "[1, 100]".
+
+        Parameters
+        ----------
+        manifest : string
+            The path to the manifest.
+
+        Returns
+        -------
+        datasets : list
+            The complete settings of every data set.
+
+        """
+        extension = os.path.splitext(manifest)[1].lower()
+        with open(manifest, newline="") as f:
+            if extension == ".csv":
+                content = [{key: self.readValue(value) for key, value in row.items()
+                            if value not in (None, "")}
+                           for row in csv.DictReader(f)]
+            elif extension in (".yaml", ".yml"):
+                try:
+                    import yaml
+                except ImportError:
+                    raise ImportError("Reading YAML manifests requires PyYAML, "
+                                      "use a JSON or CSV manifest instead.")
+                content = yaml.safe_load(f)
+            else:
+                content = json.load(f)
+        defaults = {}
+        if isinstance(content, dict):
+            defaults = content.get("defaults", {})
+            content = content["datasets"]
+        folder = os.path.dirname(os.path.abspath(manifest))
+        datasets = []
+        for entry in content:
+            settings = copy.deepcopy(DEFAULTS)
+            settings.update(copy.deepcopy(defaults))
+            settings.update(entry)
+            path = os.path.join(folder, os.path.expanduser(settings["path"]))
+            settings["path"] = os.path.normpath(path)
+            datasets.append(settings)
+        return datasets
+
+    def run(self):
+        """
+        Fits all data sets in a pool of worker processes. With a single
+        worker they are fitted one after another in this process.
+
+        Returns
+        -------
+        results : list
+            The results of runDataset in the order of the manifest.
+
+        """
+        os.environ.setdefault("MPLBACKEND", "Agg")
+        for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+            os.environ.setdefault(var, str(self.threads))
+        if self.workers == 1:
+            results = []
+            for settings in self.datasets:
+                results.append(runDataset(settings))
+                self.printResult(results[-1], len(results))
+            return results
+        results = [None for settings in self.datasets]
+        with ProcessPoolExecutor(self.workers) as executor:
+            futures = {executor.submit(runDataset, settings): i
+                       for i, settings in enumerate(self.datasets)}
+            for done, future in enumerate(as_completed(futures), 1):
+                results[futures[future]] = future.result()
+                self.printResult(results[futures[future]], done)
+        return results
+
+    def printResult(self, result, done):
+        """
+        Prints the progress and the result of a finished data set.
+
+        Parameters
+        ----------
+        result : dict
+            The result of runDataset.
+        done : int
+            The number of finished data sets.
+
+        Returns
+        -------
+        None.
+
+        """
+        print(f"[{done}/{len(self.datasets)}] {result['status']:6} "
+              f"{result['runtime_s']:8.2f} s  {result['path']}  "
+              f"{result['tau_fit'] if result['status'] == 'ok' else result['error']}")
+
+    def writeSummary(self, results, filename):
+        """
+        Writes the results of all data sets in a CSV or, for *.json, in a
+        JSON file.
+
+        Parameters
+        ----------
+        results : list
+            The results of runDataset.
+        filename : string
+            The path of the summary.
+
+        Returns
+        -------
+        None.
+
+        """
+        if filename.lower().endswith(".json"):
+            with open(filename, "w") as f:
+                json.dump(results, f, indent=2)
+            return
+        with open(filename, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(results[0].keys()))
+            writer.writeheader()
+            for result in results:
+                writer.writerow({key: json.dumps(value) if isinstance(value, list) else value
+                                 for key, value in result.items()})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Fits the GLA / GTA of every data set of a manifest in "
+                    "parallel without the GUI.")
+    parser.add_argument("manifest", help="JSON, CSV or YAML file with the data sets.")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="Number of worker processes (default: number of cores).")
+    parser.add_argument("-t", "--threads", type=int, default=1,
+                        help="BLAS threads per worker (default: 1).")
+    parser.add_argument("-s", "--summary", default=None,
+                        help="Summary table, *.csv or *.json (default: "
+                             "batch_summary.csv next to the manifest).")
+    args = parser.parse_args(argv)
+    runner = BatchRunner(args.manifest, args.workers, args.threads)
+    summary = args.summary
+    if summary is None:
+        summary = os.path.join(os.path.dirname(os.path.abspath(args.manifest)),
+                               "batch_summary.csv")
+    start = time.time()
+    results = runner.run()
+    runner.writeSummary(results, summary)
+    failed = sum(result["status"] != "ok" for result in results)
+    print(f"{len(results)} data sets in {time.time() - start:.1f} s, "
+          f"{failed} failed. Summary: {summary}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
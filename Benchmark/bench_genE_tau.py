@@ -0,0 +1,99 @@
+"""
+Micro-benchmark of Model.genE_tau against the former double loop.
+
+Run from the repository root:
+    python Benchmark/bench_genE_tau.py
+"""
+import os
+import sys
+import tempfile
+import timeit
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Model import Model
+
+
+def genE_tau_loop(tau, delays):
+    """
+    The exponential basis as it was generated before the vectorization.
+
+    Parameters
+    ----------
+    tau : list
+        A list of the given values for tau, the decay constant.
+    delays : np.array
+        The measured delays of the TA-spectrum.
+
+    Returns
+    -------
+    E_tau : np.array
+        The matrix of E_tau with the exponential decay functions.
+
+    """
+    E_tau = np.zeros(shape=(len(tau), len(delays)))
+    for i in range(len(tau)):
+        for j in range(len(delays)):
+            E_tau[i][j] = -delays[j] / tau[i]
+    E_tau = np.exp(E_tau)
+    return E_tau
+
+
+def createModel(folder, n_delays, n_lambdas=10, dtype="float64"):
+    """
+    Writes a small synthetic data set and loads it into a GLA Model.
+
+    Parameters
+    ----------
+    folder : string
+        The folder for the synthetic data.
+    n_delays : int
+        The number of delays.
+    n_lambdas : int, optional
+        The number of wavelengths. The default is 10.
+    dtype : string, optional
+        The dtype of the exponential basis. The default is "float64".
+
+    Returns
+    -------
+    model : Model
+        The GLA Model of the synthetic data.
+
+    """
+    delays = np.geomspace(0.1, 5000, n_delays)
+    lambdas = np.linspace(350, 750, n_lambdas)
+    np.savetxt(folder + "/bench_delays.txt", delays)
+    np.savetxt(folder + "/bench_lambda.txt", lambdas)
+    np.savetxt(folder + "/bench_taspectra.txt", np.zeros((n_lambdas, n_delays)))
+    model = Model(folder + "/bench_delays.txt", folder + "/bench_taspectra.txt",
+                  folder + "/bench_lambda.txt", None, None, 0, None, None,
+                  dtype=dtype)
+    model.delays = delays
+    return model
+
+
+def main(n_delays=2000, tau=(0.5, 3, 40, 600, 9e5), repeat=20):
+    with tempfile.TemporaryDirectory() as folder:
+        model = createModel(folder, n_delays)
+        model32 = createModel(folder, n_delays, dtype="float32")
+    reference = genE_tau_loop(tau, model.delays)
+    assert np.allclose(model.genE_tau(tau), reference)
+    assert np.allclose(model32.genE_tau(tau), reference, rtol=1e-6)
+    buffer = model.getBuffer(len(tau))
+    buffer32 = model32.getBuffer(len(tau))
+    timings = {
+        "loop": lambda: genE_tau_loop(tau, model.delays),
+        "vectorized": lambda: model.genE_tau(tau),
+        "vectorized, buffer": lambda: model.genE_tau(tau, out=buffer),
+        "vectorized, buffer, float32": lambda: model32.genE_tau(tau, out=buffer32),
+    }
+    print(f"genE_tau with {len(tau)} lifetimes and {n_delays} delays")
+    base = None
+    for name, func in timings.items():
+        t = min(timeit.repeat(func, number=1, repeat=repeat))
+        base = t if base is None else base
+        print(f"{name:>30}: {t * 1e6:10.1f} µs  ({base / t:6.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark of the raw data import of the chirp correction, np.genfromtxt
+against the chunked parser of RichertMatrixImport.
+
+Run from the repository root:
+    python Benchmark/bench_readData.py
+"""
+import os
+import sys
+import tempfile
+import timeit
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Importers import RichertMatrixImport
+
+
+def readData_genfromtxt(path, header=0):
+    """
+    The raw data import as it was done before, np.genfromtxt followed by
+    ChirpCorrector.splitData.
+
+    Parameters
+    ----------
+    path : string
+        The path to the file containing the raw data.
+    header : int, optional
+        The number of lines skipped at the beginning of the file.
+        The default is 0.
+
+    Returns
+    -------
+    wave : np.array
+        The wavelength data of the measurement.
+    time : np.array
+        The delay data of the measurement.
+    spec : np.ndarray
+        The absorption data of the measurement.
+
+    """
+    data = np.genfromtxt(path, delimiter=' ', skip_header=header)
+    wave = data[0][1:]
+    time = data.T[0][1:] * 100
+    time = time.round() / 100
+    spec = data[1:]
+    spec = spec.T[1:]
+    return wave, time, spec
+
+
+def createRawFile(path, n_waves, n_delays, n_bad=100):
+    """
+    Writes a synthetic raw measurement with a wavelength row, a delay column
+    and some NaN/inf values.
+
+    Parameters
+    ----------
+    path : string
+        The path of the file.
+    n_waves : int
+        The number of wavelengths.
+    n_delays : int
+        The number of delays.
+    n_bad : int, optional
+        The number of NaN/inf values. The default is 100.
+
+    Returns
+    -------
+    None.
+
+    """
+    rng = np.random.default_rng(0)
+    wave = np.linspace(350, 750, n_waves)
+    time = np.linspace(-1, 3000, n_delays)
+    spec = rng.normal(scale=1e-3, size=(n_delays, n_waves))
+    bad = rng.integers(0, spec.size, n_bad)
+    spec.flat[bad[::2]] = np.nan
+    spec.flat[bad[1::2]] = np.inf
+    data = np.vstack([np.r_[0, wave], np.column_stack([time, spec])])
+    np.savetxt(path, data, delimiter=' ', fmt='%.6g')
+
+
+def main(n_waves=1500, n_delays=3000, repeat=3):
+    with tempfile.TemporaryDirectory() as folder:
+        path = folder + "/bench_raw.dat"
+        createRawFile(path, n_waves, n_delays)
+        size = os.path.getsize(path) / 1e6
+        reference = readData_genfromtxt(path)
+        result = RichertMatrixImport(path).readData()
+        for ref, res in zip(reference, result):
+            assert np.allclose(ref, res, equal_nan=True)
+        timings = {
+            "np.genfromtxt": lambda: readData_genfromtxt(path),
+            "RichertMatrixImport": lambda: RichertMatrixImport(path).readData(),
+        }
+        print(f"raw file with {n_waves} wavelengths and {n_delays} delays ({size:.1f} MB)")
+        base = None
+        for name, func in timings.items():
+            t = min(timeit.repeat(func, number=1, repeat=repeat))
+            base = t if base is None else base
+            print(f"{name:>30}: {t:8.3f} s  ({base / t:6.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""
+Benchmark suite of the hot paths of the fit, the data import and the chirp
+correction on synthetic data sets with known lifetimes. The timings can be
+saved as a JSON baseline and later runs compared against it, so that every
+performance change can be measured and regressions are detected.
+
+Run from the repository root:
+    python Benchmark/bench_suite.py --size medium --save Benchmark/baseline.json
+    python Benchmark/bench_suite.py --size medium --compare Benchmark/baseline.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import timeit
+import numpy as np
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Model import Model
+from Controller import Controller
+from DataCache import DataCache
+from Importers import RichertMatrixImport
+from ChirpCorrector import ChirpCorrector
+from bench_readData import createRawFile
+
+
+SIZES = {
+    "small": {"n_lambdas": 100, "n_delays": 200, "tau": [0.8, 12, 300]},
+    "medium": {"n_lambdas": 400, "n_delays": 800, "tau": [0.5, 4, 40, 600]},
+    "large": {"n_lambdas": 1500, "n_delays": 2500, "tau": [0.3, 2, 15, 150, 2000]},
+}
+
+
+def createDataset(folder, n_lambdas, n_delays, tau, noise=1e-4, seed=0):
+    """
+    Writes a synthetic TA data set of parallel exponential decays with
+    gaussian shaped spectra and white noise.
+
+    Parameters
+    ----------
+    folder : string
+        The folder for the data set.
+    n_lambdas : int
+        The number of wavelengths.
+    n_delays : int
+        The number of delays.
+    tau : list
+        The lifetimes of the species.
+    noise : float, optional
+        The standard deviation of the noise. The default is 1e-4.
+    seed : int, optional
+        The seed of the random numbers. The default is 0.
+
+    Returns
+    -------
+    filenames : list
+        The paths to the delays, spectra and lambdas files.
+
+    """
+    rng = np.random.default_rng(seed)
+    delays = np.r_[np.linspace(-1, 1, n_delays // 10, endpoint=False),
+                   np.geomspace(1, 5 * max(tau), n_delays - n_delays // 10)]
+    lambdas = np.linspace(350, 750, n_lambdas)
+    centers = rng.uniform(400, 700, len(tau))
+    D = np.exp(-((lambdas[:, None] - centers) / 40) ** 2) * rng.choice([-1, 1], len(tau))
+    M = np.exp(-np.clip(delays, 0, None)[None, :] / np.array(tau)[:, None]) * (delays >= 0)
+    spectra = D @ M + noise * rng.normal(size=(n_lambdas, n_delays))
+    filenames = [os.path.join(folder, f"bench_{kind}.txt")
+                 for kind in ("delays", "taspectra", "lambda")]
+    np.savetxt(filenames[0], delays)
+    np.savetxt(filenames[1], spectra)
+    np.savetxt(filenames[2], lambdas)
+    return filenames
+
+
+def createModel(filenames, model=0, ivp_method=None):
+    """
+    Loads the synthetic data set into a Model, limited to positive delays.
+
+    Parameters
+    ----------
+    filenames : list
+        The paths to the delays, spectra and lambdas files.
+    model : int, optional
+        0 for the GLA or the number of a GTA model. The default is 0.
+    ivp_method : string, optional
+        The initial value problem solver of the GTA. The default is None.
+
+    Returns
+    -------
+    model : Model
+        The Model of the data set.
+
+    """
+    return Model(*filenames, [0.1, None], [None, None], model,
+                 "least_squares", ivp_method)
+
+
+def timeFunction(func, repeat, setup=None):
+    """
+    Times a function as the best of several runs.
+
+    Parameters
+    ----------
+    func : function
+        The benchmarked function.
+    repeat : int
+        The number of runs.
+    setup : function, optional
+        Called before every run, not timed. The default is None.
+
+    Returns
+    -------
+    t : float
+        The shortest runtime in seconds.
+
+    """
+    return min(timeit.repeat(func, setup=setup or (lambda: None),
+                             number=1, repeat=repeat))
+
+
+def runBenchmarks(n_lambdas, n_delays, tau, repeat=5):
+    """
+    Runs all benchmarks on a synthetic data set of the given size.
+
+    Parameters
+    ----------
+    n_lambdas : int
+        The number of wavelengths.
+    n_delays : int
+        The number of delays.
+    tau : list
+        The lifetimes of the species.
+    repeat : int, optional
+        The number of runs of the short benchmarks, the full fits and the
+        import of text files run at most 3 times. The default is 5.
+
+    Returns
+    -------
+    results : dict
+        The runtime in seconds of every benchmark.
+    accuracy : dict
+        The largest relative error of the fitted lifetimes of the full fits.
+
+    """
+    results = {}
+    accuracy = {}
+    slow = min(repeat, 3)
+    guess = [1.5 * t for t in tau]
+    with tempfile.TemporaryDirectory() as folder:
+        filenames = createDataset(folder, n_lambdas, n_delays, tau)
+        cache = DataCache()
+        results["import/DataCache.load (parse)"] = timeFunction(
+            lambda: cache.load(filenames[1]), slow,
+            setup=lambda: cache.clear(filenames[1]))
+        results["import/DataCache.load (cached)"] = timeFunction(
+            lambda: cache.load(filenames[1]), repeat)
+        raw = os.path.join(folder, "bench_raw.dat")
+        createRawFile(raw, n_lambdas, n_delays)
+        results["import/RichertMatrixImport.readData"] = timeFunction(
+            lambda: RichertMatrixImport(raw).readData(), slow)
+
+        gla = createModel(filenames)
+        gla.M = gla.getM(tau)
+        buffer = gla.getBuffer(len(tau))
+        results["Model.genE_tau"] = timeFunction(
+            lambda: gla.genE_tau(tau, out=buffer), repeat)
+        results["Model.calcD_tau"] = timeFunction(lambda: gla.calcD_tau(tau), repeat)
+        gta = createModel(filenames, 1, "BDF")
+        gta.getK(tau)
+        gta.setInitialConcentrations([])
+        for ivp_method in ("analytic", "BDF"):
+            results[f"Model.solveDiff ({ivp_method})"] = timeFunction(
+                lambda: gta.solveDiff(ivp_method), repeat)
+
+        controller = Controller(folder)
+        controller.labels = ["$\\lambda$ / nm", "delay / ps", "$\\Delta A$"]
+        preparam = [(t, True) for t in guess]
+        fits = {
+            "Controller.calcDAS": lambda: controller.calcDAS(
+                preparam, [0.1, None], [None, None], "least_squares"),
+            "Controller.calcDAS (varpro)": lambda: controller.calcDAS(
+                preparam, [0.1, None], [None, None], "least_squares", varpro=True),
+            "Controller.calcSAS (analytic)": lambda: controller.calcSAS(
+                None, preparam, [], [0.1, None], [None, None], 1, [], [],
+                "least_squares", "analytic"),
+        }
+        for name, func in fits.items():
+            tau_fit = func()[0]
+            accuracy[name] = float(np.max(np.abs(np.sort(tau_fit) / np.sort(tau) - 1)))
+            results[name] = timeFunction(func, slow)
+
+        corrector = ChirpCorrector({"Sample_Dir": raw, "Solvent_Dir": None,
+                                    "Chirp_Dir": None, "Wave_Range": None,
+                                    "Scale": None, "Exc_Wave": None,
+                                    "Header": 0, "Options": {"NaN": "mean",
+                                                             "Fit": False}},
+                                   None)
+        corrector.wave, corrector.time, data = corrector.readData(raw)
+        shift = 1e5 * 0.3 / corrector.wave ** 2
+        with contextlib.redirect_stdout(io.StringIO()):
+            results["ChirpCorrector.removeNaNinf"] = timeFunction(
+                lambda: corrector.removeNaNinf(data, axis=1, x=corrector.time), repeat)
+            data_c = corrector.removeNaNinf(data, axis=1, x=corrector.time)
+        results["ChirpCorrector.resampleShift"] = timeFunction(
+            lambda: corrector.resampleShift(data_c, shift), repeat)
+    return results, accuracy
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compares the timings with a baseline.
+
+    Parameters
+    ----------
+    results : dict
+        The runtime in seconds of every benchmark.
+    baseline : dict
+        The content of a saved baseline.
+    tolerance : float
+        The allowed relative slowdown, e.g. 0.2 for 20 %.
+
+    Returns
+    -------
+    regressions : list
+        The names of the benchmarks slower than the baseline by more than
+        the tolerance.
+
+    """
+    regressions = []
+    for name, t in results.items():
+        ref = baseline["results"].get(name)
+        if ref is None:
+            print(f"{name:>40}: {t * 1e3:10.2f} ms  (not in baseline)")
+            continue
+        ratio = t / ref
+        flag = ""
+        if ratio > 1 + tolerance:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:>40}: {t * 1e3:10.2f} ms  {ref * 1e3:10.2f} ms  ({ratio:5.2f}x){flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark suite of EfsTA.")
+    parser.add_argument("--size", choices=list(SIZES), default="small")
+    parser.add_argument("--lambdas", type=int, help="Overrides the number of wavelengths.")
+    parser.add_argument("--delays", type=int, help="Overrides the number of delays.")
+    parser.add_argument("--species", type=int,
+                        help="Overrides the number of species, log-spaced lifetimes.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", help="Saves the timings as JSON baseline.")
+    parser.add_argument("--compare", help="Compares the timings with a JSON baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed relative slowdown against the baseline.")
+    args = parser.parse_args(argv)
+    size = dict(SIZES[args.size])
+    if args.lambdas is not None:
+        size["n_lambdas"] = args.lambdas
+    if args.delays is not None:
+        size["n_delays"] = args.delays
+    if args.species is not None:
+        size["tau"] = list(np.round(np.geomspace(0.5, 2000, args.species), 3))
+    print(f"{size['n_lambdas']} wavelengths x {size['n_delays']} delays x "
+          f"{len(size['tau'])} species, tau = {size['tau']}")
+    results, accuracy = runBenchmarks(**size, repeat=args.repeat)
+    for name, error in accuracy.items():
+        if error > 1e-2:
+            print(f"Warning: {name} recovered the lifetimes only to {error:.1%}.")
+    regressions = []
+    if args.compare is not None:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+    else:
+        for name, t in results.items():
+            print(f"{name:>40}: {t * 1e3:10.2f} ms")
+    if args.save is not None:
+        with open(args.save, "w") as f:
+            json.dump({"size": size,
+                       "machine": {"platform": platform.platform(),
+                                   "processor": platform.processor(),
+                                   "cpus": os.cpu_count(),
+                                   "python": platform.python_version(),
+                                   "numpy": np.__version__},
+                       "results": results,
+                       "accuracy": accuracy}, f, indent=2)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
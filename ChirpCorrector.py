@@ -2,8 +2,89 @@ import numpy as np
 import scipy.interpolate as sci
 import ChirpSelector as CS
 import CurvePrep as CP
+from Importers import RichertMatrixImport as RMI
+from Dataset import Dataset
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 import os
 
+
+def pchipSlopes(x, y):
+    """
+    Calculates the slopes of the pchip interpolation of every row of y at
+    once, identical to scipy.interpolate.PchipInterpolator (Fritsch and
+    Butland, SIAM J. Sci. Stat. Comput. 1984, 5, 300-304).
+
+    Parameters
+    ----------
+    x : np.array
+        The common, strictly increasing coordinates of the rows.
+    y : np.ndarray
+        The values (rows x len(x)).
+
+    Returns
+    -------
+    d : np.ndarray
+        The slopes at x for every row.
+
+    """
+    h = np.diff(x)
+    m = np.diff(y, axis=1) / h
+    d = np.empty_like(y)
+    if len(x) == 2:
+        d[:] = m
+        return d
+    m0, m1 = m[:, :-1], m[:, 1:]
+    w1 = 2 * h[1:] + h[:-1]
+    w2 = h[1:] + 2 * h[:-1]
+    zero = (np.sign(m0) != np.sign(m1)) | (m0 == 0) | (m1 == 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        whmean = (w1 / m0 + w2 / m1) / (w1 + w2)
+        d[:, 1:-1] = np.where(zero, 0.0, 1.0 / whmean)
+    for i, h0, h1, m0, m1 in ((0, h[0], h[1], m[:, 0], m[:, 1]),
+                              (-1, h[-1], h[-2], m[:, -1], m[:, -2])):
+        edge = ((2 * h0 + h1) * m0 - h0 * m1) / (h0 + h1)
+        limit = (np.sign(m0) != np.sign(m1)) & (np.abs(edge) > 3 * np.abs(m0))
+        edge = np.where(limit, 3 * m0, edge)
+        d[:, i] = np.where(np.sign(edge) != np.sign(m0), 0.0, edge)
+    return d
+
+
+def pchipShift(x, y, shift):
+    """
+    Evaluates the pchip interpolation of every row of y at x + shift of the
+    row in one vectorized pass. Points outside of x are extrapolated with
+    the first or last polynomial, like scipy.interpolate.pchip_interpolate.
+
+    Parameters
+    ----------
+    x : np.array
+        The common, strictly increasing coordinates of the rows.
+    y : np.ndarray
+        The values (rows x len(x)).
+    shift : np.array
+        The shift of every row.
+
+    Returns
+    -------
+    y_shift : np.ndarray
+        The interpolated values at x + shift.
+
+    """
+    d = pchipSlopes(x, y)
+    t = x[None, :] + shift[:, None]
+    j = np.searchsorted(x, t.ravel(), side="right").reshape(t.shape) - 1
+    j = np.clip(j, 0, len(x) - 2)
+    h = (x[1:] - x[:-1])[j]
+    s = (t - x[j]) / h
+    s2 = s * s
+    s3 = s2 * s
+    y_shift = (np.take_along_axis(y, j, 1) * (2 * s3 - 3 * s2 + 1)
+               + np.take_along_axis(y, j + 1, 1) * (3 * s2 - 2 * s3)
+               + h * np.take_along_axis(d, j, 1) * (s3 - 2 * s2 + s)
+               + h * np.take_along_axis(d, j + 1, 1) * (s3 - s2))
+    return y_shift
+
 class ChirpCorrector():
     def __init__(self, parameters, mainwindow):
         """
@@ -13,7 +94,10 @@ class ChirpCorrector():
         Parameters
         ----------
         parameters : dict
-            A dictionary containing all the input parameters.
+            A dictionary containing all the input parameters. The optional
+            "Workers" sets the number of processes used for the resampling
+            of large data sets and "Spike_Threshold" the smallest deviation
+            of a spike in the automatic chirp detection (default 0.2).
         mainwindow : MainWindow
             The mainwindow of the program to continue the analysis after the
             correction is finished.
@@ -31,38 +115,21 @@ class ChirpCorrector():
         self.options = parameters["Options"]
         self.exc_wave = parameters["Exc_Wave"]
         self.header = parameters["Header"]
+        self.workers = parameters.get("Workers")
+        self.spike_threshold = parameters.get("Spike_Threshold", 0.2)
         self.mainwindow = mainwindow
         self.popt = []
 
     def readData(self, path):
         """
-        Reads the data
+        Reads the raw data with the fast parser of RichertMatrixImport and
+        splits it into wavelengths, delays and absorptions.
 
         Parameters
         ----------
         path : string
             The path to the file containing the raw data.
 
-        Returns
-        -------
-        data : np.ndarray
-            The raw data in a single array as read by the readData function..
-
-        """
-        data = np.genfromtxt(path, delimiter=' ', skip_header=self.header)
-        return data
-
-    def splitData(self, data):
-        """
-        Splits the original np.ndarray containing all the data into three
-        separate np.array containing only wavelengths, delays and absorptions
-        respectively.
-
-        Parameters
-        ----------
-        data : np.ndarray
-            The raw data in a single array as read by the readData function.
-
         Returns
         -------
         wave : np.array
@@ -73,22 +140,34 @@ class ChirpCorrector():
             The absorption data of the measurement.
 
         """
-        wave = data[0][1:]
-        time = data.T[0][1:] * 100
-        time = time.round() / 100
-        spec = data[1:]
-        spec = spec.T[1:]
+        wave, time, spec = RMI(path, self.header).readData()
         return wave, time, spec
 
-    def removeNaNinf(self, spec):
+    def removeNaNinf(self, spec, strategy=None, axis=0, x=None):
         """
-        Checks the data for NaN, -inf and inf values and removes the by
-        replacing them with previous/following values.
+        Checks the data for NaN, -inf and inf values and repairs them along
+        the given axis at once for all rows, using the nearest valid values
+        before and after each invalid value.
+        The number of repaired values in every row, i.e. summed along the
+        axis, is saved in self.repaired.
 
         Parameters
         ----------
         spec : np.ndarray
             The absorption data of the measurement.
+        strategy : string, optional
+            "mean" replaces invalid values by the mean of their nearest valid
+            neighbours, "linear" and "pchip" interpolate between the valid
+            values and "drop" removes the indices along the axis that contain
+            invalid values, the kept indices are saved in self.kept.
+            Invalid values at the edges are replaced by the nearest valid
+            value, rows without valid values are set to 0. The default is
+            None, which uses the strategy of the options.
+        axis : int, optional
+            The axis along which the values are repaired. The default is 0.
+        x : np.array, optional
+            The coordinates along the axis used by "linear" and "pchip".
+            The default is None, which uses the indices.
 
         Returns
         -------
@@ -96,30 +175,51 @@ class ChirpCorrector():
             The absorption data of the measurement without invalid values.
 
         """
-        nan = ~np.isfinite(spec)
-        if nan.ndim == 1:
-            print("Warning: removeNaNinf() has detected and removed NaNs / infs in spectra.")
-            pos = np.where(nan)[0]
-            for i, val in enumerate(pos):
-                if val == 0:
-                    spec[pos[i]] = spec[pos[i] + 1]
-                elif val == len(spec) - 1:
-                    spec[pos[i]] = spec[pos[i] - 1]
-                else:
-                    new_value = (spec[pos[i] + 1] + spec[pos[i] - 1]) / 2
-                    spec[pos[i]] = new_value
-        elif nan.ndim == 2:
-            cols, rows = np.where(nan)
-            for i, val in enumerate(cols):
-                if val == 0:
-                    spec[cols[i], rows[i]] = spec[cols[i] + 1, rows[i]]
-                elif val == len(spec) - 1:
-                    spec[cols[i], rows[i]] = spec[cols[i] - 1, rows[i]]
-                else:
-                    new_value = (spec[cols[i] - 1, rows[i]] + spec[cols[i] + 1, rows[i]]) / 2
-                    spec[cols[i], rows[i]] = new_value
+        if strategy is None:
+            strategy = self.options["NaN"]
+        spec = np.asarray(spec, dtype="float64")
+        bad = ~np.isfinite(spec)
+        self.repaired = bad.sum(axis=axis)
+        self.kept = ~np.any(bad, axis=tuple(i for i in range(spec.ndim)
+                                            if i != axis % spec.ndim))
+        if not bad.any():
+            return spec
+        print(f"Warning: removeNaNinf() has detected {bad.sum()} NaNs / infs "
+              f"in spectra, strategy: {strategy}.")
+        if strategy == "drop":
+            return np.compress(self.kept, spec, axis=axis)
+        data = np.moveaxis(spec, axis, -1)
+        shape = data.shape
+        data = data.reshape(-1, shape[-1]).copy()
+        bad = ~np.isfinite(data)
+        n = data.shape[1]
+        x = np.arange(n, dtype="float64") if x is None else np.asarray(x, dtype="float64")
+        ind = np.arange(n)
+        prev = np.maximum.accumulate(np.where(bad, -1, ind), axis=1)
+        nxt = np.minimum.accumulate(np.where(bad, n, ind)[:, ::-1], axis=1)[:, ::-1]
+        has_prev = prev >= 0
+        has_next = nxt < n
+        v_prev = np.take_along_axis(data, np.clip(prev, 0, n - 1), axis=1)
+        v_next = np.take_along_axis(data, np.clip(nxt, 0, n - 1), axis=1)
+        both = has_prev & has_next
+        new = np.where(has_prev, v_prev, np.where(has_next, v_next, 0.0))
+        if strategy == "linear":
+            x_prev = x[np.clip(prev, 0, n - 1)]
+            x_next = x[np.clip(nxt, 0, n - 1)]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                w = (x[None, :] - x_prev) / (x_next - x_prev)
+            new = np.where(both, v_prev + w * (v_next - v_prev), new)
         else:
-            spec = spec
+            new = np.where(both, (v_prev + v_next) / 2, new)
+        data[bad] = new[bad]
+        if strategy == "pchip":
+            for row in np.flatnonzero(np.any(bad & both, axis=1)):
+                good = ~bad[row]
+                if good.sum() >= 2:
+                    inner = bad[row] & both[row]
+                    data[row, inner] = sci.pchip_interpolate(x[good], data[row, good],
+                                                             x[inner])
+        spec = np.moveaxis(data.reshape(shape), -1, axis)
         return spec
 
     def genLV(self, wave):
@@ -188,10 +288,13 @@ class ChirpCorrector():
             scale = (1 - 10**-self.scale) / (2.3 * self.scale)
         return spec - (background * scale)
 
-    def findMinima(self, chirp_wave, chirp_t, chirp_spec):
+    def findMinima(self, chirp_wave, chirp_t, chirp_spec, refine=None):
         """
         Finds and returns the minima of the spectrum of each wavelength of the
-        OKE / Chirp measurement.
+        OKE / Chirp measurement. The minima of all wavelengths are found at
+        once and can be refined between the delays by a parabola through the
+        minimum and its neighbours, fitted either to the data ("parabolic")
+        or to its logarithm ("gaussian").
 
         Parameters
         ----------
@@ -201,6 +304,9 @@ class ChirpCorrector():
             The delays of the measured spectra.
         chirp_spec : np.ndarray
             The OKE / Chirp measurement.
+        refine : string, optional
+            "parabolic", "gaussian" or None for the delays of the minima.
+            The default is None.
 
         Returns
         -------
@@ -209,15 +315,34 @@ class ChirpCorrector():
             OKE / Chirp measurement.
 
         """
-        centers = np.zeros(len(chirp_wave))
-        for i in range(len(chirp_wave) - 1):
-            ind = np.argmin(chirp_spec[:, i])
-            centers[i] = chirp_t[ind]
+        chirp_t = np.asarray(chirp_t, dtype="float64")
+        ind = np.argmin(chirp_spec, axis=0)
+        centers = chirp_t[ind]
+        if refine not in ("parabolic", "gaussian") or len(chirp_t) < 3:
+            return centers
+        cols = np.arange(chirp_spec.shape[1])
+        mid = np.clip(ind, 1, len(chirp_t) - 2)
+        t0, t1, t2 = chirp_t[mid - 1], chirp_t[mid], chirp_t[mid + 1]
+        y0, y1, y2 = (chirp_spec[mid - 1, cols], chirp_spec[mid, cols],
+                      chirp_spec[mid + 1, cols])
+        valid = (ind == mid)
+        if refine == "gaussian":
+            valid &= (y0 < 0) & (y1 < 0) & (y2 < 0)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                y0, y1, y2 = -np.log(-y0), -np.log(-y1), -np.log(-y2)
+        denom = (t0 - t1) * (t0 - t2) * (t1 - t2)
+        a = (t2 * (y1 - y0) + t1 * (y0 - y2) + t0 * (y2 - y1)) / denom
+        b = (t2**2 * (y0 - y1) + t1**2 * (y2 - y0) + t0**2 * (y1 - y2)) / denom
+        valid &= a > 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            vertex = np.clip(-b / (2 * a), t0, t2)
+        centers = np.where(valid, vertex, centers)
         return centers
 
     def correctShift(self, shift):
         """
-        Corrects the temporal shift of the spectral data.
+        Corrects the temporal shift of the spectral data. If the chirp is
+        fitted in the model, the data is handed over without resampling.
 
         Parameters
         ----------
@@ -229,14 +354,44 @@ class ChirpCorrector():
         None.
 
         """
-        data_c = self.sample_spec.T
-        data_cc = np.zeros_like(data_c)
-        for i in range(len(data_c)):
-            t_shift = self.time + shift[i]
-            data_nn = self.removeNaNinf(data_c[i])
-            data_cc[i, :] = sci.pchip_interpolate(self.time, data_nn, t_shift)
+        strategy = "linear" if self.options["NaN"] == "drop" else None
+        data_c = self.removeNaNinf(self.sample_spec.T, strategy, axis=1, x=self.time)
+        if self.options["Fit"] is True:
+            self.handOver(self.wave, self.time, data_c)
+            return
+        data_cc = self.resampleShift(data_c, np.asarray(shift, dtype="float64"))
         self.saveToTxt(self.wave, self.time, data_cc)
 
+    def resampleShift(self, data, shift):
+        """
+        Resamples every wavelength of the data at the delays plus its shift
+        with a pchip interpolation of all wavelengths at once. If more than
+        one worker is set, blocks of wavelengths are resampled in parallel
+        processes.
+
+        Parameters
+        ----------
+        data : np.ndarray
+            The spectral data (wavelengths x delays).
+        shift : np.array
+            The shift for each wavelength.
+
+        Returns
+        -------
+        data_cc : np.ndarray
+            The resampled spectral data.
+
+        """
+        if self.workers is None or self.workers < 2 or len(data) < 2 * self.workers:
+            return pchipShift(self.time, data, shift)
+        blocks = np.array_split(np.arange(len(data)), self.workers)
+        with ProcessPoolExecutor(self.workers) as executor:
+            parts = executor.map(pchipShift, repeat(self.time),
+                                 (data[block] for block in blocks),
+                                 (shift[block] for block in blocks))
+            data_cc = np.vstack(list(parts))
+        return data_cc
+
     def prepareSample(self):
         """
         Prepares the sample data by reading, splitting, truncating and
@@ -247,12 +402,15 @@ class ChirpCorrector():
         None.
 
         """
-        data = self.readData(self.sample_dir)
-        wave, self.time, spec = self.splitData(data)
+        wave, self.time, spec = self.readData(self.sample_dir)
         self.genLV(wave)
         if self.options["Scatter"] is True and self.exc_wave is not None:
             spec = self.scattering(spec)
         spec_NN = self.removeNaNinf(spec).T
+        if self.options["NaN"] == "drop":
+            self.sample_kept = self.kept
+            self.lv = self.lv[self.kept]
+            self.wave = wave[self.kept][self.lv]
         spec_trunc = self.truncateSpec(spec_NN)
         if self.options["rmBG"] is True:
             self.prepareBackground()
@@ -263,16 +421,21 @@ class ChirpCorrector():
     def prepareBackground(self):
         """
         Prepares the background data by reading, splitting and truncating
-        as well as removing any NaN values.
+        as well as removing any NaN values. If wavelengths with NaN values
+        were dropped from the sample, they are dropped from the background
+        and its remaining NaN values are interpolated.
 
         Returns
         -------
         None.
 
         """
-        data = self.readData(self.solvent_dir)
-        wave, bg_time, spec = self.splitData(data)
-        spec_NN = self.removeNaNinf(spec).T
+        wave, bg_time, spec = self.readData(self.solvent_dir)
+        strategy = None
+        if self.options["NaN"] == "drop":
+            spec = spec[self.sample_kept]
+            strategy = "linear"
+        spec_NN = self.removeNaNinf(spec, strategy).T
         self.background = self.truncateSpec(spec_NN)
    
     def prepareChirp(self):
@@ -294,9 +457,10 @@ class ChirpCorrector():
             select_spec = self.sample_spec[lv_t, :]
             self.CPC = CP.CurveClicker(self.wave, t, select_spec, self)
         else:
-            data = self.readData(self.chirp_dir)
-            wave, chirp_time, spec = self.splitData(data)
+            wave, chirp_time, spec = self.readData(self.chirp_dir)
             spec_NN = self.removeNaNinf(spec).T
+            if self.options["NaN"] == "drop":
+                wave = wave[self.kept]
             lv_t = (chirp_time >= -1) & (chirp_time <= 1)
             chirp_t = chirp_time[lv_t]
             chirp_spec = spec_NN[lv_t, :]
@@ -321,12 +485,13 @@ class ChirpCorrector():
         None.
 
         """
-        centers = self.findMinima(chirp_wave, chirp_t, sel_spec)
+        centers = self.findMinima(chirp_wave, chirp_t, sel_spec,
+                                  self.options["Refine"])
         if self.options["Manually"] is True:
             self.CPL = CP.LassoSelector(self.wave, chirp_wave, centers, self)
         else:
             CPA = CP.AutoSelector(self.wave, chirp_wave, centers)
-            ns_wave, ns_centers = CPA.removeSpikes()
+            ns_wave, ns_centers = CPA.removeSpikes(self.spike_threshold)
             shift, self.popt = CPA.fitCurve(ns_wave, ns_centers)
             self.correctShift(shift)
 
@@ -353,6 +518,38 @@ class ChirpCorrector():
         data = spec - np.tile(scatter, (1, len(self.time)))
         return data
 
+    def handOver(self, wave, time, spec):
+        """
+        Hands over the truncated but uncorrected data together with the
+        curve fit parameters to the EfsTA object in memory, so that the chirp
+        is fitted in the model without writing and parsing the data again.
+        The results are saved in chirped_Data/analysis next to the sample.
+
+        Parameters
+        ----------
+        wave : np.array
+            The truncated wavelengths.
+        time : np.array
+            The delays.
+        spec : np.ndarray
+            The truncated spectral data.
+
+        Returns
+        -------
+        None.
+
+        """
+        file = self.sample_dir.split("/")[-1].split(".")[0]
+        path = "/".join(self.sample_dir.split("/")[:-1])
+        save_path = f"{path}/chirped_Data"
+        dataset = Dataset.fromArrays(f"{save_path}/{file}_delays.txt",
+                                     f"{save_path}/{file}_taspectra.txt",
+                                     f"{save_path}/{file}_lambda.txt",
+                                     time, spec, wave)
+        self.mainwindow.ui.Data_directory.setText(save_path)
+        self.mainwindow.readData(save_path, dataset, np.asarray(self.popt))
+        self.mainwindow.ui.UI_stack.setCurrentIndex(3)
+
     def saveToTxt(self, corr_wave, corr_time, corr_spec):
         """
         Saves the corrected and truncated wavelengths, delays, spectral data
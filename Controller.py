@@ -1,4 +1,9 @@
 from Model import Model
+from Dataset import Dataset
+from FitTrace import FitTrace
+from LifetimeDensity import LifetimeDensity
+from ResultStore import ResultStore
+import os
 import numpy as np
 from pathlib import Path
 from datetime import datetime
@@ -7,7 +12,7 @@ from Importers import RichertImport as RI
 
 
 class Controller():
-    def __init__(self, path):
+    def __init__(self, path, dataset=None, chirp=None):
         """
         Initiates the controller and loads the data from the given path.
 
@@ -15,6 +20,12 @@ class Controller():
         ----------
         path : string
             Path where the folder containing the data is located.
+        dataset : Dataset, optional
+            The data in memory, e.g. handed over by the ChirpCorrector, which
+            is used instead of the files in the folder. The default is None.
+        chirp : np.array, optional
+            The parameters of the dispersion curve of the data in memory.
+            Only used together with dataset. The default is None.
 
         Returns
         -------
@@ -22,10 +33,37 @@ class Controller():
 
         """
         self.path = path
-        importer = RI(path)
-        self.lambdas_filename, self.delays_filename, self.spectra_filename = importer.get_Data()
+        if dataset is None:
+            importer = RI(path)
+            self.lambdas_filename, self.delays_filename, self.spectra_filename = importer.get_Data()
+            self.chirp = importer.get_Chirp()
+        else:
+            os.makedirs(path, exist_ok=True)
+            self.delays_filename, self.spectra_filename, self.lambdas_filename = dataset.filenames
+            self.chirp = chirp
+        self.dataset = dataset
+        self.text_export = False
+        self.renderer = None
+
+    def getDataset(self):
+        """
+        Loads the data of the files once and returns the Dataset shared by
+        all Model objects of the controller.
+
+        Returns
+        -------
+        dataset : Dataset
+            The delays, lambdas and spectra of the measurement.
 
-    def calcDAS(self, preparam, d_limits, l_limits, opt_method):
+        """
+        if self.dataset is None:
+            self.dataset = Dataset(self.delays_filename, self.spectra_filename,
+                                   self.lambdas_filename)
+        return self.dataset
+
+    def calcDAS(self, preparam, d_limits, l_limits, opt_method, varpro=False,
+                svd_rank=None, irf=None, chirp=None, iter_cb=None, trace=False,
+                n_bootstrap=0, profile=False, ci_workers=None, cache=False):
         """
         Calculates the Decay Associated Spectra and outputs the fitted decay
         constants tau, the calculated spectra, the residuals and the DAS.
@@ -41,6 +79,46 @@ class Controller():
             Lower and upper limits for the lambda values.
         opt_method : string
             The algorithm used by the minimize function.
+        varpro : bool, optional
+            If True, the lifetimes are fitted by variable projection.
+            The default is False.
+        svd_rank : int/string, optional
+            If given, the lifetimes are fitted against the spectra compressed
+            to this number of singular vectors, "auto" chooses the number
+            from the singular values. Not used together with chirp.
+            The default is None.
+        irf : list, optional
+            A list containing tuples with the FWHM and t0 of a gaussian IRF
+            and a boolean stating if the value will be varied. If given, the
+            model functions are convolved with the IRF. The default is None.
+        chirp : list, np.array, optional
+            The parameters of the dispersion curve of the chirp correction.
+            If given, the model functions of every wavelength are shifted
+            by the chirp instead of resampling the data. The default is None.
+        iter_cb : function, optional
+            Called as iter_cb(iteration, chisqr, tau) during the fit to report
+            its progress. If it returns True, the fit is aborted and the
+            results are not saved. The default is None.
+        trace : bool, optional
+            If True, every evaluation of the residuals and the time spent in
+            its stages are recorded and saved as *_trace.json and
+            *_trace.csv next to the results. The default is False.
+        n_bootstrap : int, optional
+            The number of bootstrap samples of the spectra refitted to
+            obtain confidence intervals of the lifetimes. The intervals are
+            saved as *_confidence.txt next to the results. The default is 0.
+        profile : bool, optional
+            If True, the confidence intervals of the lifetimes are also
+            calculated by profile likelihood. The default is False.
+        ci_workers : int, optional
+            The number of processes running the refits of the confidence
+            intervals. None uses all cores. The default is None.
+        cache : bool, optional
+            If True, the matrices of lifetimes evaluated before are taken
+            from a bounded cache instead of being calculated again. The
+            cached matrices are not written into the reused buffer of the
+            exponentials, so it only pays off for expensive IRFs.
+            The default is False.
 
         Returns
         -------
@@ -59,19 +137,39 @@ class Controller():
         """
         tau = [tau[0] for tau in preparam]
         self.DAS = Model(self.delays_filename, self.spectra_filename,
-                         self.lambdas_filename, d_limits, l_limits, 0, opt_method, None)
+                         self.lambdas_filename, d_limits, l_limits, 0, opt_method, None,
+                         varpro=varpro, dataset=self.getDataset())
+        self.DAS.setChirp(chirp)
+        if svd_rank is not None and chirp is None:
+            self.DAS.compressSpectra(svd_rank, len(tau))
+        self.DAS.setIRF(irf)
         self.DAS.M = self.DAS.getM(tau)
+        self.DAS.setIterCallback(iter_cb)
+        if cache is True:
+            self.DAS.setCache()
+        if trace is True:
+            self.DAS.setTrace(FitTrace())
         tau_fit, fit_report = self.DAS.findTau_fit(preparam, opt_method)
         D_fit = self.DAS.calcD_fit()
         spec = self.DAS.calcA_fit()
         res = self.DAS.calcResiduals()
-        self.saveResults(0, tau, tau_fit,
-                         l_limits, d_limits, spec, D_fit,
-                         self.DAS.getTauBounds(tau), self.DAS.lambdas,
-                         self.DAS.delays, self.DAS.spectra, fit_report)
+        if self.DAS.aborted is False:
+            self.saveResults(0, tau, tau_fit,
+                             l_limits, d_limits, spec, D_fit,
+                             self.DAS.getTauBounds(tau), self.DAS.lambdas,
+                             self.DAS.delays, self.DAS.spectra, fit_report)
+            if trace is True:
+                self.saveTrace(0)
+            if n_bootstrap > 0 or profile is True:
+                self.DAS.calcConfidence(opt_method, n_bootstrap, profile,
+                                        workers=ci_workers)
+                self.saveConfidence(0)
         return tau_fit, spec, res, D_fit, fit_report
 
-    def calcSAS(self, K, preparam, C_0, d_limits, l_limits, model, tau_low, tau_high, opt_method, ivp_method):
+    def calcSAS(self, K, preparam, C_0, d_limits, l_limits, model, tau_low, tau_high, opt_method, ivp_method,
+                varpro=False, svd_rank=None, irf=None, chirp=None, iter_cb=None,
+                trace=False, n_starts=None, start_workers=None, n_bootstrap=0,
+                profile=False, ci_workers=None, cache=True):
         """
         Calculated the Species Associated Spectra and outputs the fitted
         decay constants tau, the calculated spectra and the residuals.
@@ -101,6 +199,52 @@ class Controller():
             The algorithm used by the minimize function.
         ivp_method : string
             The algorithm used by the initial value problem solver.
+        varpro : bool, optional
+            If True, the lifetimes are fitted by variable projection.
+            The default is False.
+        svd_rank : int/string, optional
+            If given, the lifetimes are fitted against the spectra compressed
+            to this number of singular vectors, "auto" chooses the number
+            from the singular values. Not used together with chirp.
+            The default is None.
+        irf : list, optional
+            A list containing tuples with the FWHM and t0 of a gaussian IRF
+            and a boolean stating if the value will be varied. If given, the
+            model functions are convolved with the IRF. The default is None.
+        chirp : list, np.array, optional
+            The parameters of the dispersion curve of the chirp correction.
+            If given, the model functions of every wavelength are shifted
+            by the chirp instead of resampling the data. The default is None.
+        iter_cb : function, optional
+            Called as iter_cb(iteration, chisqr, tau) during the fit to report
+            its progress. If it returns True, the fit is aborted and the
+            results are not saved. The default is None.
+        trace : bool, optional
+            If True, every evaluation of the residuals and the time spent in
+            its stages are recorded and saved as *_trace.json and
+            *_trace.csv next to the results. The default is False.
+        n_starts : int, optional
+            If larger than 1, the fit is started from this number of starting
+            lifetimes sampled within tau_low and tau_high and the best fit is
+            refined. All converged solutions are saved as *_multistart.txt
+            next to the results. The default is None.
+        start_workers : int, optional
+            The number of processes running the fits of the starting
+            lifetimes. None uses all cores. The default is None.
+        n_bootstrap : int, optional
+            The number of bootstrap samples of the spectra refitted to
+            obtain confidence intervals of the lifetimes. The intervals are
+            saved as *_confidence.txt next to the results. The default is 0.
+        profile : bool, optional
+            If True, the confidence intervals of the lifetimes are also
+            calculated by profile likelihood. The default is False.
+        ci_workers : int, optional
+            The number of processes running the refits of the confidence
+            intervals. None uses all cores. The default is None.
+        cache : bool, optional
+            If True, the matrices of lifetimes evaluated before are taken
+            from a bounded cache instead of being solved again.
+            The default is True.
 
         Returns
         -------
@@ -120,7 +264,9 @@ class Controller():
         tau = [tau[0] for tau in preparam]
         self.SAS = Model(self.delays_filename, self.spectra_filename,
                          self.lambdas_filename, d_limits, l_limits, model,
-                         opt_method, ivp_method)
+                         opt_method, ivp_method, varpro=varpro,
+                         dataset=self.getDataset())
+        self.SAS.setChirp(chirp)
         if (model == "custom model" or model == "custom matrix"):
             M_lin = self.SAS.getM_lin(K)
             K, n = self.SAS.getK(M_lin)
@@ -131,16 +277,225 @@ class Controller():
             self.SAS.setTauBounds(tau_low, tau_high, tau)
             K, n = self.SAS.getK(tau)
         self.SAS.setInitialConcentrations(C_0)
+        self.SAS.setIRF(irf)
+        if svd_rank is not None and chirp is None:
+            self.SAS.compressSpectra(svd_rank, n)
         self.SAS.solveDiff(ivp_method)
+        self.SAS.setIterCallback(iter_cb)
+        if cache is True:
+            self.SAS.setCache()
+        if trace is True:
+            self.SAS.setTrace(FitTrace())
+        self.SAS.setMultiStart(n_starts, start_workers)
         tau_fit, fit_report = self.SAS.findTau_fit(preparam, opt_method)
         D_fit = self.SAS.calcD_fit()
         spec = self.SAS.calcA_fit()
         res = self.SAS.calcResiduals()
-        self.saveResults(model, tau, tau_fit, l_limits, d_limits, spec, D_fit,
-                         self.SAS.getTauBounds(tau), self.SAS.lambdas,
-                         self.SAS.delays, self.SAS.spectra, fit_report)
+        if self.SAS.aborted is False:
+            self.saveResults(model, tau, tau_fit, l_limits, d_limits, spec, D_fit,
+                             self.SAS.getTauBounds(tau), self.SAS.lambdas,
+                             self.SAS.delays, self.SAS.spectra, fit_report)
+            if trace is True:
+                self.saveTrace(model)
+            if self.SAS.n_starts is not None and self.SAS.n_starts > 1:
+                self.saveMultiStart()
+            if n_bootstrap > 0 or profile is True:
+                self.SAS.calcConfidence(opt_method, n_bootstrap, profile,
+                                        workers=ci_workers)
+                self.saveConfidence(model)
         return tau_fit, spec, res, D_fit, fit_report
 
+    def calcLDA(self, d_limits, l_limits, tau_min=None, tau_max=None, n_tau=200,
+                alpha=None, method="gcv", l1_ratio=None, irf=None):
+        """
+        Calculates the lifetime density map, the amplitudes of a dense
+        log-spaced grid of lifetimes for every wavelength, so that the number
+        of lifetimes does not have to be guessed as for the GLA.
+
+        Parameters
+        ----------
+        d_limits : list with two int/float elements
+            Lower and upper limits for the delay values.
+        l_limits : list with two int/float elements
+            Lower and upper limits for the lambda values.
+        tau_min : float, optional
+            The shortest lifetime of the grid. The default is None, which
+            uses the smallest delay step.
+        tau_max : float, optional
+            The longest lifetime of the grid. The default is None, which
+            uses twice the largest delay.
+        n_tau : int, optional
+            The number of lifetimes of the grid. The default is 200.
+        alpha : float, optional
+            The regularization strength. The default is None, which chooses
+            it by the method.
+        method : string, optional
+            "gcv" for the minimum of the generalized cross validation or
+            "lcurve" for the corner of the L-curve. The default is "gcv".
+        l1_ratio : float, optional
+            If given, the map is regularized by an elastic net with this share
+            of the L1 penalty instead of Tikhonov regularization, which
+            favours distinct lifetimes. The default is None.
+        irf : list, optional
+            A list containing tuples with the FWHM and t0 of a gaussian IRF.
+            If given, the decays are convolved with the IRF.
+            The default is None.
+
+        Returns
+        -------
+        taus : np.array
+            The lifetimes of the grid.
+        D_fit : np.array
+            The lifetime density map (lambdas x taus).
+        spec : np.array
+            The spectra calculated from the map.
+        res : np.array
+            Residuals from the LDA. The difference between the calculated
+            and the original spectra.
+        alpha : float
+            The regularization strength.
+
+        """
+        self.LDA = Model(self.delays_filename, self.spectra_filename,
+                         self.lambdas_filename, d_limits, l_limits, 0, None,
+                         None, dataset=self.getDataset())
+        self.LDA.setIRF(irf)
+        self.density = LifetimeDensity(self.LDA, tau_min, tau_max, n_tau)
+        if alpha is None:
+            alpha = self.density.findAlpha(method)
+        else:
+            self.density.scanAlpha()
+        if l1_ratio is None:
+            D_fit = self.density.calcTikhonov(alpha)
+        else:
+            D_fit = self.density.calcElasticNet(alpha, l1_ratio)
+        spec = self.density.calcA(D_fit)
+        res = spec - self.LDA.spectra
+        self.LDA.M_fit = self.density.M
+        self.LDA.D_fit = D_fit
+        self.LDA.spec = spec
+        self.LDA.residuals = res
+        self.LDA.alpha = alpha
+        self.saveLDA(d_limits, l_limits, method, l1_ratio)
+        return self.density.taus, D_fit, spec, res, alpha
+
+    def saveLDA(self, d_limits, l_limits, method, l1_ratio):
+        """
+        Saves the lifetime density map, its lifetimes, the reconstructed
+        spectra and the scan of the regularization strength as a run of the
+        result container and the settings as *_LDA_results.txt. With
+        text_export they are also saved as *_LDA_density.txt,
+        *_LDA_taus.txt, *_LDA_A_fit.txt and *_LDA_scan.txt.
+
+        Parameters
+        ----------
+        d_limits : list with two int/float elements
+            Lower and upper limits for the delay values.
+        l_limits : list with two int/float elements
+            Lower and upper limits for the lambda values.
+        method : string
+            The method choosing the regularization strength.
+        l1_ratio : float
+            The share of the L1 penalty of the elastic net or None.
+
+        Returns
+        -------
+        None.
+
+        """
+        time_unit = self.labels[1].split("/")[1]
+        x_axis_unit = self.labels[0].split("/")[1]
+        path = self.LDA.path
+        name = self.LDA.name + "_LDA"
+        taus = self.density.taus
+        regularization = "Tikhonov"
+        if l1_ratio is not None:
+            regularization = f"elastic net, L1 ratio {l1_ratio}"
+        dt_string = datetime.now().strftime("%d.%m.%Y %H:%M:%S")
+        scan = self.density.scan
+        store = self.getStore(self.LDA)
+        run = store.addRun(
+            "LDA",
+            {"density": self.LDA.D_fit, "taus": taus, "A_fit": self.LDA.spec,
+             "lambdas": self.LDA.lambdas, "delays": self.LDA.delays,
+             "alpha": scan["alpha"], "rss": scan["rss"], "norm": scan["norm"],
+             "gcv": scan["gcv"], "d_borders": self.LDA.d_borders,
+             "l_borders": self.LDA.l_borders},
+            {"date": dt_string, "regularization": regularization,
+             "alpha": self.LDA.alpha, "method": method, "l_limits": l_limits,
+             "d_limits": d_limits, "irf": self.LDA.irf, "labels": self.labels,
+             "spectra_file": self.spectra_filename})
+        with open(path + name + "_results.txt", "w") as f:
+            f.write(
+                f"{dt_string}\n{name}\nLifetime density analysis\n"
+                f"Lifetimes / {time_unit}: {len(taus)} from {taus[0]:.4g} to {taus[-1]:.4g}\n"
+                f"Regularization: {regularization}\n"
+                f"Regularization strength: {self.LDA.alpha:.6g} ({method})\n"
+                f"Wavelength/Field range: {l_limits[0]} - {l_limits[1]} {x_axis_unit}\n"
+                f"delay range: {d_limits[0]} - {d_limits[1]} {time_unit}\n"
+                f"IRF (FWHM, t0) / {time_unit}: {self.LDA.irf}\n"
+                f"Sum of squared residuals: {np.sum(np.square(self.LDA.residuals)):.6g}\n\n"
+                f"Arrays: {os.path.basename(store.filename)}, run {run}\n\n"
+                f"All results and plots can be found here:\n\n{path}"
+            )
+        if self.text_export is True:
+            np.savetxt(path + name + "_density.txt", self.LDA.D_fit)
+            np.savetxt(path + name + "_taus.txt", taus)
+            np.savetxt(path + name + "_A_fit.txt", self.LDA.spec)
+            np.savetxt(path + name + "_scan.txt",
+                       np.column_stack([scan["alpha"], scan["rss"], scan["norm"],
+                                        scan["gcv"]]),
+                       header="alpha rss norm gcv")
+
+    def draw(self, model, method, *args, **kwargs):
+        """
+        Plots the data of a model. Without a renderer the plot is drawn and
+        shown in this process, otherwise it is rendered and saved in the
+        background, see Renderer.
+
+        Parameters
+        ----------
+        model : Model
+            The model whose data is plotted.
+        method : string
+            The name of the method of the Plotter, e.g. "plotHeat".
+        *args, **kwargs
+            The arguments of the method.
+
+        Returns
+        -------
+        future : concurrent.futures.Future
+            The future of the paths to the saved files, see Renderer.submit.
+            None without a renderer.
+
+        """
+        if self.renderer is None:
+            getattr(model.getPlotter(interactive=True), method)(*args, **kwargs)
+            return None
+        return self.renderer.submit(model, method, *args, **kwargs)
+
+    def plotLDA(self, v_min, v_max, mul):
+        """
+        Plots the lifetime density map as heatmap of the amplitudes in
+        lifetimes against lambdas.
+
+        Parameters
+        ----------
+        v_min : float
+            Lower limit for the colorbar.
+        v_max : float
+            Upper limit for the colorbar.
+        mul : float
+            The value by which the map will be multiplied.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.draw(self.LDA, "plotLDA", self.density.taus, self.LDA.D_fit,
+                  v_min, v_max, mul, self.labels)
+
     def plot3OrigData(self, wave, time, v_min, v_max,
                       cont, mul):
         """
@@ -179,8 +534,8 @@ class Controller():
             custom = "1+2"
         else:
             custom = "1+2+3"
-        self.origData.plotCustom(self.origData.spectra, wave, time,
-                                 v_min, v_max, custom, cont, mul, self.labels)
+        self.draw(self.origData, "plotCustom", self.origData.spectra, wave, time,
+                  v_min, v_max, custom, cont, mul, self.labels)
 
     def plot3DOrigData(self, v_min, v_max, mul):
         """
@@ -199,7 +554,7 @@ class Controller():
         None.
 
         """
-        self.origData.plot3D(self.origData.spectra, v_min, v_max, mul, self.labels)
+        self.draw(self.origData, "plot3D", self.origData.spectra, v_min, v_max, mul, self.labels)
 
     def plot3FittedData(self, wave, time, v_min, v_max, model, cont, mul):
         """
@@ -243,11 +598,11 @@ class Controller():
         else:
             custom = "1+2+3"
         if model == 0:
-            self.DAS.plotCustom(self.DAS.spec, wave, time,
-                                v_min, v_max, custom, cont, mul, self.labels, add="_GLA")
+            self.draw(self.DAS, "plotCustom", self.DAS.spec, wave, time,
+                      v_min, v_max, custom, cont, mul, self.labels, add="_GLA")
         else:
-            self.SAS.plotCustom(self.SAS.spec, wave, time,
-                                v_min, v_max, custom, cont, mul, self.labels, add="_GTA")
+            self.draw(self.SAS, "plotCustom", self.SAS.spec, wave, time,
+                      v_min, v_max, custom, cont, mul, self.labels, add="_GTA")
 
     def plot3DFittedData(self, v_min, v_max, model, mul):
         """
@@ -271,9 +626,9 @@ class Controller():
 
         """
         if model == 0:
-            self.DAS.plot3D(self.DAS.spec, v_min, v_max, mul, self.labels, add="_GLA")
+            self.draw(self.DAS, "plot3D", self.DAS.spec, v_min, v_max, mul, self.labels, add="_GLA")
         else:
-            self.SAS.plot3D(self.SAS.spec, v_min, v_max, mul, self.labels, add="_GTA")
+            self.draw(self.SAS, "plot3D", self.SAS.spec, v_min, v_max, mul, self.labels, add="_GTA")
 
     def createOrigData(self, d_limits, l_limits, opt_method, ivp_method):
         """
@@ -296,7 +651,7 @@ class Controller():
         """
         self.origData = Model(self.delays_filename, self.spectra_filename,
                               self.lambdas_filename, d_limits, l_limits, None,
-                              opt_method, ivp_method)
+                              opt_method, ivp_method, dataset=self.getDataset())
 
     def plotCustom(self, wave, time, v_min, v_max, model, cont, custom, mul,
                    add=""):
@@ -332,17 +687,17 @@ class Controller():
 
         """
         if model is None:
-            self.origData.plotCustom(self.origData.spectra, wave, time,
-                                     v_min, v_max, custom, cont, mul, self.labels,
-                                     add="_" + add)
+            self.draw(self.origData, "plotCustom", self.origData.spectra, wave, time,
+                      v_min, v_max, custom, cont, mul, self.labels,
+                      add="_" + add)
         elif model == 0:
-            self.DAS.plotCustom(self.DAS.spec, wave, time,
-                                v_min, v_max, custom, cont, mul, self.labels,
-                                add="_GLA" + "_" + add)
+            self.draw(self.DAS, "plotCustom", self.DAS.spec, wave, time,
+                      v_min, v_max, custom, cont, mul, self.labels,
+                      add="_GLA" + "_" + add)
         else:
-            self.SAS.plotCustom(self.SAS.spec, wave, time,
-                                v_min, v_max, custom, cont, mul,
-                                add="_GTA" + "_" + add)
+            self.draw(self.SAS, "plotCustom", self.SAS.spec, wave, time,
+                      v_min, v_max, custom, cont, mul,
+                      add="_GTA" + "_" + add)
 
     def plotSolo(self, wave, time, v_min, v_max, model, cont, solo, mul, add=""):
         """
@@ -377,17 +732,17 @@ class Controller():
 
         """
         if model is None:
-            self.origData.plotSolo(self.origData.spectra, wave, time,
-                                   v_min, v_max, solo, cont, mul, self.labels,
-                                   add="_" + add)
+            self.draw(self.origData, "plotSolo", self.origData.spectra, wave, time,
+                      v_min, v_max, solo, cont, mul, self.labels,
+                      add="_" + add)
         elif model == 0:
-            self.DAS.plotSolo(self.DAS.spec, wave, time,
-                              v_min, v_max, solo, cont, mul, self.labels,
-                              add="_GLA" + "_" + add)
+            self.draw(self.DAS, "plotSolo", self.DAS.spec, wave, time,
+                      v_min, v_max, solo, cont, mul, self.labels,
+                      add="_GLA" + "_" + add)
         else:
-            self.SAS.plotSolo(self.SAS.spec, wave, time,
-                              v_min, v_max, solo, cont, mul, self.labels,
-                              add="_GTA" + "_" + add)
+            self.draw(self.SAS, "plotSolo", self.SAS.spec, wave, time,
+                      v_min, v_max, solo, cont, mul, self.labels,
+                      add="_GTA" + "_" + add)
 
     def plot1Dresiduals(self, model, mul):
         """
@@ -412,13 +767,13 @@ class Controller():
         if mul != 1:
             dot = " \cdot " + "10^" + str(ltx) + "$"
         if model == 0:
-            self.DAS.plotData(self.DAS.delays, self.DAS.residuals.T,
-                              self.labels[1], self.labels[2] + dot,
-                              add="_GLA_Residuals_")
+            self.draw(self.DAS, "plotData", self.DAS.delays, self.DAS.residuals.T,
+                      self.labels[1], self.labels[2] + dot,
+                      add="_GLA_Residuals_")
         else:
-            self.SAS.plotData(self.SAS.delays, self.SAS.residuals.T,
-                              self.labels[1], self.labels[2] + dot,
-                              add="_GTA_Residuals_")
+            self.draw(self.SAS, "plotData", self.SAS.delays, self.SAS.residuals.T,
+                      self.labels[1], self.labels[2] + dot,
+                      add="_GTA_Residuals_")
 
     def plot2Dresiduals(self, v_min, v_max, model, cont, mul):
         """
@@ -446,11 +801,11 @@ class Controller():
 
         """
         if model == 0:
-            self.DAS.plotHeat([], [], None, None, self.DAS.residuals, cont, mul,
-                              self.labels, add="_GLA_Residuals")
+            self.draw(self.DAS, "plotHeat", [], [], None, None, self.DAS.residuals, cont, mul,
+                      self.labels, add="_GLA_Residuals")
         else:
-            self.SAS.plotHeat([], [], None, None, self.SAS.residuals, cont, mul,
-                              self.labels, add="_GTA_Residuals")
+            self.draw(self.SAS, "plotHeat", [], [], None, None, self.SAS.residuals, cont, mul,
+                      self.labels, add="_GTA_Residuals")
 
     def plotKinetics(self, model):
         """
@@ -470,11 +825,32 @@ class Controller():
 
         """
         if model == 0:
-            self.DAS.plotData(self.DAS.delays, self.DAS.M.T, self.labels[1],
-                              "concentration", label=None, add="_GLA_kin")
+            self.draw(self.DAS, "plotData", self.DAS.delays, self.getKinetics(self.DAS),
+                      self.labels[1], "concentration", label=None, add="_GLA_kin")
         else:
-            self.SAS.plotData(self.SAS.delays, self.SAS.M.T, self.labels[1],
-                              "concentration", label=None, add="_GTA_kin")
+            self.draw(self.SAS, "plotData", self.SAS.delays, self.getKinetics(self.SAS),
+                      self.labels[1], "concentration", label=None, add="_GTA_kin")
+
+    def getKinetics(self, model):
+        """
+        Returns the concentrations against the delays. With a chirp they
+        differ for every wavelength, then those of the wavelength whose time
+        zero is closest to the time zero of the delays are returned.
+
+        Parameters
+        ----------
+        model : Model
+            The fitted DAS or SAS model.
+
+        Returns
+        -------
+        kinetics : np.array
+            The concentrations (delays x n).
+
+        """
+        if model.M.ndim == 3:
+            return model.M[np.argmin(np.abs(model.shift))].T
+        return model.M.T
 
     def plotDAS(self, model, tau, mul):
         """
@@ -512,32 +888,33 @@ class Controller():
             label = []
             for ind, tau in enumerate(tau):
                 label.append(f"$\\tau_{ind}=$ {tau}{unit}")
-            self.DAS.plotData(self.DAS.lambdas, self.DAS.D_fit,
-                              self.labels[0], self.labels[2] + dot,
-                              label=label, add="_DAS")
+            self.draw(self.DAS, "plotData", self.DAS.lambdas, self.DAS.D_fit,
+                      self.labels[0], self.labels[2] + dot,
+                      label=label, add="_DAS")
         elif (model == "custom model" or model == "custom matrix"):
             custom_tau = list(self.SAS.getM_lin(np.array(tau)))
             label = []
             for ind, tau in enumerate(tau):
                 label.append(f"$\\tau_{ind}=$ {custom_tau}{unit}")
-            self.SAS.plotData(self.SAS.lambdas, self.SAS.D_fit,
-                              self.labels[0], self.labels[2] + dot,
-                              label=label, add="_SAS")
+            self.draw(self.SAS, "plotData", self.SAS.lambdas, self.SAS.D_fit,
+                      self.labels[0], self.labels[2] + dot,
+                      label=label, add="_SAS")
         else:
             label = []
             for ind, tau in enumerate(tau):
                 label.append(f"$\\tau_{ind}=$ {tau}{unit}")
             if model == 2:
                 label.append("inf")
-            self.SAS.plotData(self.SAS.lambdas, self.SAS.D_fit,
-                              self.labels[0], self.labels[2] + dot,
-                              label=label, add="_SAS")
+            self.draw(self.SAS, "plotData", self.SAS.lambdas, self.SAS.D_fit,
+                      self.labels[0], self.labels[2] + dot,
+                      label=label, add="_SAS")
 
     def saveResults(self, model, tau_start, tau_fit, l_limits, d_limits, A_fit,
                     D_fit, bounds, lambdas, delays, spectra, fit_report):
         """
         Saves the results of the DAS or SAS at the end of the optimizing in a
-        .txt file.
+        .txt file and the arrays as a run of the result container. With
+        text_export the arrays are also saved as .txt files.
 
         Parameters
         ----------
@@ -568,13 +945,19 @@ class Controller():
         time_unit = self.labels[1].split("/")[1]
         x_axis_unit = self.labels[0].split("/")[1]
         if model == 0:
+            mod = self.DAS
             path = self.DAS.path
             name = self.DAS.name + "_GLA"
             txt = name + "_results.txt"
+            irf = self.DAS.irf
+            chirp = self.DAS.chirp
         else:
+            mod = self.SAS
             path = self.SAS.path
             name = self.SAS.name + "_GTA"
             txt = name + "_results.txt"
+            irf = self.SAS.irf
+            chirp = self.SAS.chirp
 
         myfile = Path(path + txt)
         myfile.touch(exist_ok=True)
@@ -586,25 +969,151 @@ class Controller():
             k_fit = np.divide(ones, tau_fit, out=np.zeros_like(tau_fit), where=tau_fit != 0)
         now = datetime.now()
         dt_string = now.strftime("%d.%m.%Y %H:%M:%S")
+        store = self.getStore(mod)
+        run = store.addRun(
+            "GLA" if model == 0 else "GTA",
+            {"A_fit": A_fit, "DAS" if model == 0 else "SAS": D_fit,
+             "M_fit": mod.M_fit, "lambdas": lambdas, "delays": delays,
+             "tau_fit": np.array(tau_fit, dtype=float), "k_fit": k_fit,
+             "d_borders": mod.d_borders, "l_borders": mod.l_borders},
+            {"date": dt_string, "model": model, "tau_start": tau_start,
+             "bounds": bounds, "l_limits": l_limits, "d_limits": d_limits,
+             "irf": irf, "chirp": chirp, "labels": self.labels,
+             "spectra_file": self.spectra_filename, "fit_report": fit_report})
         f.write(
             f"{dt_string}\n{name}\nSolver: scipy.optimize.minimize\n"
             f"Model: {model}\nStarting Parameters: {tau_start}\n"
             f"Bounds: {bounds}\nWavelength/Field range: {l_limits[0]} - {l_limits[1]} {x_axis_unit}\n"
             f"delay range: {d_limits[0]} - {d_limits[1]} {time_unit}\n\n"
             f"Time constants / {time_unit}: {tau_fit}\n"
-            f"Rate constants / {time_unit}^-1: {k_fit}\n\n"
+            f"Rate constants / {time_unit}^-1: {k_fit}\n"
+            f"IRF (FWHM, t0) / {time_unit}: {irf}\n"
+            f"Chirp (a1, a2, a3): {chirp}\n\n"
             f"lmfit fit_report:\n\n{fit_report}\n\n"
+            f"Arrays: {os.path.basename(store.filename)}, run {run}\n\n"
             f"All results and plots can be found here:\n\n{path}"
         )
-        np.savetxt(path + name + "_A_fit.txt", A_fit)
+        if self.text_export is True:
+            np.savetxt(path + name + "_A_fit.txt", A_fit)
+            if model == 0:
+                np.savetxt(path + name + "_DAS.txt", D_fit)
+            else:
+                np.savetxt(path + name + "_SAS.txt", D_fit)
+            np.savetxt(path + name + "_limited_lambda.txt", lambdas)
+            np.savetxt(path + name + "_limited_delays.txt", delays)
+            np.savetxt(path + name + "_limited_spectra.txt", spectra)
+        f.close()
+
+    def getStore(self, model):
+        """
+        Returns the container of the results of the data set, *_results.h5
+        or, without h5py, *_results.npz in the "analysis" folder. Every
+        analysis adds a run to it.
+
+        Parameters
+        ----------
+        model : Model
+            The model of the analysis.
+
+        Returns
+        -------
+        store : ResultStore
+            The container of the results.
+
+        """
+        return ResultStore(model.path + model.name + "_results")
+
+    def saveTrace(self, model):
+        """
+        Saves the trace of the fit as *_trace.json and *_trace.csv next to
+        the results.
+
+        Parameters
+        ----------
+        model : int/string
+            Describes the desired model. 0 for the GLA. For GTA it can be a
+            number 1-8, "custom model" or "custom matrix".
+
+        Returns
+        -------
+        None.
+
+        """
         if model == 0:
-            np.savetxt(path + name + "_DAS.txt", D_fit)
+            self.DAS.trace.save(self.DAS.path + self.DAS.name + "_GLA")
         else:
-            np.savetxt(path + name + "_SAS.txt", D_fit)
-        np.savetxt(path + name + "_limited_lambda.txt", lambdas)
-        np.savetxt(path + name + "_limited_delays.txt", delays)
-        np.savetxt(path + name + "_limited_spectra.txt", spectra)
-        f.close()
+            self.SAS.trace.save(self.SAS.path + self.SAS.name + "_GTA")
+
+    def saveMultiStart(self):
+        """
+        Saves the starting and fitted lifetimes and the sum of the squared
+        residuals of every start of the multi-start GTA as *_multistart.txt
+        next to the results, sorted from the best to the worst fit.
+
+        Returns
+        -------
+        None.
+
+        """
+        names = [name for name in self.SAS.multistart[0]["fit"]
+                 if name.startswith("tau")]
+        table = [[entry["start"][name] for name in names]
+                 + [entry["fit"][name] for name in names]
+                 + [entry["chisqr"], entry["success"]]
+                 for entry in self.SAS.multistart]
+        header = " ".join([f"start_{name}" for name in names]
+                          + [f"fit_{name}" for name in names]
+                          + ["chisqr", "success"])
+        np.savetxt(self.SAS.path + self.SAS.name + "_GTA_multistart.txt",
+                   np.array(table, dtype=float), header=header)
+
+    def saveConfidence(self, model):
+        """
+        Saves the confidence intervals of the lifetimes as *_confidence.txt
+        next to the results, the bootstrap samples as *_bootstrap.txt and
+        the profiles as *_profile.txt.
+
+        Parameters
+        ----------
+        model : int/string
+            Describes the desired model. 0 for the GLA. For GTA it can be a
+            number 1-8, "custom model" or "custom matrix".
+
+        Returns
+        -------
+        None.
+
+        """
+        if model == 0:
+            mod = self.DAS
+            name = mod.name + "_GLA"
+        else:
+            mod = self.SAS
+            name = mod.name + "_GTA"
+        time_unit = self.labels[1].split("/")[1]
+        columns = ["value", "boot_std", "boot_low", "boot_high",
+                   "profile_low", "profile_high"]
+        with open(mod.path + name + "_confidence.txt", "w") as f:
+            f.write(f"{name}\nConfidence level: {mod.confidence_level}\n")
+            if hasattr(mod, "bootstrap"):
+                f.write(f"Bootstrap samples used: {len(mod.bootstrap)} of "
+                        f"{len(mod.bootstrap) + mod.bootstrap_failed} "
+                        f"({mod.bootstrap_failed} refits did not converge)\n")
+            f.write(f"Lifetimes / {time_unit}\n\n")
+            f.write(f"{'parameter':>10}" + "".join(f"{col:>14}" for col in columns)
+                    + "\n")
+            for par, values in mod.confidence.items():
+                f.write(f"{par:>10}" + "".join(f"{values[col]:14.6g}"
+                                               for col in columns) + "\n")
+        if hasattr(mod, "bootstrap"):
+            np.savetxt(mod.path + name + "_bootstrap.txt", mod.bootstrap,
+                       header=" ".join(mod.confidence))
+        if hasattr(mod, "profiles"):
+            table = [[par, value, chisqr] for par, prof in enumerate(mod.profiles.values())
+                     for value, chisqr in zip(prof["values"], prof["chisqr"])]
+            np.savetxt(mod.path + name + "_profile.txt", np.array(table),
+                       header="parameter value chisqr\n"
+                       + " ".join(f"{i}: {par}" for i, par in enumerate(mod.profiles)))
 
     def getResults(self, model):
         """
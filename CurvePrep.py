@@ -168,10 +168,23 @@ class AutoSelector:
         self.chirp_wave = chirp_wave
         self.centers = centers
 
-    def removeSpikes(self):
+    def removeSpikes(self, threshold=0.2, window=7, n_sigma=3.0):
         """
-        Removes data spikes by if the difference between two consecutive
-        values is greater than 0.2 and removing them.
+        Removes data spikes in a single pass with a Hampel filter. A center is
+        a spike if it deviates from the median of the surrounding window by
+        more than n_sigma times the scaled median absolute deviation (MAD)
+        of the window, but at least by the threshold.
+
+        Parameters
+        ----------
+        threshold : float, optional
+            The smallest deviation from the median that counts as a spike,
+            in units of the delays. The default is 0.2.
+        window : int, optional
+            The number of centers in the rolling window. The default is 7.
+        n_sigma : float, optional
+            The number of standard deviations estimated from the MAD.
+            The default is 3.0.
 
         Returns
         -------
@@ -181,56 +194,18 @@ class AutoSelector:
             The centers without the spikes.
 
         """
-        ns_wave = self.chirp_wave
-        ns_centers = self.centers
-        while True:
-            prev_length = len(ns_centers)
-            diff = np.absolute(np.diff(ns_centers))
-            diff = np.insert(diff, 0, diff[0])
-            diff = self.sepSpikesAndFollowValues(diff, ns_centers)
-            lv = (diff < 0.2)
-            ns_wave = ns_wave[lv]
-            ns_centers = ns_centers[lv]
-            new_length = len(ns_centers)
-            if prev_length == new_length:
-                break
+        centers = np.asarray(self.centers, dtype="float64")
+        half = max(int(window) // 2, 1)
+        padded = np.pad(centers, half, mode="reflect" if len(centers) > half else "edge")
+        windows = np.lib.stride_tricks.sliding_window_view(padded, 2 * half + 1)
+        median = np.median(windows, axis=1)
+        mad = np.median(np.absolute(windows - median[:, None]), axis=1)
+        limit = np.maximum(n_sigma * 1.4826 * mad, threshold)
+        lv = np.absolute(centers - median) <= limit
+        ns_wave = self.chirp_wave[lv]
+        ns_centers = centers[lv]
         return ns_wave, ns_centers
 
-    def sepSpikesAndFollowValues(self, diff, centers):
-        """
-        Makes sure that only spikes and not the following value whos difference
-        is also greater than 0.2 are deleted by setting the difference of the
-        spike following value to 0.
-
-        Parameters
-        ----------
-        diff : np.array
-            The array containing all the differences.
-        centers : np.array
-            The the minima of the spectrum of each wavelength of the
-            OKE / Chirp measurement.
-
-        Returns
-        -------
-        diff : np.array
-            The array containing all the differences with the spike follow
-            value difference set to 0.
-
-        """
-        idx = 0
-        diff_len = len(diff)
-        while idx < diff_len - 1:
-            if diff[idx] > 0.2:
-                temp_idx = idx + 1
-                while temp_idx < diff_len and abs(centers[idx - 1] - centers[temp_idx]) > 0.2:
-                    temp_idx += 1
-                if temp_idx < diff_len and diff[temp_idx] != 0:
-                    diff[temp_idx] = 0
-                idx = temp_idx
-            else:
-                idx += 1
-        return diff
-
     def fitCurve(self, ns_wave, ns_centers):
         """
         Fits a curve to the selected data points and plots the curve.
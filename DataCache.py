@@ -0,0 +1,125 @@
+import os
+import numpy as np
+
+
+class DataCache():
+    def __init__(self, cache_dir=".efsta_cache"):
+        """
+        Initiates the cache for the parsed data files. The arrays are saved
+        as binary *.npy files in a folder next to the data and are memory
+        mapped when the same file is loaded again, so that the text files
+        only have to be parsed once.
+
+        Parameters
+        ----------
+        cache_dir : string, optional
+            The name of the folder next to the data that contains the cached
+            arrays. The default is ".efsta_cache".
+
+        Returns
+        -------
+        None.
+
+        """
+        self.cache_dir = cache_dir
+
+    def getCachePath(self, filename):
+        """
+        Creates the path of the cached array from the path, size and time of
+        the last modification of the data file, so that a changed file is
+        parsed again.
+
+        Parameters
+        ----------
+        filename : string
+            The path to the data file.
+
+        Returns
+        -------
+        cache_path : string
+            The path to the cached array.
+
+        """
+        stat = os.stat(filename)
+        folder, name = os.path.split(os.path.abspath(filename))
+        cache_path = os.path.join(folder, self.cache_dir,
+                                  f"{name}.{stat.st_size}.{stat.st_mtime_ns}.npy")
+        return cache_path
+
+    def load(self, filename):
+        """
+        Loads the data file. If a cached array of the unchanged file exists,
+        it is memory mapped (read-only) and returned as a np.ndarray view,
+        otherwise the file is parsed with np.genfromtxt and the array is
+        cached.
+
+        Parameters
+        ----------
+        filename : string
+            The path to the data file.
+
+        Returns
+        -------
+        values : np.ndarray
+            The values of the data file.
+
+        """
+        cache_path = self.getCachePath(filename)
+        if not os.path.isfile(cache_path):
+            values = np.genfromtxt(filename)
+            self.save(values, cache_path)
+        try:
+            return np.load(cache_path, mmap_mode="r").view(np.ndarray)
+        except (OSError, ValueError):
+            return np.genfromtxt(filename)
+
+    def save(self, values, cache_path):
+        """
+        Saves the array in the cache and removes the cached arrays of
+        previous versions of the same file. If the folder is not writable,
+        nothing is cached.
+
+        Parameters
+        ----------
+        values : np.ndarray
+            The values of the data file.
+        cache_path : string
+            The path to the cached array.
+
+        Returns
+        -------
+        None.
+
+        """
+        folder, name = os.path.split(cache_path)
+        prefix = name[:-4].rsplit(".", 2)[0] + "."
+        try:
+            os.makedirs(folder, exist_ok=True)
+            for file in os.listdir(folder):
+                if file.startswith(prefix) and file != name:
+                    os.remove(os.path.join(folder, file))
+            temp = f"{cache_path[:-4]}.{os.getpid()}.tmp.npy"
+            np.save(temp, values)
+            os.replace(temp, cache_path)
+        except OSError:
+            pass
+
+    def clear(self, filename):
+        """
+        Removes all cached arrays of the data file.
+
+        Parameters
+        ----------
+        filename : string
+            The path to the data file.
+
+        Returns
+        -------
+        None.
+
+        """
+        folder, name = os.path.split(self.getCachePath(filename))
+        if os.path.isdir(folder):
+            for file in os.listdir(folder):
+                if file.startswith(os.path.basename(filename) + "."):
+                    os.remove(os.path.join(folder, file))
@@ -0,0 +1,91 @@
+from DataCache import DataCache
+import numpy as np
+
+
+class Dataset():
+    def __init__(self, delays_filename, spectra_filename, lambdas_filename):
+        """
+        Loads the delays, lambdas and spectra of a measurement once, so that
+        every Model of a Controller works on views of the same arrays instead
+        of reading and copying the files again. The arrays are read-only.
+
+        Parameters
+        ----------
+        delays_filename : string
+            The path to the file for the delay values.
+        spectra_filename : string
+            The path to the file for the spectra values.
+        lambdas_filename : string
+            The path to the file for the lambda values.
+
+        Returns
+        -------
+        None.
+
+        """
+        cache = DataCache()
+        self.values = {}
+        for filename in (delays_filename, spectra_filename, lambdas_filename):
+            values = cache.load(filename)
+            values.flags.writeable = False
+            self.values[filename] = values
+        self.filenames = (delays_filename, spectra_filename, lambdas_filename)
+
+    @classmethod
+    def fromArrays(cls, delays_filename, spectra_filename, lambdas_filename,
+                   delays, spectra, lambdas):
+        """
+        Creates a Dataset of arrays in memory, e.g. the data handed over by
+        the ChirpCorrector, without writing and parsing text files. The
+        filenames are only the names of the arrays, from which the Model
+        derives the name of the measurement and the analysis folder.
+
+        Parameters
+        ----------
+        delays_filename : string
+            The name of the delay values.
+        spectra_filename : string
+            The name of the spectra values.
+        lambdas_filename : string
+            The name of the lambda values.
+        delays : np.array
+            The delay values.
+        spectra : np.ndarray
+            The spectra values (lambdas x delays).
+        lambdas : np.array
+            The lambda values.
+
+        Returns
+        -------
+        dataset : Dataset
+            The read-only copies of the arrays.
+
+        """
+        dataset = cls.__new__(cls)
+        dataset.values = {}
+        for filename, values in ((delays_filename, delays),
+                                 (spectra_filename, spectra),
+                                 (lambdas_filename, lambdas)):
+            values = np.array(values, dtype="float64")
+            values.flags.writeable = False
+            dataset.values[filename] = values
+        dataset.filenames = (delays_filename, spectra_filename,
+                             lambdas_filename)
+        return dataset
+
+    def getValues(self, filename):
+        """
+        Returns the values of one of the files of the measurement.
+
+        Parameters
+        ----------
+        filename : string
+            The path to the file.
+
+        Returns
+        -------
+        values : np.ndarray
+            The read-only values of the file.
+
+        """
+        return self.values[filename]
@@ -1,16 +1,20 @@
 from PyQt5 import QtWidgets as QW
 from PyQt5.uic import loadUi
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtGui import QPalette, QColor, QGuiApplication
 import PopUps as PU
 import ChirpCorrector as CC
 import Controller as Cont
+import FitWorker as FW
+import Renderer as RD
 import numpy as np
 import os as os
 import TTIMG
 
 
 class MainWindow(QW.QMainWindow):
+    figureRendered = pyqtSignal(object)
+
     def __init__(self):
         super(MainWindow, self).__init__()
         self.ui = loadUi("gui.ui", self)
@@ -29,6 +33,10 @@ class MainWindow(QW.QMainWindow):
         self.ui.UI_stack.setCurrentIndex(0)
         self.default_palette = QGuiApplication.palette()
         self.finalInputs = {}
+        self.renderer = RD.Renderer(formats=("png", "svg", "pdf"),
+                                    callback=self.figureRendered.emit)
+        self.figureRendered.connect(self.openFigure)
+        self.figures = []
         self.ui.input_tree.header().setSectionResizeMode(QW.QHeaderView.ResizeToContents)
         self.radios = QW.QButtonGroup(self)
         self.radios.addButton(self.ui.GLA_radio)
@@ -50,6 +58,7 @@ class MainWindow(QW.QMainWindow):
         EfsTA.setPalette(self.default_palette)
         self.saveAllInputs()
         self.savePickle()
+        self.renderer.shutdown()
 
     def functionality(self):
         """
@@ -227,7 +236,10 @@ class MainWindow(QW.QMainWindow):
         options = {"Scatter": self.ui.Chirp_Scatter.isChecked(),
                    "Manually": self.ui.Chirp_Manually.isChecked(),
                    "rmBG": rmBG,
-                   "OKE": OKE
+                   "OKE": OKE,
+                   "Fit": self.ui.Chirp_Fit.isChecked(),
+                   "NaN": self.ui.Chirp_NaN.currentText(),
+                   "Refine": self.ui.Chirp_Refine.currentText()
                    }
         x = {"Sample_Dir": sample_dir,
              "Solvent_Dir": solvent_dir,
@@ -258,11 +270,11 @@ class MainWindow(QW.QMainWindow):
             self.openFailSafe("Please select a folder directory.")
             return True
 
-    def readData(self, directory):
+    def readData(self, directory, dataset=None, chirp=None):
 
         self.finalInputs['Directory'] = directory
         if directory != "":
-            self.Controller = Cont.Controller(directory)
+            self.Controller = Cont.Controller(directory, dataset, chirp)
             path = self.Controller.path + "/"
             names = ["delays_filename", "lambdas_filename", "spectra_filename"]
             if all(hasattr(self.Controller, attr) for attr in names) is False:
@@ -463,8 +475,8 @@ class MainWindow(QW.QMainWindow):
 
     def calculationGLA(self, db, wb):
         '''
-        Starts the calculation for the global lifetime analysis and opens up
-        a popup window with the results.
+        Starts the calculation for the global lifetime analysis in the
+        background. The results are shown when the fit has finished.
 
         Parameters
         ----------
@@ -478,8 +490,7 @@ class MainWindow(QW.QMainWindow):
         None.
 
         '''
-        self.tau_fit, spec, res, D_fit, fit_report = self.Controller.calcDAS(self.prepareParam("gla"), db, wb, self.getGLAOptMethod())
-        self.openPopUpResults(0, self.Controller)
+        self.startFit(0, self.Controller.calcDAS, self.prepareParam("gla"), db, wb, self.getGLAOptMethod(), chirp=self.Controller.chirp)
 
 #####################################GTA#######################################
 
@@ -570,8 +581,8 @@ class MainWindow(QW.QMainWindow):
 
     def calculationGTA(self, db, wb, model, K):
         '''
-        Starts the calculation for the global target analysis and opens up
-        a popup window with the results.
+        Starts the calculation for the global target analysis in the
+        background. The results are shown when the fit has finished.
 
         Parameters
         ----------
@@ -591,12 +602,11 @@ class MainWindow(QW.QMainWindow):
         '''
         K = np.array(K)
         if model == "custom matrix":
-            self.tau_fit, spec, res, D_fit, fit_report = self.Controller.calcSAS(K, [], self.getCustomConcentration(), db, wb, model, [], [], self.getGTAOptMethod(), self.getGTAIvpMethod())
+            self.startFit(model, self.Controller.calcSAS, K, [], self.getCustomConcentration(), db, wb, model, [], [], self.getGTAOptMethod(), self.getGTAIvpMethod(), chirp=self.Controller.chirp)
         elif model == "custom model":
-            self.tau_fit, spec, res, D_fit, fit_report = self.Controller.calcSAS(K, self.prepareParam("custom"), self.getCustomConcentration(), db, wb, model, [], [], self.getGTAOptMethod(), self.getGTAIvpMethod())
+            self.startFit(model, self.Controller.calcSAS, K, self.prepareParam("custom"), self.getCustomConcentration(), db, wb, model, [], [], self.getGTAOptMethod(), self.getGTAIvpMethod(), chirp=self.Controller.chirp)
         else:
-            self.tau_fit, spec, res, D_fit, fit_report = self.Controller.calcSAS(K, self.prepareParam("preset"), self.getCustomConcentration(), db, wb, model, self.getTauBounds()[0], self.getTauBounds()[1], self.getGTAOptMethod(), self.getGTAIvpMethod())
-        self.openPopUpResults(model, self.Controller)
+            self.startFit(model, self.Controller.calcSAS, K, self.prepareParam("preset"), self.getCustomConcentration(), db, wb, model, self.getTauBounds()[0], self.getTauBounds()[1], self.getGTAOptMethod(), self.getGTAIvpMethod(), chirp=self.Controller.chirp)
 
 #Preset
 
@@ -1106,6 +1116,7 @@ class MainWindow(QW.QMainWindow):
         None.
 
         """
+        self.Controller.renderer = self.renderer
         if raw is True:
             if self.ui.plot_wavelength_slices.isChecked() is True:
                 self.Controller.plotSolo(ws, ds, self.getVmin(), self.getVmax(), None, self.getUserContour(), "WS", self.getMultiplier())
@@ -1199,30 +1210,111 @@ class MainWindow(QW.QMainWindow):
         None.
 
         """
+        if hasattr(self, "fit_worker") and self.fit_worker.isRunning():
+            self.openFailSafe("Please wait until the running fit has finished or cancel it.")
+            return
         self.getAxis()
         self.savePickle()
         ds = sorted(self.getDelaySlices())
         ws = sorted(self.getWavelengthSlices())
+        self.fit_slices = [ds, ws]
         db = [self.getLowerDelayBound(), self.getUpperDelayBound()]
         wb = [self.getLowerWavelengthBound(), self.getUpperWavelengthBound()]
         if self.GLA_radio.isChecked() is True:
             self.calculationGLA(db, wb)
-            self.plotting(ds, ws, 0, False)
         elif self.GTA_radio_preset_model.isChecked() is True:
             model = self.getPresetModel() + 1
             K = self.getGTAPresetModelTaus()
             self.calculationGTA(db, wb, model, K)
-            self.plotting(ds, ws, model, False)
         elif self.GTA_radio_custom_model.isChecked() is True:
             model = "custom model"
             K = self.getCustomModel()
             self.calculationGTA(db, wb, model, K)
-            self.plotting(ds, ws, model, False)
         elif self.GTA_radio_custom_matrix.isChecked() is True:
             model = "custom matrix"
             K = self.custom_Matrix
             self.calculationGTA(db, wb, model, K)
-            self.plotting(ds, ws, model, False)
+
+    def startFit(self, model, calc, *args, **kwargs):
+        """
+        Runs the fit in a background thread and opens a popup window showing
+        its progress, which allows to cancel the fit.
+
+        Parameters
+        ----------
+        model : int/string
+            Describes the desired model. 0 for the GLA. For GTA it can be a
+            number 1-8, "custom model" or "custom matrix".
+        calc : function
+            Controller.calcDAS or Controller.calcSAS.
+        *args, **kwargs
+            The arguments of calc.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.fit_model = model
+        self.fit_worker = FW.FitWorker(calc, *args, **kwargs)
+        self.progressView = PU.ProgressWindow(model)
+        self.progressView.cancel.clicked.connect(self.cancelFit)
+        self.fit_worker.progress.connect(self.progressView.updateProgress)
+        self.fit_worker.finished.connect(self.fitFinished)
+        self.fit_worker.cancelled.connect(self.progressView.close)
+        self.fit_worker.failed.connect(self.fitFailed)
+        self.progressView.show()
+        self.fit_worker.start()
+
+    def cancelFit(self):
+        """
+        Cancels the running fit. No results are saved.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.fit_worker.cancel()
+        self.progressView.status.setText("Cancelling the fit...")
+        self.progressView.cancel.setEnabled(False)
+
+    def fitFinished(self, results):
+        """
+        Opens up the results popup window and creates the plots, when the fit
+        has finished.
+
+        Parameters
+        ----------
+        results : tuple
+            The results of Controller.calcDAS or Controller.calcSAS.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.progressView.close()
+        self.tau_fit = results[0]
+        self.openPopUpResults(self.fit_model, self.Controller)
+        self.plotting(self.fit_slices[0], self.fit_slices[1], self.fit_model, False)
+
+    def fitFailed(self, msg):
+        """
+        Closes the progress popup window and shows why the fit failed.
+
+        Parameters
+        ----------
+        msg : string
+            The error message.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.progressView.close()
+        self.openFailSafe(msg)
 
 #####################################POPUP#####################################
 
@@ -1286,6 +1378,33 @@ class MainWindow(QW.QMainWindow):
             self.popup = PU.TextWindow(None, None, msg)
             self.popup.show()
 
+    def openFigure(self, future):
+        """
+        Opens up a popup window showing a plot, when it was rendered and
+        saved in the background.
+
+        Parameters
+        ----------
+        future : concurrent.futures.Future
+            The future of the plot, see Renderer.submit.
+
+        Returns
+        -------
+        None.
+
+        """
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            self.openFailSafe(f"The plot could not be saved: {future.exception()}")
+            return
+        saved = [filename for filename in future.result() if filename.endswith(".png")]
+        if len(saved) > 0:
+            figure = PU.FigureWindow(saved[0], future.job, self.renderer)
+            self.figures = [window for window in self.figures if window.isVisible()]
+            self.figures.append(figure)
+            figure.show()
+
     def presentInputs(self, ind):
         '''
         Presents all relevant user inputs in a treewidget.
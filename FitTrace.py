@@ -0,0 +1,158 @@
+import csv
+import json
+import time
+from contextlib import contextmanager
+
+
+class FitTrace():
+    def __init__(self):
+        """
+        Initiates a trace of a fit. For every evaluation of the residuals it
+        records the wall time, the sum of the squared residuals, the
+        parameters and the time spent in every stage of the evaluation
+        (e.g. getM, calcD_tau, residual), so that slow data sets and models
+        can be found.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.start = time.perf_counter()
+        self.last = self.start
+        self.records = []
+        self.current = {}
+        self.stages = {}
+        self.counters = {}
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Measures the time spent in the enclosed block and adds it to the
+        stage.
+
+        Parameters
+        ----------
+        name : string
+            The name of the stage.
+
+        Returns
+        -------
+        None.
+
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            dt = time.perf_counter() - start
+            self.current[name] = self.current.get(name, 0) + dt
+            total = self.stages.setdefault(name, {"time": 0, "calls": 0})
+            total["time"] += dt
+            total["calls"] += 1
+
+    def count(self, name, n=1):
+        """
+        Increases a counter of the trace, e.g. the hits of a cache.
+
+        Parameters
+        ----------
+        name : string
+            The name of the counter.
+        n : int, optional
+            The increment. The default is 1.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def record(self, iteration, chisqr, params):
+        """
+        Records an evaluation of the residuals together with the time spent
+        in the stages since the last record.
+
+        Parameters
+        ----------
+        iteration : int
+            The number of evaluations of the residuals.
+        chisqr : float
+            The sum of the squared residuals.
+        params : dict
+            The names and values of the parameters.
+
+        Returns
+        -------
+        None.
+
+        """
+        now = time.perf_counter()
+        self.records.append({
+            "iteration": iteration,
+            "time": now - self.start,
+            "dt": now - self.last,
+            "chisqr": chisqr,
+            "params": dict(params),
+            "stages": self.current,
+        })
+        self.last = now
+        self.current = {}
+
+    def getSummary(self):
+        """
+        Summarizes the trace.
+
+        Returns
+        -------
+        summary : dict
+            The number of evaluations, the total time, the mean time per
+            evaluation, the lowest sum of the squared residuals, the total
+            time and number of calls of every stage and the counters.
+
+        """
+        total = time.perf_counter() - self.start
+        if self.records:
+            total = self.records[-1]["time"]
+        n = len(self.records)
+        return {
+            "evaluations": n,
+            "total_time": total,
+            "time_per_evaluation": total / n if n > 0 else None,
+            "best_chisqr": min((rec["chisqr"] for rec in self.records), default=None),
+            "stages": self.stages,
+            "counters": self.counters,
+        }
+
+    def save(self, filename):
+        """
+        Saves the summary and all records as {filename}_trace.json and the
+        records as table in {filename}_trace.csv.
+
+        Parameters
+        ----------
+        filename : string
+            The path and name of the files without the ending.
+
+        Returns
+        -------
+        None.
+
+        """
+        with open(filename + "_trace.json", "w") as f:
+            json.dump({"summary": self.getSummary(), "records": self.records},
+                      f, indent=1)
+        params = []
+        stages = list(self.stages)
+        for rec in self.records:
+            params += [name for name in rec["params"] if name not in params]
+        with open(filename + "_trace.csv", "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["iteration", "time", "dt", "chisqr"] + params
+                            + [f"t_{name}" for name in stages])
+            for rec in self.records:
+                writer.writerow(
+                    [rec["iteration"], rec["time"], rec["dt"], rec["chisqr"]]
+                    + [rec["params"].get(name, "") for name in params]
+                    + [rec["stages"].get(name, 0) for name in stages])
@@ -0,0 +1,123 @@
+from PyQt5.QtCore import QObject, QThread, Qt, pyqtSignal
+import time
+
+
+class FitWorker(QObject):
+    progress = pyqtSignal(int, float, list)
+    finished = pyqtSignal(object)
+    cancelled = pyqtSignal()
+    failed = pyqtSignal(str)
+
+    def __init__(self, calc, *args, interval=0.1, **kwargs):
+        """
+        Initiates a worker that runs Controller.calcDAS or Controller.calcSAS
+        in a QThread, so that the GUI stays responsive during the fit.
+
+        Parameters
+        ----------
+        calc : function
+            Controller.calcDAS or Controller.calcSAS.
+        *args, **kwargs
+            The arguments of calc.
+        interval : float, optional
+            The minimal time in seconds between two progress signals.
+            The default is 0.1.
+
+        Returns
+        -------
+        None.
+
+        """
+        super(FitWorker, self).__init__()
+        self.calc = calc
+        self.args = args
+        self.kwargs = kwargs
+        self.interval = interval
+        self.last_report = 0
+        self.abort = False
+
+    def start(self):
+        """
+        Moves the worker to a new QThread and starts the fit there. The
+        thread is quit when the fit has finished, was cancelled or failed.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.fit_thread = QThread()
+        self.moveToThread(self.fit_thread)
+        self.fit_thread.started.connect(self.run)
+        for signal in (self.finished, self.cancelled, self.failed):
+            signal.connect(self.fit_thread.quit, Qt.DirectConnection)
+        self.fit_thread.start()
+
+    def run(self):
+        """
+        Runs the fit and emits finished with the results of calc, cancelled
+        if the fit was aborted or failed with the error message.
+
+        Returns
+        -------
+        None.
+
+        """
+        try:
+            results = self.calc(*self.args, iter_cb=self.report, **self.kwargs)
+        except Exception as error:
+            self.failed.emit(f"The fit failed: {error}")
+            return
+        if self.abort is True:
+            self.cancelled.emit()
+        else:
+            self.finished.emit(results)
+
+    def report(self, iteration, chisqr, tau):
+        """
+        The iteration callback of the fit. Emits the progress at most every
+        interval seconds and aborts the fit if it was cancelled.
+
+        Parameters
+        ----------
+        iteration : int
+            The number of evaluations of the residuals.
+        chisqr : float
+            The current sum of the squared residuals.
+        tau : list
+            The current lifetimes.
+
+        Returns
+        -------
+        bool
+            True if the fit was cancelled.
+
+        """
+        now = time.monotonic()
+        if now - self.last_report >= self.interval:
+            self.last_report = now
+            self.progress.emit(iteration, chisqr, list(tau))
+        return self.abort
+
+    def cancel(self):
+        """
+        Cancels the fit after the current evaluation of the residuals.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.abort = True
+
+    def isRunning(self):
+        """
+        Checks if the fit is still running.
+
+        Returns
+        -------
+        bool
+            True while the fit is running.
+
+        """
+        return hasattr(self, "fit_thread") and self.fit_thread.isRunning()
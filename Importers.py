@@ -1,3 +1,4 @@
+import io
 import os
 import numpy as np
 
@@ -53,9 +54,27 @@ class RichertImport():
                 spectra_filename = new
         return lambdas_filename, delays_filename, spectra_filename
 
+    def get_Chirp(self):
+        """
+        Loads the parameters of the dispersion curve, if the data in the
+        folder was saved without chirp correction, so that the chirp is
+        fitted in the model.
+
+        Returns
+        -------
+        chirp : np.array
+            The parameters a1, a2 and a3 of the dispersion curve or None if
+            there is no *_chirp.txt file.
+
+        """
+        for file in os.listdir(self.path):
+            if file.endswith("_chirp.txt"):
+                return np.genfromtxt(f'{self.path}/{file}')
+        return None
+
 
 class RichertOKEImport():
-    def __init__(self, path):
+    def __init__(self, path, header=0):
         """
         Initiates the controller and loads the data from the given path.
 
@@ -63,6 +82,9 @@ class RichertOKEImport():
         ----------
         path : string
             The path of the file containing the data.
+        header : int, optional
+            The number of lines skipped at the beginning of the file.
+            The default is 0.
 
         Returns
         -------
@@ -70,6 +92,7 @@ class RichertOKEImport():
 
         """
         self.path = path
+        self.header = header
 
     def readData(self):
         """
@@ -81,7 +104,7 @@ class RichertOKEImport():
             The measurment data.
 
         """
-        data = np.genfromtxt(self.path, delimiter=' ', skip_header=self.header)
+        data = RichertMatrixImport(self.path, self.header).readMatrix()
         return data
 
     def splitData(self, data):
@@ -91,3 +114,162 @@ class RichertOKEImport():
         spec = data[1:]
         spec = spec.T[1:]
         return wave, time, spec
+
+
+class RichertMatrixImport():
+    def __init__(self, path, header=0, chunk_size=2**22):
+        """
+        Initiates the reader for raw measurement files, which contain the
+        wavelengths in the first row and the delays in the first column.
+        The file is parsed in chunks directly into a preallocated array,
+        which is much faster than np.genfromtxt.
+
+        Parameters
+        ----------
+        path : string
+            The path of the file containing the data.
+        header : int, optional
+            The number of lines skipped at the beginning of the file.
+            The default is 0.
+        chunk_size : int, optional
+            The number of bytes parsed at once. The default is 2**22.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.path = path
+        self.header = header
+        self.chunk_size = chunk_size
+
+    def parseLine(self, line, n_cols=None):
+        """
+        Parses a single line token by token like np.genfromtxt with
+        delimiter=' ': spaces at the ends of the line are stripped and every
+        single space separates two values, so repeated spaces give empty
+        values. Empty tokens and tokens which are no numbers are read as NaN.
+
+        Parameters
+        ----------
+        line : bytes
+            A line of the file.
+        n_cols : int, optional
+            The expected number of values. The default is None.
+
+        Returns
+        -------
+        values : list
+            The values of the line.
+
+        """
+        values = []
+        line = line.strip(b" \r\n")
+        if not line:
+            return values
+        for token in line.split(b" "):
+            try:
+                values.append(float(token))
+            except ValueError:
+                values.append(np.nan)
+        if n_cols is not None and len(values) != n_cols:
+            raise ValueError(f"{self.path}: expected {n_cols} values per line, "
+                             f"got {len(values)}.")
+        return values
+
+    def parseChunk(self, chunk, n_cols):
+        """
+        Parses a chunk of complete lines with the C parser of np.loadtxt,
+        which reads NaN and inf. If the chunk contains other tokens or
+        repeated spaces, which np.loadtxt would merge, it is parsed line by
+        line.
+
+        Parameters
+        ----------
+        chunk : bytes
+            Complete lines of the file.
+        n_cols : int
+            The number of values per line.
+
+        Returns
+        -------
+        values : np.array
+            The values of the chunk.
+
+        """
+        if b"  " not in chunk:
+            try:
+                values = np.loadtxt(io.BytesIO(chunk), dtype="float64", ndmin=2)
+                if values.shape[1] == n_cols:
+                    return values.ravel()
+            except ValueError:
+                pass
+        lines = [line for line in chunk.splitlines() if line.strip()]
+        values = [self.parseLine(line, n_cols) for line in lines]
+        return np.array(values, dtype="float64").ravel()
+
+    def readMatrix(self):
+        """
+        Reads the whole file into a single array, like
+        np.genfromtxt(path, delimiter=' ', skip_header=header).
+
+        Returns
+        -------
+        data : np.ndarray
+            The measurment data including the wavelength row.
+
+        """
+        with open(self.path, "rb") as f:
+            for i in range(self.header):
+                f.readline()
+            first = self.parseLine(f.readline())
+            n_cols = len(first)
+            start = f.tell()
+            n_rows = 0
+            while True:
+                block = f.read(2**24)
+                if not block:
+                    break
+                n_rows += block.count(b"\n")
+            f.seek(start)
+            data = np.empty((n_rows + 2, n_cols))
+            data[0] = first
+            flat = data[1:].reshape(-1)
+            pos = 0
+            rest = b""
+            while True:
+                block = f.read(self.chunk_size)
+                end = not block
+                block = rest + block
+                if end is False:
+                    cut = block.rfind(b"\n") + 1
+                    block, rest = block[:cut], block[cut:]
+                if block.strip():
+                    values = self.parseChunk(block, n_cols)
+                    flat[pos: pos + values.size] = values
+                    pos += values.size
+                if end is True:
+                    break
+        return data[:1 + pos // n_cols]
+
+    def readData(self):
+        """
+        Reads the file and splits it into wavelengths, delays and absorptions.
+
+        Returns
+        -------
+        wave : np.array
+            The wavelength data of the measurement.
+        time : np.array
+            The delay data of the measurement.
+        spec : np.ndarray
+            The absorption data of the measurement (wavelengths x delays).
+
+        """
+        data = self.readMatrix()
+        wave = data[0][1:]
+        time = data.T[0][1:] * 100
+        time = time.round() / 100
+        spec = data[1:]
+        spec = spec.T[1:]
+        return wave, time, spec
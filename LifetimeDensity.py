@@ -0,0 +1,237 @@
+import numpy as np
+
+
+class LifetimeDensity():
+    def __init__(self, model, tau_min=None, tau_max=None, n_tau=200):
+        """
+        Initiates the lifetime density analysis (LDA) of the spectra of a
+        Model. Instead of a few guessed lifetimes the spectra are described
+        by the amplitudes of a dense log-spaced grid of lifetimes, which are
+        regularized, so that the number of components does not have to be
+        known. The basis is decomposed by a single SVD, which is reused for
+        every regularization strength.
+
+        Parameters
+        ----------
+        model : Model
+            The GLA model (model 0) of the data, optionally with an IRF.
+            Without an IRF the decays start at t = 0.
+        tau_min : float, optional
+            The shortest lifetime of the grid. The default is None, which
+            uses the smallest delay step.
+        tau_max : float, optional
+            The longest lifetime of the grid. The default is None, which
+            uses twice the largest delay.
+        n_tau : int, optional
+            The number of lifetimes of the grid. The default is 200.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.model = model
+        delays = np.abs(model.delays)
+        if tau_min is None:
+            tau_min = max(np.min(np.abs(np.diff(model.delays))), 1e-3)
+        if tau_max is None:
+            tau_max = 2 * np.max(delays)
+        self.taus = np.geomspace(tau_min, tau_max, n_tau)
+        if model.irf is None:
+            # without an IRF the decays start at t = 0, the exponentials
+            # would diverge at negative delays
+            self.M = model.calcStepExp(1 / self.taus[:, None],
+                                       model.delays[None, :])
+        else:
+            self.M = model.getM(self.taus)
+        U, self.s, self.Vt = np.linalg.svd(self.M.T, full_matrices=False)
+        self.UtS = U.T @ model.spectra.T
+        # part of the spectra outside of the space of the basis
+        self.rss_0 = max(np.sum(np.square(model.spectra))
+                         - np.sum(np.square(self.UtS)), 0)
+
+    def getFilter(self, alpha):
+        """
+        Calculates the Tikhonov filter factors s^2 / (s^2 + alpha^2) of the
+        singular values.
+
+        Parameters
+        ----------
+        alpha : float
+            The regularization strength.
+
+        Returns
+        -------
+        f : np.array
+            The filter factors.
+
+        """
+        s2 = np.square(self.s)
+        return s2 / (s2 + alpha**2)
+
+    def scanAlpha(self, alphas=None):
+        """
+        Calculates the residual norm, the solution norm and the generalized
+        cross validation (GCV) of the Tikhonov solution for every
+        regularization strength. Only the filter factors change with alpha,
+        so every strength costs a few operations on the projected spectra.
+
+        Parameters
+        ----------
+        alphas : np.array, optional
+            The regularization strengths. The default is None, which uses
+            100 values spanning the singular values of the basis.
+
+        Returns
+        -------
+        scan : dict
+            The alphas, the sums of the squared residuals (rss), the squared
+            norms of the amplitudes (norm) and the GCV values.
+
+        """
+        if alphas is None:
+            alphas = np.geomspace(self.s[0] * 1e-6, self.s[0], 100)
+        alphas = np.asarray(alphas, dtype=float)
+        n_delays, n_lambdas = self.M.shape[1], self.UtS.shape[1]
+        power = np.sum(np.square(self.UtS), axis=1)
+        rss = np.empty(len(alphas))
+        norm = np.empty(len(alphas))
+        dof = np.empty(len(alphas))
+        for i, alpha in enumerate(alphas):
+            f = self.getFilter(alpha)
+            rss[i] = self.rss_0 + np.sum(np.square(1 - f) * power)
+            norm[i] = np.sum(np.square(f / self.s) * power)
+            dof[i] = n_delays - np.sum(f)
+        gcv = n_delays * rss / n_lambdas / np.square(dof)
+        self.scan = {"alpha": alphas, "rss": rss, "norm": norm, "gcv": gcv}
+        return self.scan
+
+    def findAlpha(self, method="gcv", alphas=None):
+        """
+        Chooses the regularization strength by the minimum of the GCV or the
+        corner of the L-curve, the point of maximum curvature of the
+        logarithmic residual norm against the logarithmic solution norm.
+
+        Parameters
+        ----------
+        method : string, optional
+            "gcv" or "lcurve". The default is "gcv".
+        alphas : np.array, optional
+            The scanned regularization strengths, see scanAlpha.
+            The default is None.
+
+        Returns
+        -------
+        alpha : float
+            The chosen regularization strength.
+
+        """
+        scan = self.scanAlpha(alphas)
+        if method == "lcurve":
+            x = np.log(scan["rss"])
+            y = np.log(scan["norm"])
+            t = np.log(scan["alpha"])
+            dx, dy = np.gradient(x, t), np.gradient(y, t)
+            ddx, ddy = np.gradient(dx, t), np.gradient(dy, t)
+            curvature = (dx * ddy - ddx * dy) / np.power(dx**2 + dy**2, 1.5)
+            index = np.nanargmax(curvature[1:-1]) + 1
+        else:
+            index = np.argmin(scan["gcv"])
+        return float(scan["alpha"][index])
+
+    def calcTikhonov(self, alpha):
+        """
+        Calculates the Tikhonov regularized amplitudes of all wavelengths at
+        once from the SVD of the basis.
+
+        Parameters
+        ----------
+        alpha : float
+            The regularization strength.
+
+        Returns
+        -------
+        D : np.array
+            The lifetime density map (lambdas x taus).
+
+        """
+        f = self.getFilter(alpha)
+        return (self.Vt.T @ ((f / self.s)[:, None] * self.UtS)).T
+
+    def calcElasticNet(self, alpha, l1_ratio=0.5, max_iter=2000, tol=1e-6):
+        """
+        Calculates the elastic-net regularized amplitudes of all wavelengths
+        at once by the alternating direction method of multipliers (ADMM),
+        warm-started from the Tikhonov solution. The L1 part favours sparse
+        maps with distinct lifetimes. The penalty is
+        alpha^2 * (l1_ratio * |D|_1 + (1 - l1_ratio) / 2 * |D|^2).
+        The quadratic step is diagonal in the right singular vectors of the
+        basis and a scaling in their null space, so the SVD is reused and
+        every iteration only costs a few matrix products.
+
+        Parameters
+        ----------
+        alpha : float
+            The regularization strength.
+        l1_ratio : float, optional
+            The share of the L1 penalty between 0 and 1. The default is 0.5.
+        max_iter : int, optional
+            The maximal number of iterations. The default is 2000.
+        tol : float, optional
+            The relative primal and dual residual at which the iteration
+            stops. The default is 1e-6.
+
+        Returns
+        -------
+        D : np.array
+            The lifetime density map (lambdas x taus).
+
+        """
+        lam_1 = alpha**2 * l1_ratio
+        lam_2 = alpha**2 * (1 - l1_ratio)
+        V = self.Vt.T
+        s2 = np.square(self.s)
+        SMV = (self.s[:, None] * self.UtS).T
+        Z = self.calcTikhonov(alpha)
+        U = np.zeros_like(Z)
+        rho = alpha**2
+        for i in range(max_iter):
+            W = rho * (Z - U)
+            WV = W @ V
+            D = ((SMV + WV) / (s2 + lam_2 + rho)) @ self.Vt
+            # with more lifetimes than delays the basis has a null space,
+            # in which only the penalties act
+            D += (W - WV @ self.Vt) / (lam_2 + rho)
+            Z_old = Z
+            Z = np.sign(D + U) * np.maximum(np.abs(D + U) - lam_1 / rho, 0)
+            U += D - Z
+            primal = np.linalg.norm(D - Z)
+            dual = rho * np.linalg.norm(Z - Z_old)
+            if (primal <= tol * max(np.linalg.norm(D), np.linalg.norm(Z))
+                    and dual <= tol * rho * np.linalg.norm(U)):
+                break
+            # residual balancing of the penalty parameter
+            if primal > 10 * dual:
+                rho *= 2
+                U /= 2
+            elif dual > 10 * primal:
+                rho /= 2
+                U *= 2
+        return Z
+
+    def calcA(self, D):
+        """
+        Reconstructs the spectra from a lifetime density map.
+
+        Parameters
+        ----------
+        D : np.array
+            The lifetime density map (lambdas x taus).
+
+        Returns
+        -------
+        A : np.array
+            The reconstructed spectra.
+
+        """
+        return D @ self.M
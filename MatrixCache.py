@@ -0,0 +1,163 @@
+from collections import OrderedDict
+import numpy as np
+
+
+class MatrixCache():
+    def __init__(self, max_entries=128, max_bytes=2**28, digits=12):
+        """
+        Initiates a bounded least recently used (LRU) cache of the matrices
+        calculated for a vector of rate constants, e.g. the concentration
+        matrix M and the amplitudes or projection of the spectra. Simplex
+        optimizers and finite differences often evaluate the same or nearly
+        the same lifetimes again, which then skips getK, solveDiff and
+        calcD_tau.
+
+        Parameters
+        ----------
+        max_entries : int, optional
+            The maximal number of cached entries. The default is 128.
+        max_bytes : int, optional
+            The maximal size of all cached arrays in bytes.
+            The default is 256 MB.
+        digits : int, optional
+            The number of significant digits of the rates in the key. It has
+            to be finer than the steps of finite differences.
+            The default is 12.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.digits = digits
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def empty(self):
+        """
+        Creates an empty cache with the same limits, e.g. for a copy of the
+        model with different spectra.
+
+        Returns
+        -------
+        cache : MatrixCache
+            The empty cache.
+
+        """
+        return MatrixCache(self.max_entries, self.max_bytes, self.digits)
+
+    def getKey(self, tau, *args):
+        """
+        Creates the key of the quantized rate constants 1/tau and further
+        values that change the matrices, e.g. the IRF or the model. Lists
+        and arrays are converted to hashable tuples.
+
+        Parameters
+        ----------
+        tau : list, np.array
+            The decay constants tau.
+        *args
+            Further values of the key.
+
+        Returns
+        -------
+        key : tuple
+            The key of the cache.
+
+        """
+        rates = [float(f"{1 / t:.{self.digits}g}") if t != 0 else np.inf
+                 for t in tau]
+        key = [tuple(rates)]
+        for arg in args:
+            if isinstance(arg, np.ndarray):
+                arg = (arg.shape, arg.tobytes())
+            elif isinstance(arg, list):
+                arg = tuple(arg)
+            key.append(arg)
+        return tuple(key)
+
+    def getSize(self, value):
+        """
+        Calculates the size of the arrays of an entry.
+
+        Parameters
+        ----------
+        value : np.array, tuple
+            The array or a (nested) tuple of arrays.
+
+        Returns
+        -------
+        nbytes : int
+            The size in bytes.
+
+        """
+        if isinstance(value, tuple):
+            return sum(self.getSize(item) for item in value)
+        return getattr(value, "nbytes", 0)
+
+    def get(self, key):
+        """
+        Returns the cached entry and marks it as recently used.
+
+        Parameters
+        ----------
+        key : tuple
+            The key of the cache.
+
+        Returns
+        -------
+        value : np.array, tuple
+            The cached entry or None, if the key is not cached.
+
+        """
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """
+        Caches an entry and removes the least recently used entries beyond
+        the limits. An entry larger than max_bytes is not cached.
+
+        Parameters
+        ----------
+        key : tuple
+            The key of the cache.
+        value : np.array, tuple
+            The array or a tuple of arrays.
+
+        Returns
+        -------
+        None.
+
+        """
+        nbytes = self.getSize(value)
+        if nbytes > self.max_bytes:
+            return
+        if key in self.entries:
+            self.nbytes -= self.getSize(self.entries.pop(key))
+        self.entries[key] = value
+        self.nbytes += nbytes
+        while len(self.entries) > self.max_entries or self.nbytes > self.max_bytes:
+            old_key, old_value = self.entries.popitem(last=False)
+            self.nbytes -= self.getSize(old_value)
+
+    def clear(self):
+        """
+        Removes all entries, e.g. if the spectra or the IRF changed.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.entries.clear()
+        self.nbytes = 0
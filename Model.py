@@ -1,23 +1,145 @@
-import matplotlib as mpl
-import matplotlib.pyplot as plt
-import matplotlib.colors as col
-import matplotlib.ticker as mticker
 import os
+import copy
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 import numpy as np
 from lmfit import minimize, Parameters, fit_report
 import scipy.integrate as scint
+import scipy.linalg as scla
+import scipy.special as scsp
+from scipy.stats import qmc, f as f_dist
 from models import Models
-
-mpl.use("QtAgg")
-plt.style.use('./AK_Richert.mplstyle')
-#plt.style.use('default')
-plt.ion()
+from DataCache import DataCache
+from MatrixCache import MatrixCache
+
+
+_worker_model = None
+
+
+def initWorker(model):
+    """
+    Sets the model of a worker process once, so that it is not sent again
+    with every fit.
+
+    Parameters
+    ----------
+    model : Model
+        The model without trace and iteration callback.
+
+    Returns
+    -------
+    None.
+
+    """
+    global _worker_model
+    _worker_model = model
+
+
+def runWorkerTask(func, *args):
+    """
+    Runs a fit in a worker process with the model set by initWorker.
+
+    Parameters
+    ----------
+    func : function
+        The fit, called as func(model, *args).
+    *args
+        The arguments of the fit.
+
+    Returns
+    -------
+    result
+        The result of the fit.
+
+    """
+    return func(_worker_model, *args)
+
+
+def fitStart(model, params, opt_method):
+    """
+    Runs a local fit from the given parameters, e.g. one start of the
+    multi-start mode or one refit of the confidence intervals. Module level
+    function, so that it can be run in the worker processes.
+
+    Parameters
+    ----------
+    model : Model
+        The model without trace and iteration callback.
+    params : lmfit.Parameters
+        The starting parameters.
+    opt_method : string
+        The algorithm used by the optimization function.
+
+    Returns
+    -------
+    values : dict
+        The names and fitted values of the parameters.
+    chisqr : float
+        The sum of the squared residuals of the fit.
+    success : bool
+        True if the fit converged.
+
+    """
+    if model.varpro is True:
+        residual = model.getProjectedDifference
+    else:
+        residual = model.getDifference
+    if not any(par.vary for par in params.values()):
+        chisqr = float(np.sum(np.square(residual(params))))
+        return params.valuesdict(), chisqr, True
+    kws = model.getJacobianKws(opt_method)
+    res_fit = minimize(residual, params, method=opt_method, **kws)
+    return (res_fit.params.valuesdict(), float(res_fit.chisqr),
+            bool(getattr(res_fit, "success", True)))
+
+
+def fitBootstrap(model, params, opt_method, seed):
+    """
+    Refits a bootstrap sample of the spectra, warm-started from the best
+    fit. The sample is the best fit plus the residuals of randomly drawn
+    delays, so that the correlation of the residuals along the wavelengths
+    is kept.
+
+    Parameters
+    ----------
+    model : Model
+        The model without trace and iteration callback.
+    params : lmfit.Parameters
+        The parameters of the best fit.
+    opt_method : string
+        The algorithm used by the optimization function.
+    seed : np.random.SeedSequence
+        The seed of the sample.
+
+    Returns
+    -------
+    values : dict
+        The names and fitted values of the parameters.
+    chisqr : float
+        The sum of the squared residuals of the fit.
+    success : bool
+        True if the fit converged.
+
+    """
+    model = copy.copy(model)
+    if model.varpro is True:
+        difference = model.getProjectedDifference(params)
+    else:
+        difference = model.getDifference(params)
+    n = difference.shape[-1]
+    index = np.random.default_rng(seed).integers(0, n, n)
+    model.fit_spectra = model.fit_spectra + difference - difference[..., index]
+    if model.cache is not None:
+        model.cache = model.cache.empty()
+    return fitStart(model, params, opt_method)
 
 
 class Model:
 
     def __init__(self, delays_filename, spectra_filename, lambdas_filename,
-                 d_limits, l_limits, model, opt_method, ivp_method):
+                 d_limits, l_limits, model, opt_method, ivp_method,
+                 varpro=False, dtype="float64", dataset=None):
         """
         Initiates an object of the class Model with preset data and model.
         Presets a list of colors for the 3-in-1 plot.
@@ -36,21 +158,62 @@ class Model:
             Lower and upper limits for the lambda values.
         model : int/string
             Variable for the choice of model (DAS or which SAS).
+        varpro : bool, optional
+            If True, the lifetimes are fitted by variable projection. The
+            default is False.
+        dtype : string, optional
+            The precision of the exponential basis of the GLA, "float32"
+            halves its memory. The default is "float64".
+        dataset : Dataset, optional
+            The already loaded data of the files. If given, delays, lambdas
+            and spectra are views of its arrays. The default is None.
 
         Returns
         -------
         None.
 
         """
+        self.dataset = dataset
         self.d_borders = self.findBorders(d_limits, delays_filename)
         self.l_borders = self.findBorders(l_limits, lambdas_filename)
         self.name = self.findName(delays_filename)
         self.delays = self.initDelays(delays_filename)
         self.spectra = self.initSpectra(spectra_filename)
+        self.fit_spectra = self.spectra
         self.lambdas = self.initLambdas(lambdas_filename)
         self.model = model
         self.opt_method = opt_method
         self.ivp_method = ivp_method
+        self.varpro = varpro
+        self.dtype = np.dtype(dtype)
+        self.irf = None
+        self.chirp = None
+        self.iter_cb = None
+        self.aborted = False
+        self.trace = None
+        self.cache = None
+        self.n_starts = None
+
+    def loadData(self, filename):
+        """
+        Loads a data file. The parsed values are cached as binary files next
+        to the data, so that the text file is only parsed once and later
+        loads are memory mapped. If a Dataset is given, its arrays are used.
+
+        Parameters
+        ----------
+        filename : string
+            The path to the file.
+
+        Returns
+        -------
+        values : np.ndarray
+            The values of the file.
+
+        """
+        if self.dataset is not None:
+            return self.dataset.getValues(filename)
+        return DataCache().load(filename)
 
     def findBorders(self, limits, filename):
         """
@@ -70,7 +233,7 @@ class Model:
             Indexes for the lower and upper limit of the values in the file.
 
         """
-        values = np.genfromtxt(filename)
+        values = self.loadData(filename)
         borders = [0, 1]
         if limits is None:
             limits = [None, None]
@@ -121,7 +284,7 @@ class Model:
             Contains the values of the delays within the chosen borders.
 
         """
-        values = np.genfromtxt(delays_filename)
+        values = self.loadData(delays_filename)
         delays = values[self.d_borders[0]: self.d_borders[1]]
         return delays
 
@@ -140,7 +303,7 @@ class Model:
             Contains the values of the lambdas within the chosen borders.
 
         """
-        values = np.genfromtxt(lambdas_filename)
+        values = self.loadData(lambdas_filename)
         lambdas = values[self.l_borders[0]: self.l_borders[1]]
         return lambdas
 
@@ -159,27 +322,69 @@ class Model:
             Contains the values of the spectra within the chosen borders.
 
         """
-        values = np.genfromtxt(spectra_filename)
+        values = self.loadData(spectra_filename)
         if "eprspectra.txt" in spectra_filename:
             values = values.T
         spectra = values[self.l_borders[0]: self.l_borders[1],
                          self.d_borders[0]: self.d_borders[1]]
         return spectra
 
+    def compressSpectra(self, rank="auto", min_rank=1):
+        """
+        Replaces the spectra used during the optimization of tau by the
+        rank-truncated matrix S_k·V_k.T (k x delays) of a single SVD.
+        Since U_k has orthonormal columns, the difference of the compressed
+        matrix has the same norm as the difference of the truncated spectra,
+        so the fit only scales with k. The full D_fit, A_fit and residuals
+        are calculated with the original spectra in calcD_fit.
+
+        Parameters
+        ----------
+        rank : int/string, optional
+            The number of singular vectors k. For "auto" k is chosen with
+            the optimal hard threshold of Gavish and Donoho (IEEE Trans. Inf.
+            Theory 2014, 60, 5040-5053). The default is "auto".
+        min_rank : int, optional
+            The lower limit for k, usually the number of species.
+            The default is 1.
+
+        Returns
+        -------
+        rank : int
+            The number of singular vectors used.
+
+        """
+        U, s, Vt = np.linalg.svd(self.spectra, full_matrices=False)
+        if rank == "auto":
+            beta = min(self.spectra.shape) / max(self.spectra.shape)
+            omega = 0.56 * beta**3 - 0.95 * beta**2 + 1.82 * beta + 1.43
+            rank = int(np.sum(s > omega * np.median(s)))
+        rank = min(max(int(rank), min_rank), len(s))
+        self.singular_values = s
+        self.svd_rank = rank
+        self.fit_spectra = s[:rank, None] * Vt[:rank]
+        self.clearCache()
+        return rank
+
     # Decay Associated Spectra
 
-    def genE_tau(self, tau):
+    def genE_tau(self, tau, out=None):
         """
         Generatest the matrix E with different values for the delays in every
         column and different values for tau in the rows.
+        The exponents are calculated as the outer product of 1/tau and the
+        delays and, if given, are written in place into out.
+        If an IRF is set, the exponential decays are convolved with it.
+        If a chirp is set, E_tau is calculated for the shifted delays of
+        every wavelength.
 
         Parameters
         ----------
         tau : list
             A list of the given values for tau, the decay constant.
-
-        delays : np.array
-              The measured delays of the TA-spectrum.
+        out : np.array, optional
+            A preallocated array of shape (len(tau), len(delays)), with a
+            chirp (len(lambdas), len(tau), len(delays)). The default is None.
 
         Returns
         -------
@@ -187,13 +392,290 @@ class Model:
             The matrix of E_tau with the exponential decay functions.
 
         """
-        E_tau = np.zeros(shape=(len(tau), len(self.delays)))
-        for i in range(len(tau)):
-            for j in range(len(self.delays)):
-                E_tau[i][j] = -self.delays[j] / tau[i]
-        E_tau = np.exp(E_tau)
+        rates = 1 / np.asarray(tau, dtype=self.dtype)
+        if out is None:
+            out = np.empty(self.getShape(len(rates)), dtype=self.dtype)
+        if self.irf is not None:
+            out[...] = self.calcIRFExp(rates[:, None],
+                                       self.getDelays()[..., None, :] - self.irf[1])
+            return out
+        if self.chirp is not None:
+            out[...] = self.calcStepExp(rates[:, None], self.getDelays()[..., None, :])
+            return out
+        E_tau = np.multiply.outer(rates, -self.delays, out=out)
+        np.exp(E_tau, out=E_tau)
         return E_tau
 
+    # Instrument Response Function
+
+    def setIRF(self, irf):
+        """
+        Sets a gaussian instrument response function (IRF), with which the
+        exponential decays of the GLA and the concentrations of the GTA are
+        convolved. Its FWHM and time zero t0 are fitted together with tau.
+
+        Parameters
+        ----------
+        irf : list
+            A list containing tuples with the FWHM and t0 of the IRF and a
+            boolean stating if the value will be varied. None removes the IRF.
+
+        Returns
+        -------
+        None.
+
+        """
+        if irf is None:
+            self.irf = None
+            self.irf_vary = None
+        else:
+            self.irf = [float(irf[0][0]), float(irf[1][0])]
+            self.irf_vary = [irf[0][1], irf[1][1]]
+        self.clearCache()
+
+    def getSigma(self):
+        """
+        Returns the standard deviation of the gaussian IRF.
+
+        Returns
+        -------
+        sigma : float
+            The standard deviation corresponding to the FWHM of the IRF.
+
+        """
+        return self.irf[0] / (2 * np.sqrt(2 * np.log(2)))
+
+    def calcIRFExp(self, rates, t):
+        """
+        Calculates exp(-k·t) for t >= 0 convolved with the gaussian IRF in
+        closed form:
+        0.5·exp(-k·t + k²σ²/2)·erfc((k·σ² - t) / (σ·√2)).
+        Where the argument of erfc is positive, the equivalent expression
+        0.5·exp(-t²/(2σ²))·erfcx((k·σ² - t) / (σ·√2)) is used to avoid
+        overflows. Evaluated at once for every pair of rates and delays.
+
+        Parameters
+        ----------
+        rates : np.array
+            The rate constants k, can be complex. Broadcastable with t.
+        t : np.array
+            The delays relative to the time zero t0 of the IRF.
+
+        Returns
+        -------
+        E : np.array
+            The convolved exponential decays.
+
+        """
+        sigma = self.getSigma()
+        rates, t = np.broadcast_arrays(rates, t)
+        x = (rates * sigma**2 - t) / (sigma * np.sqrt(2))
+        E = np.empty(x.shape, dtype=np.result_type(x, "float64"))
+        pos = x.real > 0
+        neg = ~pos
+        E[pos] = 0.5 * np.exp(-t[pos]**2 / (2 * sigma**2)) * scsp.erfcx(x[pos])
+        E[neg] = (0.5 * np.exp(-rates[neg] * t[neg] + (rates[neg] * sigma)**2 / 2)
+                  * scsp.erfc(x[neg]))
+        return E
+
+    def calcGauss(self, t):
+        """
+        Calculates the normalized gaussian IRF.
+
+        Parameters
+        ----------
+        t : np.array, float
+            The delays relative to the time zero t0 of the IRF.
+
+        Returns
+        -------
+        g : np.array, float
+            The IRF at the given delays.
+
+        """
+        sigma = self.getSigma()
+        return np.exp(-t**2 / (2 * sigma**2)) / (sigma * np.sqrt(2 * np.pi))
+
+    # Chirp
+
+    def setChirp(self, chirp):
+        """
+        Sets the parameters of the dispersion curve (chirp) found by the chirp
+        correction, shift(λ) = a1 + 1e5·a2/λ² + 1e6·a3/λ⁴. Instead of
+        resampling the spectra, the model functions of every wavelength are
+        evaluated at the delays t - shift(λ) and the amplitudes are solved for
+        every wavelength separately. Without an IRF the species are formed
+        instantly at t = shift(λ).
+
+        Parameters
+        ----------
+        chirp : list, np.array
+            The parameters a1, a2 and a3 of the dispersion curve.
+            None removes the chirp.
+
+        Returns
+        -------
+        None.
+
+        """
+        if chirp is None:
+            self.chirp = None
+        else:
+            self.chirp = np.asarray(chirp, dtype="float64")
+            self.shift = self.calcShift(self.lambdas)
+        self.clearCache()
+
+    def calcShift(self, lambdas):
+        """
+        Calculates the temporal shift of the given wavelengths with the
+        dispersion curve.
+
+        Parameters
+        ----------
+        lambdas : np.array
+            The wavelengths.
+
+        Returns
+        -------
+        shift : np.array
+            The time zero of every wavelength.
+
+        """
+        a1, a2, a3 = self.chirp
+        shift = a1 + 1e5 * a2 / lambdas**2 + 1e6 * a3 / lambdas**4
+        return shift
+
+    def getDelays(self):
+        """
+        Returns the delays at which the model functions are evaluated.
+        With a chirp these are the delays relative to the time zero of every
+        wavelength.
+
+        Returns
+        -------
+        delays : np.array
+            The delays (delays) or, with a chirp, the shifted delays
+            (lambdas x delays).
+
+        """
+        if self.chirp is None:
+            return self.delays
+        return self.delays[None, :] - self.shift[:, None]
+
+    def getShape(self, n):
+        """
+        Returns the shape of the matrix M for n model functions.
+
+        Parameters
+        ----------
+        n : int
+            The number of lifetimes or species.
+
+        Returns
+        -------
+        shape : tuple
+            (n, delays) or, with a chirp, (lambdas, n, delays).
+
+        """
+        if self.chirp is None:
+            return (n, len(self.delays))
+        return (len(self.lambdas), n, len(self.delays))
+
+    def calcStepExp(self, rates, t):
+        """
+        Calculates exp(-k·t) for t >= 0 and 0 before, the model function of a
+        species which is formed instantly at t = 0.
+
+        Parameters
+        ----------
+        rates : np.array
+            The rate constants k, can be complex. Broadcastable with t.
+        t : np.array
+            The delays relative to the time zero.
+
+        Returns
+        -------
+        E : np.array
+            The exponential decays.
+
+        """
+        E = np.exp(-rates * np.clip(t, 0, None)) * (t >= 0)
+        return E
+
+    def calcD_chirp(self, M, spectra):
+        """
+        Solves the normal equations of every wavelength for the amplitudes D,
+        if M is different for every wavelength. If they are singular, the
+        least squares solution of minimal norm is used.
+
+        Parameters
+        ----------
+        M : np.array
+            The matrix M (lambdas x n x delays).
+        spectra : np.array
+            The spectra (lambdas x delays).
+
+        Returns
+        -------
+        D : np.array
+            The amplitudes (lambdas x n).
+
+        """
+        MS = np.einsum("wnt,wt->wn", M, spectra)
+        MM = M @ np.swapaxes(M, 1, 2)
+        try:
+            D = np.linalg.solve(MM, MS[..., None])[..., 0]
+        except np.linalg.LinAlgError:
+            # wavelengths whose time zero lies after the last delay have no
+            # model functions, their amplitudes are set to zero
+            D = (np.linalg.pinv(MM, hermitian=True) @ MS[..., None])[..., 0]
+        return D
+
+    def calcA_chirp(self, D, M):
+        """
+        Calculates the reconstructed spectra, if M is different for every
+        wavelength.
+
+        Parameters
+        ----------
+        D : np.array
+            The amplitudes (lambdas x n).
+        M : np.array
+            The matrix M (lambdas x n x delays).
+
+        Returns
+        -------
+        A : np.array
+            The reconstructed spectra (lambdas x delays).
+
+        """
+        A = np.einsum("wn,wnt->wt", D, M)
+        return A
+
+    def getBuffer(self, n):
+        """
+        Returns the preallocated array for E_tau, which is reused in every
+        iteration of the fit. It is only reallocated if the number of
+        lifetimes or the dtype change.
+
+        Parameters
+        ----------
+        n : int
+            The number of lifetimes.
+
+        Returns
+        -------
+        buffer : np.array
+            An array of the shape given by getShape.
+
+        """
+        shape = self.getShape(n)
+        buffer = getattr(self, "E_buffer", None)
+        if buffer is None or buffer.shape != shape or buffer.dtype != self.dtype:
+            buffer = np.empty(shape, dtype=self.dtype)
+            self.E_buffer = buffer
+        return buffer
+
     # Species Associated Spectra
 
     def setInitialConcentrations(self, C_0):
@@ -217,6 +699,7 @@ class Model:
             C_0 = np.zeros(self.n)
             C_0[0] = 1
         self.C_0 = C_0
+        self.clearCache()
         return C_0
 
     def calcdCdt(self, delays, C_0):
@@ -257,11 +740,205 @@ class Model:
             time in delays.
 
         """
+        if ivp_method == "analytic":
+            return self.solveDiffAnalytic()
+        if self.chirp is not None:
+            return self.solveDiffChirp(ivp_method)
+        if self.irf is not None:
+            return self.solveDiffIRF(ivp_method)
         Z = scint.solve_ivp(self.calcdCdt, [min(self.delays), max(self.delays)],
                             self.C_0, t_eval=self.delays, method=ivp_method)
         C_t = Z.get("y")
         return C_t
 
+    def solveDiffAnalytic(self, cond_max=1e8):
+        """
+        Solves the differential equation of dCdt = K·C in closed form.
+        Since K is constant, C(t) = V·exp(Λ·t)·V⁻¹·C_0 follows from the
+        eigendecomposition of K and is evaluated for all delays at once.
+        If K is defective or has (nearly) degenerate rates, the eigenvectors
+        become ill-conditioned and C(t) = expm(K·t)·C_0 is used instead.
+        If an IRF is set, every exponential mode is convolved with it and C_0
+        is the concentration at t0 instead of at the first delay.
+        If a chirp is set, C(t) is calculated for the shifted delays of every
+        wavelength (lambdas x species x delays).
+
+        Parameters
+        ----------
+        cond_max : float, optional
+            The largest condition number of the eigenvector matrix for which
+            the eigendecomposition is trusted. The default is 1e8.
+
+        Returns
+        -------
+        C_t : np.array
+            Contains the concentration of each species at each point of
+            time in delays.
+
+        """
+        C_0 = np.asarray(self.C_0, dtype="float64")
+        t = self.getDelays()
+        w, V = np.linalg.eig(self.K)
+        if np.all(np.isfinite(w)) and np.linalg.cond(V) < cond_max:
+            b = np.linalg.solve(V, C_0)
+            if self.irf is not None:
+                E = self.calcIRFExp(-w[:, None], t[..., None, :] - self.irf[1])
+            elif self.chirp is not None:
+                E = self.calcStepExp(-w[:, None], t[..., None, :])
+            else:
+                E = np.exp(np.outer(w, self.delays - min(self.delays)))
+            C_t = ((V * b) @ E).real
+        elif self.irf is not None:
+            C_t = self.solveDiffIRFExpm(C_0)
+        else:
+            if self.chirp is not None:
+                t_rel = np.clip(t, 0, None)
+            else:
+                t_rel = t - min(self.delays)
+            C_t = scla.expm(t_rel.reshape(-1, 1, 1) * self.K) @ C_0
+            C_t = np.moveaxis(C_t.reshape(t.shape + (len(C_0),)), -1, -2)
+            if self.chirp is not None:
+                C_t *= (t >= 0)[..., None, :]
+        return C_t
+
+    def solveDiffIRFExpm(self, C_0):
+        """
+        Calculates the concentrations convolved with the IRF for a defective
+        K. After 6σ the IRF has ended and
+        C(t) = expm(K·(t - t0))·expm(K²σ²/2)·C_0 holds exactly. Closer to t0
+        the convolution is integrated numerically on a grid of σ/20.
+
+        Parameters
+        ----------
+        C_0 : np.array
+            The concentrations at t0.
+
+        Returns
+        -------
+        C_t : np.array
+            Contains the concentration of each species at each point of
+            time in delays.
+
+        """
+        sigma = self.getSigma()
+        t_shape = self.getDelays().shape
+        t = self.getDelays().ravel() - self.irf[1]
+        C_t = np.zeros((len(C_0), len(t)))
+        late = t >= 6 * sigma
+        early = (t > -6 * sigma) & ~late
+        C_w = scla.expm(self.K @ self.K * sigma**2 / 2) @ C_0
+        C_t[:, late] = (scla.expm(t[late, None, None] * self.K) @ C_w).T
+        if np.any(early):
+            h = sigma / 20
+            grid = np.arange(241) * h
+            P = scla.expm(self.K * h)
+            C_grid = np.empty((len(grid), len(C_0)))
+            C = C_0
+            for i in range(len(grid)):
+                C_grid[i] = C
+                C = P @ C
+            G = self.calcGauss(t[early, None] - grid[None, :]) * h
+            G[:, 0] *= 0.5
+            C_t[:, early] = (G @ C_grid).T
+        C_t = np.moveaxis(C_t.reshape((len(C_0),) + t_shape), 0, -2)
+        return C_t
+
+    def calcdCdtIRF(self, t, C):
+        """
+        Calculates the derivative of the concentration by the time, when the
+        species are formed by the gaussian IRF.
+
+        Parameters
+        ----------
+        t : float
+            The point of time.
+        C : np.array
+            The concentration of each species.
+
+        Returns
+        -------
+        dCdt : np.array
+            derivate of the concentration by the time
+
+        """
+        dCdt = self.K @ C + self.calcGauss(t - self.irf[1]) * np.asarray(self.C_0)
+        return dCdt
+
+    def solveDiffIRF(self, ivp_method):
+        """
+        Solves the differential equation of dCdt = K·C + IRF(t)·C_0, whose
+        solution is the concentration convolved with the IRF. The pulse is
+        integrated with steps of at most σ/4, so that it cannot be skipped.
+
+        Parameters
+        ----------
+        ivp_method: string
+            The algorithm used by the initial value problem solver.
+
+        Returns
+        -------
+        C_t : np.array
+            Contains the concentration of each species at each point of
+            time in delays.
+
+        """
+        sigma = self.getSigma()
+        start = min(min(self.delays), self.irf[1] - 6 * sigma)
+        mid = self.irf[1] + 6 * sigma
+        C_t = np.zeros((len(self.C_0), len(self.delays)))
+        first = self.delays <= mid
+        t_eval = np.append(self.delays[first], mid)
+        Z = scint.solve_ivp(self.calcdCdtIRF, [start, mid], np.zeros(len(self.C_0)),
+                            t_eval=t_eval, method=ivp_method, max_step=sigma / 4)
+        C_t[:, first] = Z.get("y")[:, :-1]
+        if np.any(~first):
+            Z = scint.solve_ivp(self.calcdCdtIRF, [mid, max(self.delays)],
+                                Z.get("y")[:, -1], t_eval=self.delays[~first],
+                                method=ivp_method)
+            C_t[:, ~first] = Z.get("y")
+        return C_t
+
+    def solveDiffChirp(self, ivp_method):
+        """
+        Solves the differential equation of dCdt = K·C, or with an IRF
+        dCdt = K·C + IRF(t)·C_0, once and evaluates the dense output of the
+        solver at the shifted delays of every wavelength.
+
+        Parameters
+        ----------
+        ivp_method: string
+            The algorithm used by the initial value problem solver.
+
+        Returns
+        -------
+        C_t : np.array
+            Contains the concentration of each species at each point of
+            time in delays for every wavelength (lambdas x species x delays).
+
+        """
+        t = self.getDelays()
+        C_t = np.zeros((len(self.C_0),) + t.shape)
+        if self.irf is None:
+            onset = t >= 0
+            Z = scint.solve_ivp(self.calcdCdt, [0, t.max()], self.C_0,
+                                method=ivp_method, dense_output=True)
+            C_t[:, onset] = Z.sol(t[onset])
+        else:
+            sigma = self.getSigma()
+            start = min(t.min(), self.irf[1] - 6 * sigma)
+            mid = self.irf[1] + 6 * sigma
+            first = t <= mid
+            Z = scint.solve_ivp(self.calcdCdtIRF, [start, mid], np.zeros(len(self.C_0)),
+                                method=ivp_method, max_step=sigma / 4,
+                                dense_output=True)
+            C_t[:, first] = Z.sol(t[first])
+            if np.any(~first):
+                Z = scint.solve_ivp(self.calcdCdtIRF, [mid, t.max()], Z.get("y")[:, -1],
+                                    method=ivp_method, dense_output=True)
+                C_t[:, ~first] = Z.sol(t[~first])
+        C_t = np.moveaxis(C_t, 0, -2)
+        return C_t
+
     def getK(self, tau):
         """
         Outputs the matrix K for given reaction constants x.
@@ -408,7 +1085,7 @@ class Model:
             bounds = list(zip(self.tau_low, self.tau_high))
         return bounds
 
-    def getM(self, tau):
+    def getM(self, tau, buffered=False):
         """
         Outputs the matrix which will be used in the matrix reconstruction
         algorithm to obtain the fitted spectra A_fit. For the DAS it is the
@@ -419,6 +1096,9 @@ class Model:
         ----------
         tau : list, np.array
             An array containing the decay constants tau.
+        buffered : bool, optional
+            If True, E_tau of the GLA is written into the array reused by
+            every iteration of the fit. The default is False.
 
         Returns
         -------
@@ -427,7 +1107,8 @@ class Model:
 
         """
         if self.model == 0:  # GLA
-            M = self.genE_tau(tau)
+            out = self.getBuffer(len(tau)) if buffered is True else None
+            M = self.genE_tau(tau, out=out)
             self.n = len(tau)
         else:  # GTA
             self.K, n = self.getK(tau)
@@ -449,7 +1130,9 @@ class Model:
             The matrix D_tau.
 
         """
-        res1 = self.spectra @ self.M.T
+        if self.chirp is not None:
+            return self.calcD_chirp(self.M, self.fit_spectra)
+        res1 = self.fit_spectra @ self.M.T
         res2 = self.M @ self.M.T
         inv = np.linalg.inv(res2)
         D_tau = res1 @ inv
@@ -470,8 +1153,13 @@ class Model:
             The reconstructed data matrix for the values of tau.
 
         """
-        D_tau = self.calcD_tau(tau)
-        A_tau = D_tau @ self.M
+        with self.measure("calcD_tau"):
+            D_tau = self.calcD_tau(tau)
+        with self.measure("calcA_tau"):
+            if self.chirp is not None:
+                A_tau = self.calcA_chirp(D_tau, self.M)
+            else:
+                A_tau = D_tau @ self.M
         return A_tau
 
     def getDifference(self, tau):
@@ -492,791 +1180,969 @@ class Model:
             Difference between the modeled data and the experimental data.
 
         """
-        tau_sum = list(tau.valuesdict().values())
-        self.M = self.getM(tau_sum)
-        difference = self.calcA_tau(tau_sum) - self.spectra
+        tau_sum = self.getTaus(tau)
+        self.M, D_tau = self.getCachedMatrices(tau_sum, projected=False)
+        with self.measure("calcA_tau"):
+            if self.chirp is not None:
+                A_tau = self.calcA_chirp(D_tau, self.M)
+            else:
+                A_tau = D_tau @ self.M
+        with self.measure("residual"):
+            difference = A_tau - self.fit_spectra
         return difference
 
-    def findTau_fit(self, preparam, opt_method):
+    # Variable Projection
+
+    def getTaus(self, params):
         """
-        The function takes the variable tau_guess and optimizes their values,
-        so that ChiSquare takes a minimal value. It outputs a list of the
-        optimized tau values and the non-varied ones, if GLA was used.
+        Reads the decay constants tau from the lmfit parameters.
+        If the IRF is fitted, its current FWHM and t0 are set as well.
 
         Parameters
         ----------
-        tau_fix : list, np.array
-            A list of the variables tau_fix for the DAS. Empty for SAS.
-        tau_guess : list, np.array
-            A list of the variables tau_guess for the DAS or all tau values for
-            the SAS.
-        opt_method: string
-            The algorithm used by the optimization function.
+        params : lmfit.Parameters
+            The parameters of the fit.
 
         Returns
         -------
-        tau_sum : list
-            The fitted parameters tau_fit and the fixed values tau_fix combined.
+        tau : list
+            The values of all tau parameters.
 
         """
-        params = Parameters()
-        self.tau_fit = []
-        bounds = self.getTauBounds(preparam)
-        for i in range(len(preparam)):
-            params.add('tau' + str(i), preparam[i][0],
-                       min=bounds[i][0], max=bounds[i][1], vary=preparam[i][1])
-        res_fit = minimize(self.getDifference, params, method=opt_method)
-        fit_rep = fit_report(res_fit)
-        if hasattr(res_fit, "success"):
-            if res_fit.success is False:
-                print("Fitting unsuccesful!")
-        for name, param in res_fit.params.items():
-            self.tau_fit.append(param.value)
-        if (self.model == "custom model" or self.model == "custom matrix"):
-            tau_sum = self.regenM(self.tau_fit)
-        else:
-            tau_sum = self.tau_fit
-        return tau_sum, fit_rep
+        if "irf_width" in params:
+            self.irf = [params["irf_width"].value, params["irf_t0"].value]
+        return [par.value for name, par in params.items()
+                if name.startswith("tau")]
 
-    def calcD_fit(self):
+    def calcProjection(self, M):
         """
-        Calculates D_fit from the previously calculated self.tau_fit and x_fix,
-        if DAS.
+        Calculates the reduced QR decomposition of M.T, which spans the
+        space of the model functions. Q·Q.T projects the spectra onto it.
+        With a chirp, M is decomposed for every wavelength.
 
-        Returns
-        -------
-        D_fit : np.array
-            Matrix D with the fitted values for tau.
+        Parameters
+        ----------
+        M : np.array
+            The matrix for the matrix reconstruction algorithm.
+
+        Returns
+        -------
+        Q : np.array
+            Orthonormal basis of the model functions (delays x n).
+        R : np.array
+            Upper triangular matrix with M.T = Q·R.
 
         """
-        self.M_fit = self.getM(self.tau_fit)
-        res1 = self.spectra @ self.M_fit.T
-        bra1 = np.linalg.inv(self.M_fit @ self.M_fit.T)
-        D_fit = res1 @ bra1
-        self.D_fit = D_fit
-        return D_fit
+        Q, R = np.linalg.qr(np.swapaxes(M, -1, -2))
+        if self.chirp is not None:
+            # columns of M which are zero, e.g. of wavelengths whose time zero
+            # lies after the last delay, are removed from the basis
+            diag = np.abs(np.diagonal(R, axis1=-2, axis2=-1))
+            tol = np.finfo(diag.dtype).eps * M.shape[-1] * np.max(np.abs(M))
+            Q = Q * (diag > tol)[..., None, :]
+        return Q, R
 
-    def calcA_fit(self):
+    def getProjectedDifference(self, params):
         """
-        Generates the reconstructed spectra matrix with the matrices
-        self.D_fit and self.M_fit.
+        Calculates the difference between the reconstructed and the original
+        spectra with the linear amplitudes D eliminated by a QR solve instead
+        of the explicit inverse used in calcD_tau.
+
+        Parameters
+        ----------
+        params : lmfit.Parameters
+            The parameters of the fit.
 
         Returns
         -------
-        A_fit : np.array
-            The reconstructed data matrix for the values of tau_fit and x_fix,
-            if DAS.
+        difference : np.ndarray
+            Difference between the modeled data and the experimental data.
 
         """
-        A_fit = self.D_fit @ self.M_fit
-        self.spec = A_fit
-        return A_fit
+        tau = self.getTaus(params)
+        self.M, (Q, R) = self.getCachedMatrices(tau, projected=True)
+        with self.measure("residual"):
+            if self.chirp is not None:
+                SQ = np.einsum("wt,wtn->wn", self.fit_spectra, Q)
+                difference = np.einsum("wn,wtn->wt", SQ, Q) - self.fit_spectra
+            else:
+                difference = (self.fit_spectra @ Q) @ Q.T - self.fit_spectra
+        return difference
 
-    def calcResiduals(self):
+    def getCachedMatrices(self, tau, projected):
         """
-        Calculates the difference between the original spectra and the
-        calculated spectra to obtain residuals.
+        Returns M and either the amplitudes D_tau or the QR decomposition of
+        the projection for the given tau. If a cache is set, they are taken
+        from it for rates evaluated before, otherwise they are calculated
+        and cached.
+
+        Parameters
+        ----------
+        tau : list
+            The decay constants tau.
+        projected : bool
+            If True, the QR decomposition of calcProjection is returned,
+            otherwise D_tau of calcD_tau.
 
         Returns
         -------
-        residuals : np.array
-            Difference between spectra (original data) and spec (fitted data).
+        M : np.array
+            The matrix for the matrix reconstruction algorithm.
+        D_tau or (Q, R) : np.array or tuple
+            The amplitudes or the QR decomposition of M.T.
+
+        """
+        key = None
+        if self.cache is not None:
+            key = self.cache.getKey(tau, self.irf, projected, self.model,
+                                    self.ivp_method,
+                                    getattr(self, "M_ones", None))
+            entry = self.cache.get(key)
+            if entry is not None:
+                self.count("cache_hits")
+                return entry
+            self.count("cache_misses")
+        with self.measure("getM"):
+            M = self.getM(tau, buffered=key is None)
+        if projected is True:
+            with self.measure("projection"):
+                entry = (M, self.calcProjection(M))
+        else:
+            self.M = M
+            with self.measure("calcD_tau"):
+                entry = (M, self.calcD_tau(tau))
+        if key is not None:
+            self.cache.put(key, entry)
+        return entry
 
+    def getdM(self, tau, M, name):
         """
-        mul1 = self.D_fit @ self.M_fit
-        self.residuals = mul1 - self.spectra
-        return self.residuals
+        Calculates the derivative of M with respect to a single parameter.
+        For the GLA without IRF it is calculated analytically, otherwise by a
+        forward difference of M.
 
-    # Plotting of the data
+        Parameters
+        ----------
+        tau : list
+            The decay constants tau.
+        M : np.array
+            The matrix M for the given tau.
+        name : string
+            The name of the parameter, "tau<index>", "irf_width" or "irf_t0".
 
-    def setv_min(self, data, mul):
+        Returns
+        -------
+        dM : np.array
+            The derivative of M with respect to the parameter.
+
+        """
+        if name.startswith("tau"):
+            index = int(name[3:])
+            if self.model == 0 and self.irf is None:
+                dM = np.zeros_like(M)
+                dM[index] = self.delays / tau[index]**2 * M[index]
+                return dM
+            step = 1e-6 * max(abs(tau[index]), 1e-3)
+            tau_step = list(tau)
+            tau_step[index] = tau[index] + step
+            dM = (self.getM(tau_step) - M) / step
+        else:
+            irf = list(self.irf)
+            index = 0 if name == "irf_width" else 1
+            step = 1e-6 * max(abs(irf[index]), 1e-3)
+            self.irf[index] += step
+            dM = (self.getM(tau) - M) / step
+            self.irf = irf
+        return dM
+
+    def getProjectedJacobian(self, params, kaufman=True):
         """
-        For the given data and multiplicity, this function will determine the
-        minimal value for the colorbar.
+        Calculates the Jacobian of getProjectedDifference with respect to the
+        varied parameters (Golub and Pereyra, SIAM J. Numer. Anal. 1973, 10,
+        413-432). With kaufman=True the second term of the Golub-Pereyra
+        Jacobian is dropped as proposed by Kaufman (BIT 1975, 15, 49-57).
 
         Parameters
         ----------
-        data : np.array
-            An array containing data.
-        mul : float
-            The value by which data will be multiplied.
+        params : lmfit.Parameters
+            The parameters of the fit.
+        kaufman : bool, optional
+            Use the approximation of Kaufman. The default is True.
 
         Returns
         -------
-        v_min : float
-            The minimal value for the colorbar.
+        jac : np.ndarray
+            The Jacobian with one column for every varied parameter.
+
+        """
+        tau = self.getTaus(params)
+        M, (Q, R) = self.getCachedMatrices(tau, projected=True)
+        with self.measure("jacobian"):
+            SQ = self.fit_spectra @ Q
+            D = np.linalg.solve(R, SQ.T).T
+            if kaufman is False:
+                res = SQ @ Q.T - self.fit_spectra
+            varied = [name for name, par in params.items() if par.vary]
+            jac = np.zeros((self.fit_spectra.size, len(varied)))
+            for col, name in enumerate(varied):
+                dM = self.getdM(tau, M, name)
+                Z = D @ dM
+                J = Z - (Z @ Q) @ Q.T
+                if kaufman is False:
+                    J -= np.linalg.solve(R.T, (res @ dM.T).T).T @ Q.T
+                jac[:, col] = J.ravel()
+        if self.model != 0:
+            self.getK(tau)
+        self.M = M
+        return jac
+
+    def getGradient(self, params):
+        """
+        Calculates the gradient of the sum of squared differences with
+        respect to the varied parameters, as used by the scalar minimizers
+        of lmfit. Since the difference is orthogonal to the model functions,
+        the Kaufman term is exact here and the gradient reduces to
+        2·sum(D·dM/dtau ⊙ difference).
+
+        Parameters
+        ----------
+        params : lmfit.Parameters
+            The parameters of the fit.
+
+        Returns
+        -------
+        grad : np.array
+            The gradient with one entry for every varied parameter.
+
+        """
+        tau = self.getTaus(params)
+        M, (Q, R) = self.getCachedMatrices(tau, projected=True)
+        with self.measure("jacobian"):
+            SQ = self.fit_spectra @ Q
+            D = np.linalg.solve(R, SQ.T).T
+            res = SQ @ Q.T - self.fit_spectra
+            varied = [name for name, par in params.items() if par.vary]
+            grad = np.zeros(len(varied))
+            for col, name in enumerate(varied):
+                dM = self.getdM(tau, M, name)
+                grad[col] = 2 * np.sum(D * (res @ dM.T))
+        if self.model != 0:
+            self.getK(tau)
+        self.M = M
+        return grad
+
+    def getJacobianKws(self, opt_method):
+        """
+        Returns the keyword arguments passing the analytic Jacobian or
+        gradient to lmfit.minimize. It is used for the GLA and in the variable
+        projection mode with the gradient based algorithms, but not with a
+        chirp.
+
+        Parameters
+        ----------
+        opt_method: string
+            The algorithm used by the optimization function.
+
+        Returns
+        -------
+        kws : dict
+            The keyword arguments for lmfit.minimize.
 
         """
-        flat_A = data.flatten()
-        v_min = min(flat_A) * mul
-        return v_min
+        kws = {}
+        if (self.model == 0 or self.varpro is True) and self.chirp is None:
+            if opt_method in ("least_squares", "leastsq"):
+                kws["Dfun"] = self.getProjectedJacobian
+            elif opt_method in ("CG", "BFGS", "L-BFGS-B", "TNC", "SLSQP"):
+                kws["jac"] = self.getGradient
+        return kws
 
-    def setv_max(self, data, mul):
+    def setIterCallback(self, iter_cb):
         """
-        For the given data and multiplicity, this function will determine the
-        maximal value for the colorbar.
+        Sets a function that is called after every evaluation of the
+        residuals during the fit, e.g. to report the progress of the fit.
 
         Parameters
         ----------
-        data : np.array
-            An array containing data.
-        mul : float
-            The value by which data will be multiplied.
+        iter_cb : function
+            Called as iter_cb(iteration, chisqr, tau) with the number of
+            evaluations, the current sum of the squared residuals and the
+            current lifetimes. If it returns True, the fit is aborted.
+            None removes the callback.
 
         Returns
         -------
-        v_max : float
-            The maximal value for the colorbar.
+        None.
 
         """
-        flat_A = data.flatten()
-        v_max = max(flat_A) * mul
-        return v_max
+        self.iter_cb = iter_cb
 
-    def findNearestIndex(self, x, data):
+    def setTrace(self, trace):
         """
-        Finds the nearest indices for the elements in x in the data.
+        Sets the trace that records every evaluation of the residuals and
+        the time spent in its stages during the fit.
 
         Parameters
         ----------
-        x : list
-            A list of values which are within the borders of the data.
-        data : np.array
-            An array containing data.
-
+        trace : FitTrace
+            The trace of the fit. None removes the trace.
 
         Returns
         -------
-        x : list
-            The nearest indices for the given values.
+        None.
 
         """
-        x = list(x)
-        for i in range(len(x)):
-            mini = np.argmin(abs(data - x[i]))
-            x[i] = mini
-        return x
+        self.trace = trace
 
-    def log_tick_formatter(self, val, pos=None):
-        '''
-        A logarithmic tick formatter for the 3D contour plot.
+    def setCache(self, max_entries=128, max_bytes=2**28, digits=12):
+        """
+        Sets a bounded LRU cache of M and the amplitudes or projection of the
+        spectra, keyed on the quantized rate constants, so that lifetimes
+        evaluated again during the fit are not solved again. The hits and
+        misses are counted in the trace.
 
         Parameters
         ----------
-        val : float
-            The value to be put into log scaling.
+        max_entries : int, optional
+            The maximal number of cached entries. None removes the cache.
+            The default is 128.
+        max_bytes : int, optional
+            The maximal size of the cached arrays in bytes.
+            The default is 256 MB.
+        digits : int, optional
+            The number of significant digits of the rates in the key.
+            The default is 12.
+
+        Returns
+        -------
+        None.
+
+        """
+        if max_entries is None:
+            self.cache = None
+        else:
+            self.cache = MatrixCache(max_entries, max_bytes, digits)
+
+    def clearCache(self):
+        """
+        Removes all cached matrices, since the spectra, the IRF, the chirp or
+        the initial concentrations changed.
 
         Returns
         -------
-        string
-            The formated axis tick.
+        None.
 
-        '''
-        return r"$10^{{{:.0f}}}$".format(val)
+        """
+        if self.cache is not None:
+            self.cache.clear()
 
-    def plot1(self, grid, wave, wave_index, spectra, mul, labels):
+    def count(self, name):
         """
-        Plots a subplot of delays against absorption change for chosen
-        wavelenghts.
+        Increases a counter of the trace, if a trace is set.
 
         Parameters
         ----------
-        grid : plt.GridSpec
-            The object of the grid for all subplots.
-        wave : list
-            Wavelenghts which should be plotted.
-        wave_index : list
-            Indexes for the wavelengths to be plotted .
-        spectra : np.array
-            Contains the values of the spectra.
+        name : string
+            The name of the counter.
 
         Returns
         -------
         None.
 
         """
-        ltx = str(mul).count("0")
-        unit = ""
-        if "/" in labels[0]:
-            unit = labels[0].split("/")[1]
-        dot = ""
-        if mul != 1:
-            dot = f" $\cdot 10^{ltx}$"
-        ax1 = plt.subplot(grid[0, 0])
-        ax1.set_yscale("log")
-        ax1.set_xlabel(labels[2] + dot)
-        ax1.set_ylabel(labels[1])
-
-        for i, ind in enumerate(wave_index):
-            ax1.plot(
-                spectra[ind],
-                self.delays,
-                label=f"{wave[i]} {unit}"
-            )
-        ax1.axvline(0, color="black", lw=0.5, alpha=0.75)
-        temp = np.concatenate([spectra[i] for i in wave_index])
-        ax1.axis(
-            [
-                1.05 * min(np.array(temp)),
-                1.05 * max(np.array(temp)),
-                min(self.delays),
-                max(self.delays),
-            ]
-        )
-        ax1.set_xticks(())
-        ax1.tick_params(bottom=False)
-        ax1.legend(loc="upper left", frameon=False, labelcolor="linecolor",
-                   handlelength=0, fontsize=11)
-
-    def plot2(self, grid, wave, time, v_min, v_max, spectra, add, cont, mul, labels):
-        """
-        Plots a subplot with a heatmap of the absorption change in delays
-        against lambdas.
+        if self.trace is not None:
+            self.trace.count(name)
+
+    def measure(self, stage):
+        """
+        Returns a context manager measuring the time of a stage of the
+        evaluation of the residuals, if a trace is set.
 
         Parameters
         ----------
-        grid : plt.GridSpec
-            The object of the grid for all subplots.
-        wave : list
-            Wavelenghts which should be plotted.
-        time : list
-            Delays which should be plotted.
-        v_min : float
-            Lower limit for the colorbar.
-        v_max : float
-            Lower limit for the colorbar.
-        spectra : np.array
-            Contains the values of the spectra.
-        add : string
-            Addition to the title of the subplot.
-        cont : float
-            Determines how much contour lines will be shown in the 2D plot.
-            High values will show more lines.
-
-        Returns
-        -------
-        ax2 : plt.subplot
-            The axis of this subplot.
-        cb : plt.colorbar
-            The object colorbar.
-
-        """
-        ax2 = plt.subplot(grid[0, 1])
-        ax2.set_yscale("log")
-        ax2.set_xlabel(labels[0])
-        A_t = spectra.T
-        pcm = ax2.pcolormesh(
-            self.lambdas,
-            self.delays,
-            A_t,
-            cmap=plt.cm.seismic,
-            norm=col.TwoSlopeNorm(vcenter=0, vmin=v_min, vmax=v_max),
-            shading="auto",
-        )
-        if v_min is None:
-            v_min = self.setv_min(spectra, mul)
-        if v_max is None:
-            v_max = self.setv_max(spectra, mul)
-        cb = plt.colorbar(pcm)
-        cb.set_ticks([v_min, 0, v_max])
-        contours = ax2.contour(
-            self.lambdas,
-            self.delays,
-            A_t,
-            levels=np.arange(v_min, v_max, (1 / cont) * (v_max - v_min)),
-            colors="black",
-            linewidths=0.7,
-            linestyles="solid",
-        )
-
-        for i in wave:
-            ax2.axvline(i, color="black", linestyle="-.")
-
-        for i in time:
-            ax2.axhline(i, color="black", linestyle="dotted")
-
-        ax2.axis(
-            [
-                min(self.lambdas),
-                max(self.lambdas),
-                [min(self.delays) if min(self.delays) > 0 else 10 ** (-2)][0],
-                max(self.delays),
-            ]
-        )
-        ax2.set_yticks(())
-        return ax2, cb
-
-    def plot3(self, grid, time, time_index, spectra, mul, labels):
-        """
-        Plots a subplot of absorption change against wavelenghts for chosen
-        delays.
+        stage : string
+            The name of the stage.
+
+        Returns
+        -------
+        context manager
+            FitTrace.stage or a context manager doing nothing.
+
+        """
+        if self.trace is None:
+            return nullcontext()
+        return self.trace.stage(stage)
+
+    def callIterCallback(self, params, iteration, resid, *args, **kws):
+        """
+        Passes the progress of lmfit's minimize to the trace and the
+        iteration callback.
 
         Parameters
         ----------
-        grid : plt.GridSpec
-            The object of the grid for all subplots.
-        time : list
-            Delays which should be plotted.
-        time_index : list
-            Indexes for the delays to be plotted.
-        spectra : np.array
-            Contains the values of the spectra.
+        params : lmfit.Parameters
+            The current parameters.
+        iteration : int
+            The number of evaluations of the residuals.
+        resid : np.array
+            The current residuals.
 
         Returns
         -------
-        None.
+        bool
+            True if the fit should be aborted.
+
+        """
+        if self.aborted is True:
+            # lmfit evaluates the last parameters once more after aborting
+            return False
+        chisqr = float(np.sum(np.square(resid)))
+        if self.trace is not None:
+            self.trace.record(iteration, chisqr,
+                              {name: par.value for name, par in params.items()})
+        if self.iter_cb is not None:
+            self.aborted = self.iter_cb(iteration, chisqr, self.getTaus(params)) is True
+        return self.aborted
+
+    def getWorkerCopy(self):
+        """
+        Returns a shallow copy of the model, which can be sent to a worker
+        process. The trace, the iteration callback and the cached data set
+        are removed and the copy gets its own empty cache of the matrices.
+        The arrays changed in place during a fit, the buffer of E_tau and
+        the IRF, are not shared, so that refits in this process do not
+        overwrite the matrices of the fitted model.
 
+        Returns
+        -------
+        model : Model
+            The copy of the model, sharing the arrays.
+
+        """
+        model = copy.copy(self)
+        model.iter_cb = None
+        model.trace = None
+        model.dataset = None
+        model.E_buffer = None
+        if self.irf is not None:
+            model.irf = list(self.irf)
+        if self.cache is not None:
+            model.cache = self.cache.empty()
+        return model
+
+    def mapFits(self, func, tasks, workers=None):
         """
-        ltx = str(mul).count("0")
-        unit = ""
-        if "/" in labels[1]:
-            unit = labels[1].split("/")[1]
-        dot = ""
-        if mul != 1:
-            dot = f" $\cdot 10^{ltx}$"
-        ax3 = plt.subplot(grid[0, 2])
-        ax3.set_ylabel(labels[2] + dot)
-        ax3.set_xlabel(labels[0])
-        y = np.zeros(len(self.lambdas))
-        hoehe = 0
-        temp = np.zeros(len(self.lambdas))
-        for i, ind in enumerate(time_index):
-            for j in range(len(self.lambdas)):
-                temp[j] = spectra[j][ind]
-                y[j] = temp[j] + hoehe
-            if ind == time_index[0]:
-                mini = min(y)
-            ax3.plot(self.lambdas, y, color="black")
-            ax3.annotate(
-                f"{time[i]} {unit}", (0.5 * (min(self.lambdas) +
-                                             max(self.lambdas)), hoehe)
-            )
-            ax3.axhline(hoehe, color="black", lw=0.5, alpha=0.75)
-            hoehe += 1.1 * (abs(max(temp)) + abs(min(temp)))
-        ax3.axis([min(self.lambdas), max(self.lambdas), 1.1 * mini,
-                  1.1 * max(y)])
-        ax3.set_yticks(())
-
-    def plot3D(self, spectra, v_min, v_max, mul, labels, add=""):
-        """
-        Allows for the creation of a 3D contour plot.
+        Runs independent fits of this model in a pool of processes. The
+        model is sent only once to every process, without trace, iteration
+        callback and the cached data set.
 
         Parameters
         ----------
-        spectra : np.array
-            Contains the values of the spectra.
-        v_min : float
-            Lower limit for the colorbar.
-        v_max : float
-            Upper limit for the colorbar.
-        cont : float
-            Determines how much contour lines will be shown in the 2D plot.
-            High values will show more lines.
-        add : string, optional
-            Addition to the title of the subplot. The default is "".
-        mul : float
-            The value by which the spectra will be multiplied.
-            The default is 1.
+        func : function
+            A module level fit, called as func(model, *task).
+        tasks : list
+            The arguments of every fit.
+        workers : int, optional
+            The number of processes. None uses the number of cores, 1 runs
+            the fits in this process. The default is None.
 
         Returns
         -------
-        None.
+        results : list
+            The results of the fits in the order of the tasks.
+
+        """
+        model = self.getWorkerCopy()
+        if workers == 1 or len(tasks) < 2:
+            return [func(model, *task) for task in tasks]
+        with ProcessPoolExecutor(workers, initializer=initWorker,
+                                 initargs=(model,)) as executor:
+            return list(executor.map(runWorkerTask, repeat(func), *zip(*tasks)))
 
+    def setMultiStart(self, n_starts, workers=None, span=10, seed=None):
         """
-        fig, ax = plt.subplots(figsize=(11.2, 8), subplot_kw={"projection": "3d"})
-        log_delay = np.log10(abs(self.delays))
-        ltx = str(mul).count("0")
-        dot = ""
-        if mul != 1:
-            dot = f" $\cdot 10^{ltx}$"
-        if v_min is None:
-            v_min = self.setv_min(spectra, mul)
-        if v_max is None:
-            v_max = self.setv_max(spectra, mul)
-        X, Y = np.meshgrid(self.lambdas, log_delay)
-        Z = spectra.T * mul
-        ax = plt.axes(projection='3d')
-        ax.contour3D(X, Y, Z, 80, cmap='seismic')
-        ax.set_xlabel(labels[0])
-        ax.set_ylabel(labels[1])
-        ax.set_zlabel(labels[0] + dot)
-        ax.yaxis.set_major_formatter(mticker.FuncFormatter(self.log_tick_formatter))
-        yticks = np.linspace(min(log_delay), max(log_delay), 4)
-        yticks[0] = -1
-        ax.set_yticks(yticks)
-        ax.view_init(20, 250)
-        plt.savefig(self.path + self.name + "3DContour" + ".png")
-
-    def plotCustom(self, spectra, wave, time, v_min, v_max, custom, cont, mul, labels,
-                   add=""):
-        """
-        Allows for the creation of 1-3 subplots in one plot.
+        Sets the multi-start mode of the fit. The local fit is started from
+        the given lifetimes and from n_starts - 1 further starting points
+        and the best fit is refined. The starting lifetimes are sampled
+        log-uniformly by a latin hypercube within the bounds of the lifetimes,
+        but at most span times larger or smaller than the guesses.
 
         Parameters
         ----------
-        spectra : np.array
-            Contains the values of the spectra.
-        wave : list
-            Wavelenghts which should be plotted.
-        time : list
-            Delays which should be plotted.
-        v_min : float
-            Lower limit for the colorbar.
-        v_max : float
-            Upper limit for the colorbar.
-        custom : string
-            Describes which subplots will be plotted.
-        cont : float
-            Determines how much contour lines will be shown in the 2D plot.
-            High values will show more lines.
-        mul : float
-            The value by which the spectra will be multiplied.
-            The default is 1.
-        add : string, optional
-            Addition to the title of the subplot. The default is "".
+        n_starts : int
+            The number of starting points. None or 1 disables the mode.
+        workers : int, optional
+            The number of processes running the local fits. None uses the
+            number of cores, 1 runs them in this process. The default is None.
+        span : float, optional
+            The factor limiting the sampled lifetimes around the guesses.
+            The default is 10.
+        seed : int, optional
+            The seed of the sampling. The default is None.
 
         Returns
         -------
         None.
 
         """
-        ltx = str(mul).count("0")
-        dot = ""
-        if mul != 1:
-            dot = f" $\cdot 10^{ltx}$"
-        if v_min is None:
-            v_min = self.setv_min(spectra, mul)
-        if v_max is None:
-            v_max = self.setv_max(spectra, mul)
-        wave_index = self.findNearestIndex(wave, self.lambdas)
-        time_index = self.findNearestIndex(time, self.delays)
-        space = 0
-
-        if custom == "1":
-            width = 2.5
-            w1 = 1.0
-            w2 = 0
-            w3 = 0
-        elif custom == "2":
-            width = 5.2
-            w1 = 0
-            w2 = 4.7
-            w3 = 0
-        elif custom == "3":
-            width = 2
-            w1 = 0
-            w2 = 0
-            w3 = 1.5
-        elif custom == "1+2":
-            width = 7
-            w1 = 1.0
-            w2 = 3.7
-            w3 = 0
-        elif custom == "1+3":
-            width = 5
-            w1 = 1.0
-            w2 = 0
-            w3 = 1.5
-            space = 0.25
-        elif custom == "2+3":
-            width = 7
-            w1 = 0
-            w2 = 4.7
-            w3 = 1.5
-        elif custom == "1+2+3":
-            width = 9
-            w1 = 1.0
-            w2 = 3.7
-            w3 = 1.5
-
-        fig = plt.figure(
-            figsize=(width, 3), constrained_layout=False, frameon=True
-        )
-        grid = plt.GridSpec(1, 3, wspace=space, width_ratios=[w1, w2, w3])
-
-        if w1 != 0:
-            self.plot1(grid, wave, wave_index, spectra * mul, mul, labels)
-        if w2 != 0:
-            ax2, cb = self.plot2(grid, wave, time, v_min,
-                                 v_max, spectra * mul, add, cont, mul, labels)
-            if w3 == 0:
-                cb.set_label(labels[2] + dot)
-            if w2 == 4.7:
-                ax2.yaxis.set_major_locator(mticker.LogLocator())
-                ax2.set_ylabel(labels[1])
-        if w3 != 0:
-            self.plot3(grid, time, time_index, spectra * mul, mul, labels)
-        grid.tight_layout(fig)
-        plt.savefig(self.path + self.name + add + ".png",
-                    bbox_inches="tight")
-
-    def plotSolo(self, spectra, wave, time, v_min, v_max, solo, cont, mul, labels, add=""):
-        """
-        Allows for the plotting of improved single plots.
+        self.n_starts = n_starts
+        self.start_workers = workers
+        self.start_span = span
+        self.start_seed = seed
+
+    def sampleStarts(self, params, n):
+        """
+        Samples starting points of the varied lifetimes log-uniformly by a
+        latin hypercube. The first starting point are the given parameters.
 
         Parameters
         ----------
-        spectra : np.array
-            Contains the values of the spectra.
-        wave : list
-            Wavelenghts which should be plotted.
-        time : list
-            Delays which should be plotted.
-        v_min : float
-            Lower limit for the colorbar.
-        v_max : float
-            Upper limit for the colorbar.
-        solo : string
-            Describes which subplots will be plotted.
-        cont : float
-            Determines how much contour lines will be shown in the 2D plot.
-            High values will show more lines.
-        mul : float
-            The value by which the spectra will be multiplied.
-            The default is 1.
-        add : string, optional
-            Addition to the title of the subplot. The default is "".
+        params : lmfit.Parameters
+            The parameters with the guessed lifetimes and their bounds.
+        n : int
+            The number of starting points.
 
         Returns
         -------
-        None.
+        starts : list
+            The parameters of every starting point.
+
+        """
+        names = [name for name, par in params.items()
+                 if name.startswith("tau") and par.vary]
+        starts = [params]
+        if n < 2 or len(names) == 0:
+            return starts
+        low = []
+        high = []
+        for name in names:
+            par = params[name]
+            low.append(max(par.value / self.start_span, par.min))
+            high.append(min(par.value * self.start_span, par.max))
+        sample = qmc.LatinHypercube(len(names), seed=self.start_seed).random(n - 1)
+        taus = np.exp(qmc.scale(sample, np.log(low), np.log(high)))
+        for tau in taus:
+            start = copy.deepcopy(params)
+            for name, value in zip(names, tau):
+                start[name].value = value
+            starts.append(start)
+        return starts
+
+    def runMultiStart(self, params, opt_method):
+        """
+        Runs the local fits of all starting points, in parallel processes if
+        more than one worker is set. The converged solutions are saved in
+        the attribute multistart, sorted by their sum of squared residuals.
 
-        """
-        if solo == "WS":
-            self.plotWSlices(wave, spectra, mul, labels, add)
-        if solo == "DS":
-            self.plotDSlices(time, spectra, mul, labels, add)
-        if solo == "H":
-            self.plotHeat(wave, time, v_min, v_max, spectra, cont, mul, labels, add)
+        Parameters
+        ----------
+        params : lmfit.Parameters
+            The parameters with the guessed lifetimes and their bounds.
+        opt_method : string
+            The algorithm used by the optimization function.
+
+        Returns
+        -------
+        best : lmfit.Parameters
+            The parameters of the best fit.
+
+        """
+        starts = self.sampleStarts(params, self.n_starts)
+        results = self.mapFits(fitStart, [(start, opt_method) for start in starts],
+                               self.start_workers)
+        self.multistart = []
+        for start, (values, chisqr, success) in zip(starts, results):
+            self.multistart.append({
+                "start": {name: par.value for name, par in start.items()},
+                "fit": values, "chisqr": chisqr, "success": success})
+        self.multistart.sort(key=lambda entry: entry["chisqr"])
+        best = copy.deepcopy(params)
+        for name, value in self.multistart[0]["fit"].items():
+            best[name].value = value
+        return best
 
-    def plotData(self, x, y, x_label, y_label, label, add=""):
+    def findTau_fit(self, preparam, opt_method):
         """
-        Allows for the plotting of any 2D data.
+        The function takes the variable tau_guess and optimizes their values,
+        so that ChiSquare takes a minimal value. It outputs a list of the
+        optimized tau values and the non-varied ones, if GLA was used.
 
         Parameters
         ----------
-        x : np.array
-            values for the x-axis
-        y : np.array
-            values for the x-axis
-        x_label : string
-            label for the x-axis
-        y_label : string
-            label for the y-axis
-        add : string, optional
-            Addition to the title of the plot. The default is "".
-        label : string, optional
-            label for the graphs in the plot
+        tau_fix : list, np.array
+            A list of the variables tau_fix for the DAS. Empty for SAS.
+        tau_guess : list, np.array
+            A list of the variables tau_guess for the DAS or all tau values for
+            the SAS.
+        opt_method: string
+            The algorithm used by the optimization function.
 
         Returns
         -------
-        None.
+        tau_sum : list
+            The fitted parameters tau_fit and the fixed values tau_fix combined.
 
         """
-        fig, ax = plt.subplots()
-        temp = y.flatten()
-        ax.axis(
-            [
-                min(x),
-                max(x),
-                1.1 * min(temp),
-                1.1 * max(temp)
-            ]
-        )
-        ax.plot(x, y)
-        ax.set_xlabel(x_label)
-        ax.set_ylabel(y_label)
-        if add == "_GTA_kin" or add == "_GLA_kin":
-            ax.set_xscale("log")
-            fig.set_size_inches(7.6, 4)
+        params = Parameters()
+        bounds = self.getTauBounds(preparam)
+        for i in range(len(preparam)):
+            params.add('tau' + str(i), preparam[i][0],
+                       min=bounds[i][0], max=bounds[i][1], vary=preparam[i][1])
+        if self.irf is not None:
+            params.add('irf_width', self.irf[0], min=1e-6, vary=self.irf_vary[0])
+            params.add('irf_t0', self.irf[1], min=min(self.delays),
+                       max=max(self.delays), vary=self.irf_vary[1])
+        if self.n_starts is not None and self.n_starts > 1:
+            params = self.runMultiStart(params, opt_method)
+        kws = self.getJacobianKws(opt_method)
+        self.aborted = False
+        if self.iter_cb is not None or self.trace is not None:
+            kws["iter_cb"] = self.callIterCallback
+        if self.varpro is True:
+            res_fit = minimize(self.getProjectedDifference, params,
+                               method=opt_method, **kws)
+        else:
+            res_fit = minimize(self.getDifference, params, method=opt_method,
+                               **kws)
+        fit_rep = fit_report(res_fit)
+        if hasattr(res_fit, "success"):
+            if res_fit.success is False and self.aborted is False:
+                print("Fitting unsuccesful!")
+        self.params_fit = res_fit.params
+        self.chisqr_fit = float(res_fit.chisqr)
+        self.tau_fit = self.getTaus(res_fit.params)
+        if (self.model == "custom model" or self.model == "custom matrix"):
+            tau_sum = self.regenM(self.tau_fit)
         else:
-            ax.axhline(0, color="black", lw=0.5, alpha=0.75)
-        if label is not None:
-            ax.legend(label, frameon=False, labelcolor="linecolor",
-                      handlelength=0, loc="lower right")
-        plt.savefig(self.path + self.name + add + ".png",
-                    bbox_inches="tight")
+            tau_sum = self.tau_fit
+        return tau_sum, fit_rep
 
-    def plotWSlices(self, wave, spectra, mul, labels, add):
+    def runBootstrap(self, opt_method, n, workers=None, seed=None):
         """
-        Plots a subplot of delays against absorption change for chosen
-        wavelenghts.
+        Refits n bootstrap samples of the spectra, each warm-started from the
+        best fit of findTau_fit. Refits which did not converge are dropped,
+        their number is stored as bootstrap_failed.
 
         Parameters
         ----------
-        wave : list
-            Wavelenghts which should be plotted.
-        wave_index : list
-            Indexes for the wavelengths to be plotted .
-        spectra : np.array
-            Contains the values of the spectra.
+        opt_method : string
+            The algorithm used by the optimization function.
+        n : int
+            The number of bootstrap samples.
+        workers : int, optional
+            The number of processes. None uses the number of cores.
+            The default is None.
+        seed : int, optional
+            The seed of the samples. The default is None.
 
         Returns
         -------
-        None.
+        samples : np.array
+            The fitted values of the varied lifetimes of the converged refits
+            (samples x lifetimes).
+        names : list
+            The names of the varied lifetimes.
+
+        """
+        names = [name for name, par in self.params_fit.items()
+                 if name.startswith("tau") and par.vary]
+        seeds = np.random.SeedSequence(seed).spawn(n)
+        results = self.mapFits(fitBootstrap, [(self.params_fit, opt_method, s)
+                                              for s in seeds], workers)
+        samples = np.array([[values[name] for name in names]
+                            for values, chisqr, success in results
+                            if success is True and np.isfinite(chisqr)])
+        self.bootstrap_failed = n - len(samples)
+        return samples.reshape(len(samples), len(names)), names
+
+    def runProfile(self, opt_method, n_points=10, span=3, level=0.95,
+                   workers=None):
+        """
+        Calculates the profile likelihood of every varied lifetime. The
+        lifetime is fixed at n_points values on a log scale up to span times
+        smaller and larger than the best fit and the other parameters are
+        refitted, warm-started from the best fit. The confidence interval
+        contains the values with an F-test below the level.
+
+        Parameters
+        ----------
+        opt_method : string
+            The algorithm used by the optimization function.
+        n_points : int, optional
+            The number of values of every lifetime. The default is 10.
+        span : float, optional
+            The factor of the largest deviation from the best fit.
+            The default is 3.
+        level : float, optional
+            The confidence level. The default is 0.95.
+        workers : int, optional
+            The number of processes. None uses the number of cores.
+            The default is None.
+
+        Returns
+        -------
+        profiles : dict
+            The values, the sums of the squared residuals and the lower and
+            upper limit of the interval of every varied lifetime. A limit is
+            NaN if it lies outside the profile or the bounds.
+
+        """
+        names = [name for name, par in self.params_fit.items()
+                 if name.startswith("tau") and par.vary]
+        tasks = []
+        grids = {}
+        for name in names:
+            par = self.params_fit[name]
+            grid = par.value * np.geomspace(1 / span, span, n_points)
+            grid = np.sort(np.r_[grid[(grid > par.min) & (grid < par.max)],
+                                 par.value])
+            grids[name] = grid
+            for value in grid:
+                params = copy.deepcopy(self.params_fit)
+                params[name].set(value=value, vary=False)
+                tasks.append((params, opt_method))
+        results = self.mapFits(fitStart, tasks, workers)
+        chisqr = np.array([result[1] for result in results])
+        n_data = self.fit_spectra.size
+        n_vary = sum(par.vary for par in self.params_fit.values())
+        threshold = self.chisqr_fit * (
+            1 + f_dist.ppf(level, 1, n_data - n_vary) / (n_data - n_vary))
+        profiles = {}
+        start = 0
+        for name in names:
+            grid = grids[name]
+            prof = chisqr[start:start + len(grid)]
+            start += len(grid)
+            best = np.argmin(prof)
+            # sqrt(chisqr - min) is linear for a parabolic profile, so the
+            # crossing is interpolated accurately on a coarse grid
+            y_cross = np.sqrt(threshold - prof[best])
+            limits = []
+            for side in (slice(best, None, -1), slice(best, None)):
+                x = np.log(grid[side])
+                y = np.sqrt(np.clip(prof[side] - prof[best], 0, None))
+                above = np.nonzero(y > y_cross)[0]
+                if len(above) == 0 or above[0] == 0:
+                    limits.append(np.nan)
+                    continue
+                i = above[0]
+                x_cross = np.interp(y_cross, [y[i - 1], y[i]], [x[i - 1], x[i]])
+                limits.append(float(np.exp(x_cross)))
+            profiles[name] = {"values": grid, "chisqr": prof,
+                              "low": limits[0], "high": limits[1]}
+        return profiles
+
+    def calcConfidence(self, opt_method, n_bootstrap=0, profile=False,
+                       level=0.95, workers=None, seed=None):
+        """
+        Calculates confidence intervals of the varied lifetimes of the fit by
+        bootstrap and/or profile likelihood, since the covariance of lmfit
+        is only an estimate and missing for e.g. Nelder-Mead.
+
+        Parameters
+        ----------
+        opt_method : string
+            The algorithm used by the optimization function.
+        n_bootstrap : int, optional
+            The number of bootstrap samples, 0 for none. The default is 0.
+        profile : bool, optional
+            If True, the profile likelihood is calculated.
+            The default is False.
+        level : float, optional
+            The confidence level. The default is 0.95.
+        workers : int, optional
+            The number of processes. None uses the number of cores.
+            The default is None.
+        seed : int, optional
+            The seed of the bootstrap samples. The default is None.
+
+        Returns
+        -------
+        confidence : dict
+            For every varied lifetime the fitted value, the standard
+            deviation and interval of the converged bootstrap refits and the
+            interval of the profile likelihood. Values not calculated are NaN.
+
+        """
+        names = [name for name, par in self.params_fit.items()
+                 if name.startswith("tau") and par.vary]
+        self.confidence = {}
+        for name in names:
+            self.confidence[name] = dict.fromkeys(
+                ["boot_std", "boot_low", "boot_high", "profile_low",
+                 "profile_high"], np.nan)
+            self.confidence[name]["value"] = self.params_fit[name].value
+        self.confidence_level = level
+        if n_bootstrap > 0:
+            self.bootstrap, names = self.runBootstrap(opt_method, n_bootstrap,
+                                                      workers, seed)
+            if len(self.bootstrap) > 1:
+                alpha = 100 * (1 - level) / 2
+                low, high = np.percentile(self.bootstrap, [alpha, 100 - alpha],
+                                          axis=0)
+                std = np.std(self.bootstrap, axis=0, ddof=1)
+                for i, name in enumerate(names):
+                    self.confidence[name].update(boot_std=std[i], boot_low=low[i],
+                                                 boot_high=high[i])
+        if profile is True:
+            self.profiles = self.runProfile(opt_method, level=level,
+                                            workers=workers)
+            for name, prof in self.profiles.items():
+                self.confidence[name].update(profile_low=prof["low"],
+                                             profile_high=prof["high"])
+        return self.confidence
+
+    def calcD_fit(self):
+        """
+        Calculates D_fit from the previously calculated self.tau_fit and x_fix,
+        if DAS.
+
+        Returns
+        -------
+        D_fit : np.array
+            Matrix D with the fitted values for tau.
+
+        """
+        self.M_fit = self.getM(self.tau_fit)
+        if self.chirp is not None:
+            D_fit = self.calcD_chirp(self.M_fit, self.spectra)
+        elif self.varpro is True:
+            Q, R = self.calcProjection(self.M_fit)
+            D_fit = np.linalg.solve(R, (self.spectra @ Q).T).T
+        else:
+            res1 = self.spectra @ self.M_fit.T
+            bra1 = np.linalg.inv(self.M_fit @ self.M_fit.T)
+            D_fit = res1 @ bra1
+        self.D_fit = D_fit
+        return D_fit
+
+    def calcA_fit(self):
+        """
+        Generates the reconstructed spectra matrix with the matrices
+        self.D_fit and self.M_fit.
+
+        Returns
+        -------
+        A_fit : np.array
+            The reconstructed data matrix for the values of tau_fit and x_fix,
+            if DAS.
 
         """
-        fig, ax = plt.subplots()
-        wave_index = self.findNearestIndex(wave, self.lambdas)
-        ltx = str(mul).count("0")
-        unit = ""
-        if "/" in labels[0]:
-            unit = labels[0].split("/")[1]
-        dot = ""
-        if mul != 1:
-            dot = f" $\cdot 10^{ltx}$"
-        ax.set_xscale("log")
-        ax.set_ylabel(labels[2] + dot)
-        ax.set_xlabel(labels[1])
-        for i, ind in enumerate(wave_index):
-            plt.plot(
-                self.delays,
-                spectra[ind],
-                label=f"{wave[i]} {unit}"
-            )
-        temp = np.concatenate([spectra[i] for i in wave_index])
-        ax.axis(
-            [
-                min(self.delays),
-                max(self.delays),
-                1.05 * min(temp),
-                1.05 * max(temp)
-            ]
-        )
-        ax.axhline(0, color="black", lw=0.5, alpha=0.75)
-        ax.set_yticks(())
-        ax.tick_params(bottom=False)
-        ax.legend(loc="upper right", frameon=False, labelcolor="linecolor",
-                  handlelength=0)
-        plt.savefig(self.path + self.name + "Wavelength_Slices" + ".png")
-
-    def plotHeat(self, wave, time, v_min, v_max, spectra, cont, mul, labels, add):
-        """
-        Plots a subplot with a heatmap of the absorption change in delays
-        against lambdas.
+        if self.chirp is not None:
+            A_fit = self.calcA_chirp(self.D_fit, self.M_fit)
+        else:
+            A_fit = self.D_fit @ self.M_fit
+        self.spec = A_fit
+        return A_fit
+
+    def calcResiduals(self):
+        """
+        Calculates the difference between the original spectra and the
+        calculated spectra to obtain residuals.
+
+        Returns
+        -------
+        residuals : np.array
+            Difference between spectra (original data) and spec (fitted data).
+
+        """
+        if self.chirp is not None:
+            mul1 = self.calcA_chirp(self.D_fit, self.M_fit)
+        else:
+            mul1 = self.D_fit @ self.M_fit
+        self.residuals = mul1 - self.spectra
+        return self.residuals
+
+    # Plotting of the data
+
+    def setv_min(self, data, mul):
+        """
+        For the given data and multiplicity, this function will determine the
+        minimal value for the colorbar.
 
         Parameters
         ----------
-        wave : list
-            Wavelenghts which should be plotted.
-        time : list
-            Delays which should be plotted.
+        data : np.array
+            An array containing data.
+        mul : float
+            The value by which data will be multiplied.
+
+        Returns
+        -------
         v_min : float
-            Lower limit for the colorbar.
-        v_max : float
-            Lower limit for the colorbar.
-        spectra : np.array
-            Contains the values of the spectra.
-        cont : float
-            Determines how much contour lines will be shown in the 2D plot.
-            High values will show more lines.
+            The minimal value for the colorbar.
+
+        """
+        flat_A = data.flatten()
+        v_min = min(flat_A) * mul
+        return v_min
+
+    def setv_max(self, data, mul):
+        """
+        For the given data and multiplicity, this function will determine the
+        maximal value for the colorbar.
+
+        Parameters
+        ----------
+        data : np.array
+            An array containing data.
         mul : float
-            The value by which the spectra will be multiplied.
-            The default is 1.
-        add : string
-            Addition to the title of the subplot.
+            The value by which data will be multiplied.
 
         Returns
         -------
-        None.
+        v_max : float
+            The maximal value for the colorbar.
 
         """
-        fig, ax = plt.subplots(figsize=(7.6, 4))
-        ltx = str(mul).count("0")
-        dot = ""
-        if mul != 1:
-            dot = f" $\cdot 10^{ltx}$"
-        ax.set_yscale("log")
-        ax.set_xlabel(labels[0])
-        ax.set_ylabel(labels[1])
-        A_t = spectra.T * mul
-        pcm = ax.pcolormesh(
-            self.lambdas,
-            self.delays,
-            A_t,
-            cmap=plt.cm.seismic,
-            norm=col.TwoSlopeNorm(vcenter=0, vmin=v_min, vmax=v_max),
-            shading="auto",
-        )
-        if v_min is None:
-            v_min = self.setv_min(spectra, mul)
-        if v_max is None:
-            v_max = self.setv_max(spectra, mul)
-        cb = plt.colorbar(pcm)
-        cb.set_ticks([v_min, 0, v_max])
-        cb.set_label(labels[2] + dot)
-        contours = ax.contour(
-            self.lambdas,
-            self.delays,
-            A_t,
-            levels=np.arange(v_min, v_max, (1 / cont) * (v_max - v_min)),
-            colors="black",
-            linewidths=0.7,
-            linestyles="solid",
-        )
-        for i in wave:
-            ax.axvline(i, color="black", linestyle="-.")
-        for i in time:
-            ax.axhline(i, color="black", linestyle="dotted")
-        ax.axis(
-            [
-                min(self.lambdas),
-                max(self.lambdas),
-                [min(self.delays) if min(self.delays) > 0 else 10 ** (-2)][0],
-                max(self.delays),
-            ]
-        )
-        ax.set_xticks
-        if "Residuals" in add:
-            plt.savefig(self.path + self.name + "Residuals" + ".png")
-        else:
-            plt.savefig(self.path + self.name + "Heatmap" + ".png")
+        flat_A = data.flatten()
+        v_max = max(flat_A) * mul
+        return v_max
 
-    def plotDSlices(self, time, spectra, mul, labels, add):
+    def findNearestIndex(self, x, data):
         """
-        Plots a subplot of absorption change against wavelenghts for chosen
-        delays.
+        Finds the nearest indices for the elements in x in the data.
 
         Parameters
         ----------
-        time : list
-            Delays which should be plotted.
-        time_index : list
-            Indexes for the delays to be plotted.
-        spectra : np.array
-            Contains the values of the spectra.
+        x : list
+            A list of values which are within the borders of the data.
+        data : np.array
+            An array containing data.
+
 
         Returns
         -------
-        None.
+        x : list
+            The nearest indices for the given values.
+
+        """
+        x = list(x)
+        for i in range(len(x)):
+            mini = np.argmin(abs(data - x[i]))
+            x[i] = mini
+        return x
+
+    def getPlotter(self, formats=("png",), interactive=False):
+        """
+        Returns the plotter for the data of the model. matplotlib is only
+        imported, when the first plot is made, so that the fit does not
+        depend on it.
+
+        Parameters
+        ----------
+        formats : tuple, optional
+            The file formats the plots are saved in, e.g. "png", "svg" or
+            "pdf". The default is ("png",).
+        interactive : bool, optional
+            If True, the plots are shown by pyplot, see Plotter.
+            The default is False.
+
+        Returns
+        -------
+        plotter : Plotter
+            The plotter of the model.
 
         """
-        fig, ax = plt.subplots()
-        time_index = self.findNearestIndex(time, self.delays)
-        ltx = str(mul).count("0")
-        unit = ""
-        if "/" in labels[1]:
-            unit = labels[1].split("/")[1]
-        dot = ""
-        if mul != 1:
-            dot = f" $\cdot 10^{ltx}$"
-        ax.set_ylabel(labels[2] + dot)
-        ax.set_xlabel(labels[0])
-        for i, ind in enumerate(time_index):
-            plt.plot(self.lambdas, spectra.T[ind], label=f"{time[i]} {unit}")
-        ax.tick_params(bottom=False)
-        ax.legend(loc="upper left", frameon=False, labelcolor="linecolor",
-                  handlelength=0)
-        temp = np.concatenate([spectra.T[i]
-                              for i in time_index])
-        ax.axis(
-            [
-                min(self.lambdas),
-                max(self.lambdas),
-                1.05 * min(temp),
-                1.05 * max(temp)
-            ]
-        )
-        ax.set_yticks(())
-        ax.axhline(0, color="black", lw=0.5, alpha=0.75)
-        plt.savefig(self.path + self.name + "Delay_Slices" + ".png")
+        from Plotting import Plotter
+        return Plotter(self, formats, interactive)
@@ -0,0 +1,769 @@
+import matplotlib.colors as col
+import matplotlib.style as mstyle
+import matplotlib.ticker as mticker
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+import os
+import numpy as np
+
+mstyle.use(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'AK_Richert.mplstyle'))
+#mstyle.use('default')
+
+
+class Plotter:
+
+    def __init__(self, model, formats=("png",), interactive=False):
+        """
+        Initiates the plotter of a fitted or original Model. The plots are
+        saved in the "analysis" folder of the model.
+
+        Parameters
+        ----------
+        model : Model
+            The model whose data is plotted.
+        formats : tuple, optional
+            The file formats the plots are saved in, e.g. "png", "svg" or
+            "pdf". The default is ("png",).
+        interactive : bool, optional
+            If True, the figures are created by pyplot and shown in a window
+            after they are saved. Otherwise they are only drawn by the Agg
+            canvas, without the global state of pyplot, so that plots can be
+            rendered in parallel processes. The default is False.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.model = model
+        self.formats = formats
+        self.interactive = interactive
+        self.figure = None
+        self.saved = []
+
+    def newFigure(self, **kwargs):
+        """
+        Creates the figure of the next plot, see interactive.
+
+        Parameters
+        ----------
+        **kwargs
+            Arguments of the figure, e.g. figsize.
+
+        Returns
+        -------
+        fig : matplotlib.figure.Figure
+            The new figure.
+
+        """
+        if self.interactive is True:
+            import matplotlib.pyplot as plt
+            self.figure = plt.figure(**kwargs)
+        else:
+            self.figure = Figure(**kwargs)
+            FigureCanvasAgg(self.figure)
+        return self.figure
+
+    def saveFigure(self, filename, **kwargs):
+        """
+        Saves the current figure in every format of the plotter and shows it,
+        if the plotter is interactive.
+
+        Parameters
+        ----------
+        filename : string
+            The path and name of the file without the ending.
+        **kwargs
+            Further arguments of savefig, e.g. bbox_inches.
+
+        Returns
+        -------
+        None.
+
+        """
+        for fmt in self.formats:
+            self.figure.savefig(f"{filename}.{fmt}", **kwargs)
+            self.saved.append(f"{filename}.{fmt}")
+        if self.interactive is True:
+            import matplotlib.pyplot as plt
+            plt.show(block=False)
+
+    def log_tick_formatter(self, val, pos=None):
+        '''
+        A logarithmic tick formatter for the 3D contour plot.
+
+        Parameters
+        ----------
+        val : float
+            The value to be put into log scaling.
+
+        Returns
+        -------
+        string
+            The formated axis tick.
+
+        '''
+        return r"$10^{{{:.0f}}}$".format(val)
+
+    def plot1(self, grid, wave, wave_index, spectra, mul, labels):
+        """
+        Plots a subplot of delays against absorption change for chosen
+        wavelenghts.
+
+        Parameters
+        ----------
+        grid : matplotlib.gridspec.GridSpec
+            The object of the grid for all subplots.
+        wave : list
+            Wavelenghts which should be plotted.
+        wave_index : list
+            Indexes for the wavelengths to be plotted .
+        spectra : np.array
+            Contains the values of the spectra.
+
+        Returns
+        -------
+        None.
+
+        """
+        ltx = str(mul).count("0")
+        unit = ""
+        if "/" in labels[0]:
+            unit = labels[0].split("/")[1]
+        dot = ""
+        if mul != 1:
+            dot = f" $\cdot 10^{ltx}$"
+        ax1 = self.figure.add_subplot(grid[0, 0])
+        ax1.set_yscale("log")
+        ax1.set_xlabel(labels[2] + dot)
+        ax1.set_ylabel(labels[1])
+
+        for i, ind in enumerate(wave_index):
+            ax1.plot(
+                spectra[ind],
+                self.model.delays,
+                label=f"{wave[i]} {unit}"
+            )
+        ax1.axvline(0, color="black", lw=0.5, alpha=0.75)
+        temp = np.concatenate([spectra[i] for i in wave_index])
+        ax1.axis(
+            [
+                1.05 * min(np.array(temp)),
+                1.05 * max(np.array(temp)),
+                min(self.model.delays),
+                max(self.model.delays),
+            ]
+        )
+        ax1.set_xticks(())
+        ax1.tick_params(bottom=False)
+        ax1.legend(loc="upper left", frameon=False, labelcolor="linecolor",
+                   handlelength=0, fontsize=11)
+
+    def plot2(self, grid, wave, time, v_min, v_max, spectra, add, cont, mul, labels):
+        """
+        Plots a subplot with a heatmap of the absorption change in delays
+        against lambdas.
+
+        Parameters
+        ----------
+        grid : matplotlib.gridspec.GridSpec
+            The object of the grid for all subplots.
+        wave : list
+            Wavelenghts which should be plotted.
+        time : list
+            Delays which should be plotted.
+        v_min : float
+            Lower limit for the colorbar.
+        v_max : float
+            Lower limit for the colorbar.
+        spectra : np.array
+            Contains the values of the spectra.
+        add : string
+            Addition to the title of the subplot.
+        cont : float
+            Determines how much contour lines will be shown in the 2D plot.
+            High values will show more lines.
+
+        Returns
+        -------
+        ax2 : matplotlib.axes.Axes
+            The axis of this subplot.
+        cb : matplotlib.colorbar.Colorbar
+            The object colorbar.
+
+        """
+        ax2 = self.figure.add_subplot(grid[0, 1])
+        ax2.set_yscale("log")
+        ax2.set_xlabel(labels[0])
+        A_t = spectra.T
+        pcm = ax2.pcolormesh(
+            self.model.lambdas,
+            self.model.delays,
+            A_t,
+            cmap="seismic",
+            norm=col.TwoSlopeNorm(vcenter=0, vmin=v_min, vmax=v_max),
+            shading="auto",
+        )
+        if v_min is None:
+            v_min = self.model.setv_min(spectra, mul)
+        if v_max is None:
+            v_max = self.model.setv_max(spectra, mul)
+        cb = self.figure.colorbar(pcm, ax=ax2)
+        cb.set_ticks([v_min, 0, v_max])
+        contours = ax2.contour(
+            self.model.lambdas,
+            self.model.delays,
+            A_t,
+            levels=np.arange(v_min, v_max, (1 / cont) * (v_max - v_min)),
+            colors="black",
+            linewidths=0.7,
+            linestyles="solid",
+        )
+
+        for i in wave:
+            ax2.axvline(i, color="black", linestyle="-.")
+
+        for i in time:
+            ax2.axhline(i, color="black", linestyle="dotted")
+
+        ax2.axis(
+            [
+                min(self.model.lambdas),
+                max(self.model.lambdas),
+                [min(self.model.delays) if min(self.model.delays) > 0 else 10 ** (-2)][0],
+                max(self.model.delays),
+            ]
+        )
+        ax2.set_yticks(())
+        return ax2, cb
+
+    def plot3(self, grid, time, time_index, spectra, mul, labels):
+        """
+        Plots a subplot of absorption change against wavelenghts for chosen
+        delays.
+
+        Parameters
+        ----------
+        grid : matplotlib.gridspec.GridSpec
+            The object of the grid for all subplots.
+        time : list
+            Delays which should be plotted.
+        time_index : list
+            Indexes for the delays to be plotted.
+        spectra : np.array
+            Contains the values of the spectra.
+
+        Returns
+        -------
+        None.
+
+        """
+        ltx = str(mul).count("0")
+        unit = ""
+        if "/" in labels[1]:
+            unit = labels[1].split("/")[1]
+        dot = ""
+        if mul != 1:
+            dot = f" $\cdot 10^{ltx}$"
+        ax3 = self.figure.add_subplot(grid[0, 2])
+        ax3.set_ylabel(labels[2] + dot)
+        ax3.set_xlabel(labels[0])
+        y = np.zeros(len(self.model.lambdas))
+        hoehe = 0
+        temp = np.zeros(len(self.model.lambdas))
+        for i, ind in enumerate(time_index):
+            for j in range(len(self.model.lambdas)):
+                temp[j] = spectra[j][ind]
+                y[j] = temp[j] + hoehe
+            if ind == time_index[0]:
+                mini = min(y)
+            ax3.plot(self.model.lambdas, y, color="black")
+            ax3.annotate(
+                f"{time[i]} {unit}", (0.5 * (min(self.model.lambdas) +
+                                             max(self.model.lambdas)), hoehe)
+            )
+            ax3.axhline(hoehe, color="black", lw=0.5, alpha=0.75)
+            hoehe += 1.1 * (abs(max(temp)) + abs(min(temp)))
+        ax3.axis([min(self.model.lambdas), max(self.model.lambdas), 1.1 * mini,
+                  1.1 * max(y)])
+        ax3.set_yticks(())
+
+    def plot3D(self, spectra, v_min, v_max, mul, labels, add=""):
+        """
+        Allows for the creation of a 3D contour plot.
+
+        Parameters
+        ----------
+        spectra : np.array
+            Contains the values of the spectra.
+        v_min : float
+            Lower limit for the colorbar.
+        v_max : float
+            Upper limit for the colorbar.
+        cont : float
+            Determines how much contour lines will be shown in the 2D plot.
+            High values will show more lines.
+        add : string, optional
+            Addition to the title of the subplot. The default is "".
+        mul : float
+            The value by which the spectra will be multiplied.
+            The default is 1.
+
+        Returns
+        -------
+        None.
+
+        """
+        fig = self.newFigure(figsize=(11.2, 8))
+        log_delay = np.log10(abs(self.model.delays))
+        ltx = str(mul).count("0")
+        dot = ""
+        if mul != 1:
+            dot = f" $\cdot 10^{ltx}$"
+        if v_min is None:
+            v_min = self.model.setv_min(spectra, mul)
+        if v_max is None:
+            v_max = self.model.setv_max(spectra, mul)
+        X, Y = np.meshgrid(self.model.lambdas, log_delay)
+        Z = spectra.T * mul
+        ax = fig.add_subplot(projection='3d')
+        ax.contour3D(X, Y, Z, 80, cmap='seismic')
+        ax.set_xlabel(labels[0])
+        ax.set_ylabel(labels[1])
+        ax.set_zlabel(labels[0] + dot)
+        ax.yaxis.set_major_formatter(mticker.FuncFormatter(self.log_tick_formatter))
+        yticks = np.linspace(min(log_delay), max(log_delay), 4)
+        yticks[0] = -1
+        ax.set_yticks(yticks)
+        ax.view_init(20, 250)
+        self.saveFigure(self.model.path + self.model.name + "3DContour")
+
+    def plotCustom(self, spectra, wave, time, v_min, v_max, custom, cont, mul, labels,
+                   add=""):
+        """
+        Allows for the creation of 1-3 subplots in one plot.
+
+        Parameters
+        ----------
+        spectra : np.array
+            Contains the values of the spectra.
+        wave : list
+            Wavelenghts which should be plotted.
+        time : list
+            Delays which should be plotted.
+        v_min : float
+            Lower limit for the colorbar.
+        v_max : float
+            Upper limit for the colorbar.
+        custom : string
+            Describes which subplots will be plotted.
+        cont : float
+            Determines how much contour lines will be shown in the 2D plot.
+            High values will show more lines.
+        mul : float
+            The value by which the spectra will be multiplied.
+            The default is 1.
+        add : string, optional
+            Addition to the title of the subplot. The default is "".
+
+        Returns
+        -------
+        None.
+
+        """
+        ltx = str(mul).count("0")
+        dot = ""
+        if mul != 1:
+            dot = f" $\cdot 10^{ltx}$"
+        if v_min is None:
+            v_min = self.model.setv_min(spectra, mul)
+        if v_max is None:
+            v_max = self.model.setv_max(spectra, mul)
+        wave_index = self.model.findNearestIndex(wave, self.model.lambdas)
+        time_index = self.model.findNearestIndex(time, self.model.delays)
+        space = 0
+
+        if custom == "1":
+            width = 2.5
+            w1 = 1.0
+            w2 = 0
+            w3 = 0
+        elif custom == "2":
+            width = 5.2
+            w1 = 0
+            w2 = 4.7
+            w3 = 0
+        elif custom == "3":
+            width = 2
+            w1 = 0
+            w2 = 0
+            w3 = 1.5
+        elif custom == "1+2":
+            width = 7
+            w1 = 1.0
+            w2 = 3.7
+            w3 = 0
+        elif custom == "1+3":
+            width = 5
+            w1 = 1.0
+            w2 = 0
+            w3 = 1.5
+            space = 0.25
+        elif custom == "2+3":
+            width = 7
+            w1 = 0
+            w2 = 4.7
+            w3 = 1.5
+        elif custom == "1+2+3":
+            width = 9
+            w1 = 1.0
+            w2 = 3.7
+            w3 = 1.5
+
+        fig = self.newFigure(
+            figsize=(width, 3), constrained_layout=False, frameon=True
+        )
+        grid = fig.add_gridspec(1, 3, wspace=space, width_ratios=[w1, w2, w3])
+
+        if w1 != 0:
+            self.plot1(grid, wave, wave_index, spectra * mul, mul, labels)
+        if w2 != 0:
+            ax2, cb = self.plot2(grid, wave, time, v_min,
+                                 v_max, spectra * mul, add, cont, mul, labels)
+            if w3 == 0:
+                cb.set_label(labels[2] + dot)
+            if w2 == 4.7:
+                ax2.yaxis.set_major_locator(mticker.LogLocator())
+                ax2.set_ylabel(labels[1])
+        if w3 != 0:
+            self.plot3(grid, time, time_index, spectra * mul, mul, labels)
+        grid.tight_layout(fig)
+        self.saveFigure(self.model.path + self.model.name + add,
+                        bbox_inches="tight")
+
+    def plotSolo(self, spectra, wave, time, v_min, v_max, solo, cont, mul, labels, add=""):
+        """
+        Allows for the plotting of improved single plots.
+
+        Parameters
+        ----------
+        spectra : np.array
+            Contains the values of the spectra.
+        wave : list
+            Wavelenghts which should be plotted.
+        time : list
+            Delays which should be plotted.
+        v_min : float
+            Lower limit for the colorbar.
+        v_max : float
+            Upper limit for the colorbar.
+        solo : string
+            Describes which subplots will be plotted.
+        cont : float
+            Determines how much contour lines will be shown in the 2D plot.
+            High values will show more lines.
+        mul : float
+            The value by which the spectra will be multiplied.
+            The default is 1.
+        add : string, optional
+            Addition to the title of the subplot. The default is "".
+
+        Returns
+        -------
+        None.
+
+        """
+        if solo == "WS":
+            self.plotWSlices(wave, spectra, mul, labels, add)
+        if solo == "DS":
+            self.plotDSlices(time, spectra, mul, labels, add)
+        if solo == "H":
+            self.plotHeat(wave, time, v_min, v_max, spectra, cont, mul, labels, add)
+
+    def plotData(self, x, y, x_label, y_label, label, add=""):
+        """
+        Allows for the plotting of any 2D data.
+
+        Parameters
+        ----------
+        x : np.array
+            values for the x-axis
+        y : np.array
+            values for the x-axis
+        x_label : string
+            label for the x-axis
+        y_label : string
+            label for the y-axis
+        add : string, optional
+            Addition to the title of the plot. The default is "".
+        label : string, optional
+            label for the graphs in the plot
+
+        Returns
+        -------
+        None.
+
+        """
+        fig = self.newFigure()
+        ax = fig.subplots()
+        temp = y.flatten()
+        ax.axis(
+            [
+                min(x),
+                max(x),
+                1.1 * min(temp),
+                1.1 * max(temp)
+            ]
+        )
+        ax.plot(x, y)
+        ax.set_xlabel(x_label)
+        ax.set_ylabel(y_label)
+        if add == "_GTA_kin" or add == "_GLA_kin":
+            ax.set_xscale("log")
+            fig.set_size_inches(7.6, 4)
+        else:
+            ax.axhline(0, color="black", lw=0.5, alpha=0.75)
+        if label is not None:
+            ax.legend(label, frameon=False, labelcolor="linecolor",
+                      handlelength=0, loc="lower right")
+        self.saveFigure(self.model.path + self.model.name + add,
+                        bbox_inches="tight")
+
+    def plotWSlices(self, wave, spectra, mul, labels, add):
+        """
+        Plots a subplot of delays against absorption change for chosen
+        wavelenghts.
+
+        Parameters
+        ----------
+        wave : list
+            Wavelenghts which should be plotted.
+        wave_index : list
+            Indexes for the wavelengths to be plotted .
+        spectra : np.array
+            Contains the values of the spectra.
+
+        Returns
+        -------
+        None.
+
+        """
+        fig = self.newFigure()
+        ax = fig.subplots()
+        wave_index = self.model.findNearestIndex(wave, self.model.lambdas)
+        ltx = str(mul).count("0")
+        unit = ""
+        if "/" in labels[0]:
+            unit = labels[0].split("/")[1]
+        dot = ""
+        if mul != 1:
+            dot = f" $\cdot 10^{ltx}$"
+        ax.set_xscale("log")
+        ax.set_ylabel(labels[2] + dot)
+        ax.set_xlabel(labels[1])
+        for i, ind in enumerate(wave_index):
+            ax.plot(
+                self.model.delays,
+                spectra[ind],
+                label=f"{wave[i]} {unit}"
+            )
+        temp = np.concatenate([spectra[i] for i in wave_index])
+        ax.axis(
+            [
+                min(self.model.delays),
+                max(self.model.delays),
+                1.05 * min(temp),
+                1.05 * max(temp)
+            ]
+        )
+        ax.axhline(0, color="black", lw=0.5, alpha=0.75)
+        ax.set_yticks(())
+        ax.tick_params(bottom=False)
+        ax.legend(loc="upper right", frameon=False, labelcolor="linecolor",
+                  handlelength=0)
+        self.saveFigure(self.model.path + self.model.name + "Wavelength_Slices")
+
+    def plotHeat(self, wave, time, v_min, v_max, spectra, cont, mul, labels, add):
+        """
+        Plots a subplot with a heatmap of the absorption change in delays
+        against lambdas.
+
+        Parameters
+        ----------
+        wave : list
+            Wavelenghts which should be plotted.
+        time : list
+            Delays which should be plotted.
+        v_min : float
+            Lower limit for the colorbar.
+        v_max : float
+            Lower limit for the colorbar.
+        spectra : np.array
+            Contains the values of the spectra.
+        cont : float
+            Determines how much contour lines will be shown in the 2D plot.
+            High values will show more lines.
+        mul : float
+            The value by which the spectra will be multiplied.
+            The default is 1.
+        add : string
+            Addition to the title of the subplot.
+
+        Returns
+        -------
+        None.
+
+        """
+        fig = self.newFigure(figsize=(7.6, 4))
+        ax = fig.subplots()
+        ltx = str(mul).count("0")
+        dot = ""
+        if mul != 1:
+            dot = f" $\cdot 10^{ltx}$"
+        ax.set_yscale("log")
+        ax.set_xlabel(labels[0])
+        ax.set_ylabel(labels[1])
+        A_t = spectra.T * mul
+        pcm = ax.pcolormesh(
+            self.model.lambdas,
+            self.model.delays,
+            A_t,
+            cmap="seismic",
+            norm=col.TwoSlopeNorm(vcenter=0, vmin=v_min, vmax=v_max),
+            shading="auto",
+        )
+        if v_min is None:
+            v_min = self.model.setv_min(spectra, mul)
+        if v_max is None:
+            v_max = self.model.setv_max(spectra, mul)
+        cb = fig.colorbar(pcm, ax=ax)
+        cb.set_ticks([v_min, 0, v_max])
+        cb.set_label(labels[2] + dot)
+        contours = ax.contour(
+            self.model.lambdas,
+            self.model.delays,
+            A_t,
+            levels=np.arange(v_min, v_max, (1 / cont) * (v_max - v_min)),
+            colors="black",
+            linewidths=0.7,
+            linestyles="solid",
+        )
+        for i in wave:
+            ax.axvline(i, color="black", linestyle="-.")
+        for i in time:
+            ax.axhline(i, color="black", linestyle="dotted")
+        ax.axis(
+            [
+                min(self.model.lambdas),
+                max(self.model.lambdas),
+                [min(self.model.delays) if min(self.model.delays) > 0 else 10 ** (-2)][0],
+                max(self.model.delays),
+            ]
+        )
+        ax.set_xticks
+        if "Residuals" in add:
+            self.saveFigure(self.model.path + self.model.name + "Residuals")
+        else:
+            self.saveFigure(self.model.path + self.model.name + "Heatmap")
+
+    def plotLDA(self, taus, density, v_min, v_max, mul, labels):
+        """
+        Plots a heatmap of the lifetime density map in lifetimes against
+        lambdas.
+
+        Parameters
+        ----------
+        taus : np.array
+            The lifetimes of the map.
+        density : np.array
+            The lifetime density map (lambdas x taus).
+        v_min : float
+            Lower limit for the colorbar.
+        v_max : float
+            Upper limit for the colorbar.
+        mul : float
+            The value by which the map will be multiplied.
+        labels : list
+            The labels of the wavelengths, delays and amplitudes.
+
+        Returns
+        -------
+        None.
+
+        """
+        fig = self.newFigure(figsize=(7.6, 4))
+        ax = fig.subplots()
+        ltx = str(mul).count("0")
+        dot = ""
+        if mul != 1:
+            dot = f" $\cdot 10^{ltx}$"
+        if v_min is None:
+            v_min = self.model.setv_min(density, mul)
+        if v_max is None:
+            v_max = self.model.setv_max(density, mul)
+        ax.set_yscale("log")
+        ax.set_xlabel(labels[0])
+        ax.set_ylabel("$\\tau$ /" + labels[1].split("/")[1])
+        pcm = ax.pcolormesh(
+            self.model.lambdas,
+            taus,
+            density.T * mul,
+            cmap="seismic",
+            norm=col.TwoSlopeNorm(vcenter=0, vmin=v_min, vmax=v_max),
+            shading="auto",
+        )
+        cb = fig.colorbar(pcm, ax=ax)
+        cb.set_ticks([v_min, 0, v_max])
+        cb.set_label(labels[2] + dot)
+        self.saveFigure(self.model.path + self.model.name + "_LDA")
+
+    def plotDSlices(self, time, spectra, mul, labels, add):
+        """
+        Plots a subplot of absorption change against wavelenghts for chosen
+        delays.
+
+        Parameters
+        ----------
+        time : list
+            Delays which should be plotted.
+        time_index : list
+            Indexes for the delays to be plotted.
+        spectra : np.array
+            Contains the values of the spectra.
+
+        Returns
+        -------
+        None.
+
+        """
+        fig = self.newFigure()
+        ax = fig.subplots()
+        time_index = self.model.findNearestIndex(time, self.model.delays)
+        ltx = str(mul).count("0")
+        unit = ""
+        if "/" in labels[1]:
+            unit = labels[1].split("/")[1]
+        dot = ""
+        if mul != 1:
+            dot = f" $\cdot 10^{ltx}$"
+        ax.set_ylabel(labels[2] + dot)
+        ax.set_xlabel(labels[0])
+        for i, ind in enumerate(time_index):
+            ax.plot(self.model.lambdas, spectra.T[ind], label=f"{time[i]} {unit}")
+        ax.tick_params(bottom=False)
+        ax.legend(loc="upper left", frameon=False, labelcolor="linecolor",
+                  handlelength=0)
+        temp = np.concatenate([spectra.T[i]
+                              for i in time_index])
+        ax.axis(
+            [
+                min(self.model.lambdas),
+                max(self.model.lambdas),
+                1.05 * min(temp),
+                1.05 * max(temp)
+            ]
+        )
+        ax.set_yticks(())
+        ax.axhline(0, color="black", lw=0.5, alpha=0.75)
+        self.saveFigure(self.model.path + self.model.name + "Delay_Slices")
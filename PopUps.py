@@ -1,5 +1,6 @@
 from PyQt5 import QtWidgets as QW
 from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QPixmap
 import numpy as np
 import TTIMG
 
@@ -122,3 +123,78 @@ class TextWindow(QW.QWidget):
         self.text_browser.clear()
         self.text_browser.append(self.Message)
         self.setWindowModality(Qt.ApplicationModal)
+
+
+class ProgressWindow(QW.QWidget):
+    def __init__(self, model):
+        super(QW.QWidget, self).__init__()
+        self.model = model
+        self.initUI()
+
+    def initUI(self):
+        if self.model == 0:
+            self.setWindowTitle('GLA running')
+        else:
+            self.setWindowTitle('GTA running')
+        self.status = QW.QLabel('Starting the fit...', self)
+        self.status.setMinimumWidth(350)
+        self.cancel = QW.QPushButton('Cancel', self)
+        self.layout = QW.QGridLayout()
+        self.layout.addWidget(self.status, 0, 0, 1, 2)
+        self.layout.addWidget(self.cancel, 1, 0, 1, 2)
+        self.setLayout(self.layout)
+
+    def updateProgress(self, iteration, chisqr, tau):
+        """
+        Displays the current state of the fit.
+
+        Parameters
+        ----------
+        iteration : int
+            The number of evaluations of the residuals.
+        chisqr : float
+            The current sum of the squared residuals.
+        tau : list
+            The current lifetimes.
+
+        Returns
+        -------
+        None.
+
+        """
+        taus = ", ".join(f"{value:.4g}" for value in tau)
+        self.status.setText(f"Iteration: {iteration}\n"
+                            f"χ²: {chisqr:.6g}\n"
+                            f"τ: {taus}")
+
+
+class FigureWindow(QW.QWidget):
+    def __init__(self, filename, job, renderer):
+        super(QW.QWidget, self).__init__()
+        self.filename = filename
+        self.job = job
+        self.renderer = renderer
+        self.initUI()
+
+    def initUI(self):
+        self.setWindowTitle(self.filename.split("/")[-1])
+        self.image = QW.QLabel(self)
+        self.image.setPixmap(QPixmap(self.filename))
+        self.interactive = QW.QPushButton('Open interactive plot', self)
+        self.interactive.clicked.connect(self.openInteractive)
+        self.layout = QW.QGridLayout()
+        self.layout.addWidget(self.image, 0, 0, 1, 2)
+        self.layout.addWidget(self.interactive, 1, 0, 1, 2)
+        self.setLayout(self.layout)
+
+    def openInteractive(self):
+        """
+        Draws the plot again as an interactive matplotlib figure, which can
+        be zoomed and modified.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.renderer.plotInteractive(self.job)
@@ -0,0 +1,169 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+
+def renderFigure(model, method, args, kwargs, formats):
+    """
+    Draws a plot of the model on its own Agg canvas and saves it in the
+    given formats. pyplot is not imported, so the worker processes share no
+    figure or backend state. Module level function, so that it can be run
+    in the worker processes.
+
+    Parameters
+    ----------
+    model : Model
+        The copy of the model, see Model.getWorkerCopy.
+    method : string
+        The name of the method of the Plotter, e.g. "plotHeat".
+    args : tuple
+        The arguments of the method.
+    kwargs : dict
+        The keyword arguments of the method.
+    formats : tuple
+        The file formats, e.g. "png", "svg" or "pdf".
+
+    Returns
+    -------
+    saved : list
+        The paths to the saved files.
+
+    """
+    plotter = model.getPlotter(formats)
+    getattr(plotter, method)(*args, **kwargs)
+    return plotter.saved
+
+
+class Renderer():
+    def __init__(self, workers=None, formats=("png",), callback=None):
+        """
+        Initiates the rendering of plots in background processes. The plots
+        are drawn on the non-interactive Agg canvas and saved, so that
+        the GUI is not blocked and the next fit does not have to wait for
+        the export. A plot can afterwards be opened interactively with
+        plotInteractive.
+
+        Parameters
+        ----------
+        workers : int, optional
+            The number of processes. The default is None, which uses half of
+            the cores, at least one.
+        formats : tuple, optional
+            The file formats of the plots, e.g. "png", "svg" or "pdf".
+            The default is ("png",).
+        callback : function, optional
+            Called with the concurrent.futures.Future of every plot when it
+            is saved or failed. Future.job holds the model, the method and
+            its arguments. It is called from a background thread.
+            The default is None, which prints the plots that failed.
+
+        Returns
+        -------
+        None.
+
+        """
+        if workers is None:
+            workers = max(1, (os.cpu_count() or 1) // 2)
+        self.workers = workers
+        self.formats = formats
+        self.callback = callback if callback is not None else self.reportFailure
+        self.executor = None
+
+    def getExecutor(self):
+        """
+        Starts the worker processes with the first plot. They are spawned
+        instead of forked, so that they do not inherit the GUI.
+
+        Returns
+        -------
+        executor : ProcessPoolExecutor
+            The pool of the worker processes.
+
+        """
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self.executor
+
+    def submit(self, model, method, *args, **kwargs):
+        """
+        Renders a plot of the model in the background. The model is copied,
+        so that it can be changed by the next fit.
+
+        Parameters
+        ----------
+        model : Model
+            The model whose data is plotted.
+        method : string
+            The name of the method of the Plotter, e.g. "plotHeat".
+        *args, **kwargs
+            The arguments of the method.
+
+        Returns
+        -------
+        future : concurrent.futures.Future
+            The future of the paths to the saved files.
+
+        """
+        model = model.getWorkerCopy()
+        future = self.getExecutor().submit(renderFigure, model, method, args,
+                                           kwargs, self.formats)
+        future.job = (model, method, args, kwargs)
+        future.add_done_callback(self.callback)
+        return future
+
+    def reportFailure(self, future):
+        """
+        Prints why a plot could not be rendered or saved, the default
+        callback without a GUI.
+
+        Parameters
+        ----------
+        future : concurrent.futures.Future
+            The future of the plot, see submit.
+
+        Returns
+        -------
+        None.
+
+        """
+        if future.cancelled() or future.exception() is None:
+            return
+        print(f"Warning: the plot {future.job[1]} of {future.job[0].name} "
+              f"could not be saved: {future.exception()!r}")
+
+    def plotInteractive(self, job):
+        """
+        Draws a rendered plot again in this process, where it is shown
+        interactively.
+
+        Parameters
+        ----------
+        job : tuple
+            The model, the method and its arguments, see Future.job.
+
+        Returns
+        -------
+        None.
+
+        """
+        model, method, args, kwargs = job
+        getattr(model.getPlotter(interactive=True), method)(*args, **kwargs)
+
+    def shutdown(self, wait=False):
+        """
+        Stops the worker processes after the submitted plots are saved.
+
+        Parameters
+        ----------
+        wait : bool, optional
+            If True, waits until the plots are saved. The default is False.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.executor is not None:
+            self.executor.shutdown(wait=wait)
+            self.executor = None
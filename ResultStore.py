@@ -0,0 +1,154 @@
+import json
+import os
+import zipfile
+import numpy as np
+
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+
+class ResultStore():
+    def __init__(self, filename, backend=None):
+        """
+        Initiates the container of the results of a data set. Every analysis
+        is saved as a new run, a group holding its arrays and metadata. If
+        h5py is installed, the container is a chunked and compressed HDF5
+        file, otherwise a compressed *.npz archive.
+
+        Parameters
+        ----------
+        filename : string
+            The path and name of the container without the ending.
+        backend : string, optional
+            "hdf5" or "npz". The default is None, which uses HDF5 if h5py
+            is installed.
+
+        Returns
+        -------
+        None.
+
+        """
+        if backend is None:
+            backend = "hdf5" if h5py is not None else "npz"
+        if backend == "hdf5" and h5py is None:
+            raise ImportError("Saving HDF5 results requires h5py, "
+                              "use the npz backend instead.")
+        self.backend = backend
+        self.filename = filename + (".h5" if backend == "hdf5" else ".npz")
+
+    def listRuns(self):
+        """
+        Lists the runs of the container.
+
+        Returns
+        -------
+        runs : list
+            The names of the runs in the order they were saved.
+
+        """
+        if not os.path.isfile(self.filename):
+            return []
+        if self.backend == "hdf5":
+            with h5py.File(self.filename, "r") as f:
+                return sorted(f.keys(), key=lambda run: int(run.split("_")[-1]))
+        with zipfile.ZipFile(self.filename) as f:
+            runs = {name.split("/")[0] for name in f.namelist()}
+        return sorted(runs, key=lambda run: int(run.split("_")[-1]))
+
+    def addRun(self, kind, arrays, metadata):
+        """
+        Saves the arrays and metadata of an analysis as a new run, named
+        after the kind of the analysis and the number of the run,
+        e.g. "GLA_003".
+
+        Parameters
+        ----------
+        kind : string
+            The kind of the analysis, e.g. "GLA", "GTA" or "LDA".
+        arrays : dict
+            The names and values of the arrays.
+        metadata : dict
+            Further results and settings, which can be written as JSON,
+            e.g. the fitted lifetimes, the bounds and the fit report.
+
+        Returns
+        -------
+        run : string
+            The name of the run.
+
+        """
+        run = f"{kind}_{len(self.listRuns()) + 1:03d}"
+        text = json.dumps(metadata, default=self.toJSON)
+        if self.backend == "hdf5":
+            with h5py.File(self.filename, "a") as f:
+                group = f.create_group(run)
+                for key, value in arrays.items():
+                    value = np.asarray(value)
+                    if value.ndim > 0 and value.size > 1:
+                        group.create_dataset(key, data=value, chunks=True,
+                                             compression="gzip",
+                                             compression_opts=4, shuffle=True)
+                    else:
+                        group.create_dataset(key, data=value)
+                group.attrs["metadata"] = text
+        else:
+            with zipfile.ZipFile(self.filename, "a", zipfile.ZIP_DEFLATED,
+                                 compresslevel=1) as f:
+                for key, value in list(arrays.items()) + [("metadata", text)]:
+                    with f.open(f"{run}/{key}.npy", "w", force_zip64=True) as entry:
+                        np.lib.format.write_array(entry, np.asarray(value),
+                                                  allow_pickle=False)
+        return run
+
+    def loadRun(self, run=None):
+        """
+        Loads the arrays and metadata of a run.
+
+        Parameters
+        ----------
+        run : string, optional
+            The name of the run. The default is None, which loads the last
+            run.
+
+        Returns
+        -------
+        arrays : dict
+            The names and values of the arrays.
+        metadata : dict
+            The metadata of the run.
+
+        """
+        if run is None:
+            run = self.listRuns()[-1]
+        if self.backend == "hdf5":
+            with h5py.File(self.filename, "r") as f:
+                group = f[run]
+                arrays = {key: group[key][()] for key in group}
+                text = group.attrs["metadata"]
+        else:
+            with np.load(self.filename) as f:
+                arrays = {key.split("/", 1)[1]: f[key] for key in f.files
+                          if key.startswith(run + "/")}
+            text = arrays.pop("metadata").item()
+        return arrays, json.loads(text)
+
+    def toJSON(self, value):
+        """
+        Converts numpy values of the metadata, which json cannot write.
+
+        Parameters
+        ----------
+        value : object
+            The value.
+
+        Returns
+        -------
+        value : list, float, string
+            The converted value.
+
+        """
+        if isinstance(value, (np.ndarray, np.generic)):
+            return value.tolist()
+        return str(value)
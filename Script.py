@@ -51,6 +51,40 @@ opt_method = 'Nelder-Mead'
 # 'SLSQP' 'trust-constr' 'ampgo' 'basinhopping'
 
 # !'Newton-CG' 'dogleg' 'trust-ncg' 'trust-exact' 'trust-krylov' DO NOT WORK!
+# Variable projection: the amplitudes are eliminated by a QR solve in every
+# iteration. With 'least_squares' or 'leastsq' an analytic Jacobian is used.
+varpro = False
+# Fit against the spectra compressed to the first singular vectors:
+# None for the full spectra, an int for a fixed number or "auto".
+svd_rank = None
+# Gaussian instrument response function as [(FWHM, vary), (t0, vary)].
+# The model functions are convolved with it, so the delays around time zero
+# can be included in the fit. None for no IRF.
+irf = None
+# Chirp fitted in the model as the curve fit parameters [a1, a2, a3] of the
+# chirp correction (see the line "Chirp (a1, a2, a3)" of *_results.txt).
+# None for no chirp.
+chirp = None
+# Record every iteration of the fit and the time spent in its stages, saved as
+# *_trace.json and *_trace.csv next to the results, together with the hits and
+# misses of the cache of the matrices (GTA only).
+trace = False
+# GTA only: number of starting lifetimes sampled log-uniformly within the bounds
+# of the lifetimes (multi-start). The best fit is refined and all solutions are
+# saved as *_GTA_multistart.txt. None for a single start from GTA_tau_guess.
+n_starts = None
+# Number of processes running the starts, None for all cores.
+start_workers = None
+# Confidence intervals of the fitted lifetimes, saved as *_confidence.txt next
+# to the results: number of refitted bootstrap samples (0 for none) and/or the
+# profile likelihood of every lifetime. The refits start from the best fit.
+n_bootstrap = 0
+profile = False
+# Number of processes running the refits, None for all cores.
+ci_workers = None
+# The arrays of every analysis are saved as a run of *_results.h5 (*_results.npz
+# without h5py). True also saves them as *.txt files like before.
+text_export = False
 
 """Settings for Global Lifetime Analysis"""
 
@@ -80,6 +114,7 @@ M = [[-4001, 300, 0],
 ivp_method = "BDF"
 # Options:
 # 'RK45' 'RK23' 'DOP853' 'Radau' 'BDF' 'LSODA'
+# 'analytic' (closed-form solution via the matrix exponential, fastest)
 
 """Settings for the 3-in-1 plots of the original and the fitted data"""
 
@@ -105,6 +140,7 @@ mul = 1000
 """Program"""
 
 Controller = Controller.Controller(path)
+Controller.text_export = text_export
 wavelength_slices.sort()
 delay_slices.sort()
 if model == "custom matrix":
@@ -126,7 +162,9 @@ if model == 0:
     start = stopwatch.time()
     if fit != 0:
         tau_fit, spec, res, D_fit, fit_report = Controller.calcDAS(
-            [GLA_tau_fix, GLA_tau_guess], d_bounds, w_bounds, opt_method)
+            [GLA_tau_fix, GLA_tau_guess], d_bounds, w_bounds, opt_method,
+            varpro=varpro, svd_rank=svd_rank, irf=irf, chirp=chirp, trace=trace,
+            n_bootstrap=n_bootstrap, profile=profile, ci_workers=ci_workers)
     print("runtime GLA:", stopwatch.time()-start)
     if fit == 1:
         print(fit_report)
@@ -145,7 +183,10 @@ else:
         tau_fit, spec, res, D_fit,fit_report = Controller.calcSAS(GTA_tau, c0, d_bounds,
                                                        w_bounds, model,
                                                        GTA_tau_lb, GTA_tau_ub,
-                                                       opt_method, ivp_method)
+                                                       opt_method, ivp_method,
+                                                       varpro=varpro, svd_rank=svd_rank, irf=irf, chirp=chirp, trace=trace,
+                                                       n_starts=n_starts, start_workers=start_workers,
+                                                       n_bootstrap=n_bootstrap, profile=profile, ci_workers=ci_workers)
         print("runtime GTA:", stopwatch.time()-start)
     if fit == 1:
         if model != "custom matrix":
@@ -26,6 +26,16 @@ class Test_init(TestClassModel):
     def test_values_lambdas(self):
         assert self.con.lambdas_filename == self.lambdas_filename
         
+class Test_getDataset(TestClassModel):
+    def setup(self):
+        self.dataset = self.con.getDataset()
+
+    def test_shared(self):
+        assert self.con.getDataset() is self.dataset
+
+    def test_readonly(self):
+        assert self.dataset.getValues(self.con.spectra_filename).flags.writeable is False
+
 class Test_calcDAS(TestClassModel):
     def setup(self):
         preparam = [(1.2,True),(160,True),(900000,False)]
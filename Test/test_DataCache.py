@@ -0,0 +1,35 @@
+import pytest as pt
+from DataCache import DataCache
+import numpy as np
+import tempfile
+import os
+
+
+class TestClassDataCache:
+
+    folder = tempfile.mkdtemp()
+    filename = os.path.join(folder, "test_taspectra.txt")
+    values = np.arange(12, dtype="float64").reshape(3, 4)
+
+
+class Test_load(TestClassDataCache):
+    def setup_method(self):
+        np.savetxt(self.filename, self.values)
+        self.cache = DataCache()
+        self.first = self.cache.load(self.filename)
+        self.second = self.cache.load(self.filename)
+
+    def test_type(self):
+        assert [type(self.first), type(self.second)] == [np.ndarray, np.ndarray]
+
+    def test_values(self):
+        assert self.second == pt.approx(self.values)
+
+    def test_cached(self):
+        assert os.path.isfile(self.cache.getCachePath(self.filename))
+
+    def test_modified(self):
+        np.savetxt(self.filename, 2 * self.values)
+        assert self.cache.load(self.filename) == pt.approx(2 * self.values)
+        assert len(os.listdir(os.path.dirname(
+            self.cache.getCachePath(self.filename)))) == 1
@@ -0,0 +1,24 @@
+import pytest as pt
+from Dataset import Dataset
+import numpy as np
+
+
+class Test_fromArrays(object):
+    def setup_method(self):
+        self.delays = np.linspace(-1, 10, 12)
+        self.lambdas = np.linspace(400, 500, 5)
+        self.spectra = np.arange(60.0).reshape(5, 12)
+        self.filenames = ("data/x_delays.txt", "data/x_taspectra.txt",
+                          "data/x_lambda.txt")
+        self.dataset = Dataset.fromArrays(*self.filenames, self.delays,
+                                          self.spectra, self.lambdas)
+
+    def test_values(self):
+        assert self.dataset.filenames == self.filenames
+        spectra = self.dataset.getValues(self.filenames[1])
+        assert spectra == pt.approx(self.spectra)
+        assert spectra is not self.spectra
+
+    def test_readonly(self):
+        for filename in self.filenames:
+            assert self.dataset.getValues(filename).flags.writeable is False
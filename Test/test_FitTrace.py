@@ -0,0 +1,53 @@
+import pytest as pt
+from FitTrace import FitTrace
+import tempfile
+import json
+import csv
+import os
+
+
+class TestClassFitTrace:
+
+    folder = tempfile.mkdtemp()
+    filename = os.path.join(folder, "test_GLA")
+
+
+class Test_record(TestClassFitTrace):
+    def setup_method(self):
+        self.trace = FitTrace()
+        for i in range(3):
+            with self.trace.stage("getM"):
+                pass
+            with self.trace.stage("residual"):
+                pass
+            self.trace.record(i + 1, 10.0 / (i + 1), {"tau0": 1.0 + i})
+
+    def test_records(self):
+        assert [rec["iteration"] for rec in self.trace.records] == [1, 2, 3]
+        assert list(self.trace.records[0]["stages"]) == ["getM", "residual"]
+
+    def test_summary(self):
+        summary = self.trace.getSummary()
+        assert summary["evaluations"] == 3
+        assert summary["best_chisqr"] == pt.approx(10.0 / 3)
+        assert summary["stages"]["getM"]["calls"] == 3
+
+
+class Test_save(TestClassFitTrace):
+    def setup_method(self):
+        self.trace = FitTrace()
+        with self.trace.stage("getM"):
+            pass
+        self.trace.record(1, 2.0, {"tau0": 1.0, "tau1": 10.0})
+        self.trace.save(self.filename)
+
+    def test_json(self):
+        with open(self.filename + "_trace.json") as f:
+            content = json.load(f)
+        assert content["records"][0]["params"] == {"tau0": 1.0, "tau1": 10.0}
+
+    def test_csv(self):
+        with open(self.filename + "_trace.csv") as f:
+            rows = list(csv.reader(f))
+        assert rows[0] == ["iteration", "time", "dt", "chisqr", "tau0", "tau1", "t_getM"]
+        assert len(rows) == 2
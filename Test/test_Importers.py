@@ -0,0 +1,27 @@
+import pytest as pt
+from Importers import RichertMatrixImport
+import numpy as np
+import tempfile
+import os
+
+
+class Test_readMatrix:
+    def setup_method(self):
+        self.folder = tempfile.mkdtemp()
+
+    def write(self, text):
+        path = os.path.join(self.folder, "test_matrix.txt")
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_values(self):
+        path = self.write("0 400 500\n0.1 1 2\n0.2 nan inf\n")
+        data = RichertMatrixImport(path, chunk_size=8).readMatrix()
+        assert data == pt.approx(np.genfromtxt(path, delimiter=" "), nan_ok=True)
+
+    def test_spaces(self):
+        path = self.write(" 0  400 500 \n0.1  1 2\n0.2  3 4\n")
+        data = RichertMatrixImport(path).readMatrix()
+        assert data.shape == (3, 4)
+        assert data == pt.approx(np.genfromtxt(path, delimiter=" "), nan_ok=True)
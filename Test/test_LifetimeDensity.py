@@ -0,0 +1,90 @@
+import pytest as pt
+from Model import Model
+from LifetimeDensity import LifetimeDensity
+import numpy as np
+import tempfile
+import os
+
+
+class TestClassLifetimeDensity:
+
+    folder = tempfile.mkdtemp()
+    delays_filename = os.path.join(folder, "test_delays.txt")
+    spectra_filename = os.path.join(folder, "test_taspectra.txt")
+    lambdas_filename = os.path.join(folder, "test_lambda.txt")
+    d_limits = [None, None]
+    l_limits = [None, None]
+
+    def createModel(self):
+        delays = np.geomspace(0.1, 1000, 80)
+        lambdas = np.linspace(400, 700, 30)
+        rng = np.random.default_rng(0)
+        amplitudes = rng.normal(size=(30, 2))
+        spectra = amplitudes @ np.exp(-delays[None, :] / np.array([[2.0], [150.0]]))
+        spectra += 1e-3 * rng.normal(size=spectra.shape)
+        np.savetxt(self.delays_filename, delays)
+        np.savetxt(self.lambdas_filename, lambdas)
+        np.savetxt(self.spectra_filename, spectra)
+        return Model(
+            self.delays_filename,
+            self.spectra_filename,
+            self.lambdas_filename,
+            self.d_limits,
+            self.l_limits,
+            0,
+            None,
+            None
+        )
+
+
+class Test_scanAlpha(TestClassLifetimeDensity):
+    def setup_method(self):
+        mod = self.createModel()
+        self.lda = LifetimeDensity(mod, n_tau=50)
+        self.scan = self.lda.scanAlpha(np.geomspace(1e-3, 1, 20))
+        self.alpha = self.lda.findAlpha("gcv")
+
+    def test_shape(self):
+        assert len(self.scan["rss"]) == 20
+        assert len(self.lda.taus) == 50
+
+    def test_values(self):
+        assert np.all(np.diff(self.scan["rss"]) >= 0)
+        assert np.all(np.diff(self.scan["norm"]) <= 0)
+        assert self.scan["alpha"][0] <= self.alpha
+
+
+class Test_calcTikhonov(TestClassLifetimeDensity):
+    def setup_method(self):
+        self.mod = self.createModel()
+        self.lda = LifetimeDensity(self.mod, n_tau=50)
+        self.D = self.lda.calcTikhonov(0.1)
+
+    def test_shape(self):
+        assert self.D.shape == (len(self.mod.lambdas), 50)
+
+    def test_values(self):
+        M = self.lda.M
+        D = np.linalg.solve(M @ M.T + 0.1**2 * np.eye(50), M @ self.mod.spectra.T).T
+        assert self.D == pt.approx(D, rel=1e-6, abs=1e-9)
+
+
+class Test_calcElasticNet(TestClassLifetimeDensity):
+    def setup_method(self):
+        self.mod = self.createModel()
+        # more lifetimes than delays, so that the basis has a null space
+        self.lda = LifetimeDensity(self.mod, n_tau=len(self.mod.delays) + 50)
+        self.alpha = 10 * self.lda.findAlpha("gcv")
+        self.D = self.lda.calcElasticNet(self.alpha, 0.5, max_iter=5000, tol=1e-8)
+
+    def test_shape(self):
+        assert self.D.shape == (len(self.mod.lambdas), len(self.mod.delays) + 50)
+
+    def test_kkt(self):
+        lam_1 = 0.5 * self.alpha**2
+        lam_2 = 0.5 * self.alpha**2
+        M = self.lda.M
+        G = (self.D @ M - self.mod.spectra) @ M.T + lam_2 * self.D
+        kkt = np.where(self.D != 0, np.abs(G + lam_1 * np.sign(self.D)),
+                       np.maximum(np.abs(G) - lam_1, 0))
+        assert np.max(kkt) <= 1e-2 * lam_1
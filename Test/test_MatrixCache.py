@@ -0,0 +1,59 @@
+import pytest as pt
+from MatrixCache import MatrixCache
+import numpy as np
+
+
+class Test_get(object):
+    def setup_method(self):
+        self.cache = MatrixCache(max_entries=2, digits=6)
+        self.key = self.cache.getKey([1.0, 10.0], [0.1, 0.0], False)
+        self.cache.put(self.key, (np.ones((2, 3)), np.zeros((4, 2))))
+
+    def test_hit(self):
+        key = self.cache.getKey([1.0 + 1e-9, 10.0], [0.1, 0.0], False)
+        assert key == self.key
+        M, D = self.cache.get(key)
+        assert M == pt.approx(np.ones((2, 3)))
+        assert self.cache.hits == 1
+
+    def test_miss(self):
+        assert self.cache.get(self.cache.getKey([1.0, 10.0], None, False)) is None
+        assert self.cache.get(self.cache.getKey([1.001, 10.0], [0.1, 0.0], False)) is None
+        assert self.cache.misses == 2
+
+
+class Test_put(object):
+    def setup_method(self):
+        self.cache = MatrixCache(max_entries=2, max_bytes=1000)
+        self.keys = [self.cache.getKey([tau]) for tau in (1.0, 2.0, 3.0)]
+        self.cache.put(self.keys[0], np.ones(10))
+        self.cache.put(self.keys[1], np.ones(10))
+        self.cache.get(self.keys[0])
+        self.cache.put(self.keys[2], np.ones(10))
+
+    def test_lru(self):
+        assert list(self.cache.entries) == [self.keys[0], self.keys[2]]
+        assert self.cache.nbytes == 160
+
+    def test_bytes(self):
+        self.cache.put(self.cache.getKey([4.0]), np.ones(100))
+        assert self.cache.nbytes <= 1000
+        self.cache.put(self.cache.getKey([5.0]), np.ones(1000))
+        assert self.cache.getKey([5.0]) not in self.cache.entries
+
+
+class Test_getKey(object):
+    def setup_method(self):
+        self.cache = MatrixCache()
+
+    def test_settings(self):
+        key = self.cache.getKey([1.0, 10.0], None, False, 1, "BDF")
+        assert key != self.cache.getKey([1.0, 10.0], None, False, 1, "RK45")
+        assert key != self.cache.getKey([1.0, 10.0], None, False, 2, "BDF")
+
+    def test_array(self):
+        M_ones = np.array([[0, 1], [0, 0]])
+        key = self.cache.getKey([1.0], M_ones)
+        assert key == self.cache.getKey([1.0], M_ones.copy())
+        assert key != self.cache.getKey([1.0], M_ones.T)
+        hash(key)
@@ -2,6 +2,9 @@ import pytest as pt
 from Model import Model
 import numpy as np
 from models import Models
+from lmfit import Parameters
+import tempfile
+import os
 
 class TestClassModel:
 
@@ -12,6 +15,42 @@ class TestClassModel:
     l_limits = [None, None]
 
 
+class TestClassSynthetic:
+
+    folder = tempfile.mkdtemp()
+    delays_filename = os.path.join(folder, "test_delays.txt")
+    spectra_filename = os.path.join(folder, "test_taspectra.txt")
+    lambdas_filename = os.path.join(folder, "test_lambda.txt")
+    d_limits = [None, None]
+    l_limits = [None, None]
+    opt_method = "least_squares"
+    ivp_method = "BDF"
+
+    def createModel(self, model, ivp_method=None, **kwargs):
+        delays = np.geomspace(0.1, 2000, 60)
+        lambdas = np.linspace(400, 700, 40)
+        rng = np.random.default_rng(0)
+        E_tau = np.exp(-np.outer(1 / np.array([1.2, 106.0]), delays))
+        spectra = rng.normal(size=(40, 2)) @ E_tau
+        spectra += 1e-3 * rng.normal(size=spectra.shape)
+        np.savetxt(self.delays_filename, delays)
+        np.savetxt(self.lambdas_filename, lambdas)
+        np.savetxt(self.spectra_filename, spectra)
+        if ivp_method is None:
+            ivp_method = self.ivp_method
+        return Model(
+            self.delays_filename,
+            self.spectra_filename,
+            self.lambdas_filename,
+            self.d_limits,
+            self.l_limits,
+            model,
+            self.opt_method,
+            ivp_method,
+            **kwargs
+        )
+
+
 class Test_init(TestClassModel):
     def setup(self):
         model = 0
@@ -60,6 +99,24 @@ class Test_init(TestClassModel):
         assert values == pt.approx(test_values)
 
 
+class Test_compressSpectra(TestClassSynthetic):
+    def setup_method(self):
+        self.mod = self.createModel(0)
+        self.rank = self.mod.compressSpectra(4)
+
+    def test_shape(self):
+        assert self.mod.fit_spectra.shape == (4, len(self.mod.delays))
+        assert self.mod.spectra.shape == (len(self.mod.lambdas),
+                                       len(self.mod.delays))
+
+    def test_values(self):
+        s = np.linalg.svd(self.mod.spectra, compute_uv=False)
+        assert np.linalg.svd(self.mod.fit_spectra, compute_uv=False) == pt.approx(s[:4])
+
+    def test_min_rank(self):
+        assert self.mod.compressSpectra(1, min_rank=3) == 3
+
+
 class Test_genE_tau(TestClassModel):
     def setup(self):
         model = 0
@@ -87,6 +144,81 @@ class Test_genE_tau(TestClassModel):
             [0.93127562, 0.92416314, 0.91637159, 0.90785858, 0.89852567])
 
 
+class Test_genE_tauBuffer(TestClassSynthetic):
+    def setup_method(self):
+        self.mod = self.createModel(0, dtype="float32")
+        self.tau = [1.2, 150, 900000]
+        self.buffer = self.mod.getBuffer(len(self.tau))
+        self.E_tau = self.mod.genE_tau(self.tau, out=self.buffer)
+
+    def test_inplace(self):
+        assert self.E_tau is self.buffer
+        assert self.mod.getBuffer(len(self.tau)) is self.buffer
+
+    def test_type(self):
+        assert self.E_tau.dtype == np.float32
+
+    def test_values(self):
+        E_tau = np.exp(-np.outer(1 / np.array(self.tau), self.mod.delays))
+        assert self.E_tau == pt.approx(E_tau, rel=1e-6)
+
+
+class Test_calcIRFExp(TestClassSynthetic):
+    def setup_method(self):
+        self.mod = self.createModel(0)
+        self.mod.setIRF([(0.1, True), (0.0, True)])
+        self.sigma = self.mod.getSigma()
+
+    def test_step(self):
+        E = self.mod.calcIRFExp(0.0, np.array([-1.0, 0.0, 1.0]))
+        assert E == pt.approx([0, 0.5, 1])
+
+    def test_late(self):
+        t = np.array([2.0, 10.0, 100.0])
+        E = self.mod.calcIRFExp(0.5, t)
+        assert E == pt.approx(np.exp(-0.5 * t + (0.5 * self.sigma)**2 / 2))
+
+    def test_shape(self):
+        E_tau = self.mod.genE_tau([1.2, 150, 900000])
+        assert E_tau.shape == (3, len(self.mod.delays))
+
+    def test_solveDiff(self):
+        self.mod.model = 1
+        self.mod.getK([1.2, 150, 900000])
+        self.mod.setInitialConcentrations([])
+        C_t = self.mod.solveDiff("analytic")
+        assert C_t == pt.approx(self.mod.solveDiff("BDF"), abs=1e-3)
+
+
+class Test_setChirp(TestClassSynthetic):
+    def setup_method(self):
+        self.mod = self.createModel(0)
+        self.mod.setChirp([0.1, 0.0, 0.0])
+
+    def test_shape(self):
+        E_tau = self.mod.genE_tau([1.2, 150, 900000])
+        assert E_tau.shape == (len(self.mod.lambdas), 3,
+                               len(self.mod.delays))
+
+    def test_shift(self):
+        E_tau = self.mod.genE_tau([1.2])
+        delays = self.mod.delays - 0.1
+        assert E_tau[0, 0] == pt.approx(np.exp(-delays / 1.2) * (delays >= 0))
+
+    def test_solveDiff(self):
+        self.mod.model = 1
+        self.mod.getK([1.2, 150, 900000])
+        self.mod.setInitialConcentrations([])
+        C_t = self.mod.solveDiff("analytic")
+        assert C_t == pt.approx(self.mod.solveDiff("BDF"), abs=1e-3)
+
+    def test_lateOnset(self):
+        self.mod.setChirp([2 * np.max(self.mod.delays), 0.0, 0.0])
+        M = self.mod.genE_tau([1.2, 150])
+        D = self.mod.calcD_chirp(M, self.mod.spectra)
+        assert D == pt.approx(np.zeros((len(self.mod.lambdas), 2)))
+
+
 class Test_setInitialConcentrations(TestClassModel):
     def setup(self):
         model = 1
@@ -174,6 +306,29 @@ class Test_solveDiff(TestClassModel):
         assert self.C_t[1,40:43] == pt.approx(np.array([0.87884498, 0.86658069,
                                                         0.85193718]))
         
+class Test_solveDiffAnalytic(TestClassSynthetic):
+    def setup_method(self):
+        self.mod = self.createModel(1, "analytic")
+        self.mod.K = np.array([[-8.3e-01,  0.0e+00,  0.0e+00],
+                               [8.3e-01, -2.5e-02,  0.0e+00],
+                               [0.0e+00,  2.5e-02, -1.1e-06]])
+        self.mod.C_0 = np.array([1, 0, 0])
+        self.C_t = self.mod.solveDiff("analytic")
+        self.C_ivp = self.mod.solveDiff("BDF")
+
+    def test_shape(self):
+        assert self.C_t.shape == (3, len(self.mod.delays))
+
+    def test_values(self):
+        assert self.C_t == pt.approx(self.C_ivp, abs=1e-3)
+
+    def test_degenerate(self):
+        self.mod.K = np.array([[-0.5, 0.0, 0.0],
+                               [0.5, -0.5, 0.0],
+                               [0.0, 0.5, -0.5]])
+        C_t = self.mod.solveDiff("analytic")
+        assert C_t == pt.approx(self.mod.solveDiff("Radau"), abs=1e-3)
+
 class Test_getK(TestClassModel):
     def setup(self):
         model = 1
@@ -364,6 +519,52 @@ class Test_getDifference(TestClassModel):
     def test_values(self):
         assert self.Chi == 1.4805668823781104
         
+class Test_getProjectedDifference(TestClassSynthetic):
+    def setup_method(self):
+        self.mod = self.createModel(0, varpro=True)
+        self.params = Parameters()
+        for i, tau in enumerate([1.2, 150, 900000]):
+            self.params.add('tau' + str(i), tau, vary=(i != 2))
+        self.Diff = self.mod.getProjectedDifference(self.params)
+
+    def test_shape(self):
+        assert self.Diff.shape == self.mod.spectra.shape
+
+    def test_values(self):
+        assert self.Diff == pt.approx(self.mod.getDifference(self.params))
+
+    def test_jacobian(self):
+        jac = self.mod.getProjectedJacobian(self.params, kaufman=False)
+        step = 1e-6 * 150
+        self.params['tau1'].value += step
+        diff_step = self.mod.getProjectedDifference(self.params)
+        assert jac.shape == (self.mod.spectra.size, 2)
+        assert jac[:, 1] == pt.approx(((diff_step - self.Diff) / step).ravel(),
+                                      rel=1e-3, abs=1e-8)
+
+class Test_getGradient(TestClassSynthetic):
+    def setup_method(self):
+        self.mod = self.createModel(0)
+        self.params = Parameters()
+        for i, tau in enumerate([1.2, 150, 900000]):
+            self.params.add('tau' + str(i), tau, vary=(i != 2))
+        self.grad = self.mod.getGradient(self.params)
+
+    def test_shape(self):
+        assert self.grad.shape == (2,)
+
+    def test_values(self):
+        chi = np.sum(self.mod.getDifference(self.params)**2)
+        step = 1e-6 * 1.2
+        self.params['tau0'].value += step
+        chi_step = np.sum(self.mod.getDifference(self.params)**2)
+        assert self.grad[0] == pt.approx((chi_step - chi) / step, rel=1e-3)
+
+    def test_kws(self):
+        assert list(self.mod.getJacobianKws("BFGS")) == ["jac"]
+        assert list(self.mod.getJacobianKws("least_squares")) == ["Dfun"]
+        assert self.mod.getJacobianKws("Nelder-Mead") == {}
+
 class Test_findx_fit(TestClassModel):
     def setup(self):
         model = 0
@@ -390,6 +591,63 @@ class Test_findx_fit(TestClassModel):
     def test_values(self):
         assert self.x_fit == pt.approx([13, 588, 900000])
         
+class Test_setIterCallback(TestClassSynthetic):
+    def setup_method(self):
+        self.mod = self.createModel(0)
+        self.progress = []
+        self.mod.setIterCallback(self.report)
+        self.mod.M = self.mod.getM([1.2, 106])
+        self.tau_fit, fit_rep = self.mod.findTau_fit([(1.2, True), (106, True)],
+                                                    "least_squares")
+
+    def report(self, iteration, chisqr, tau):
+        self.progress.append((iteration, chisqr, tau))
+        return iteration >= 3
+
+    def test_progress(self):
+        assert [entry[0] for entry in self.progress] == [1, 2, 3]
+        assert len(self.progress[0][2]) == 2
+
+    def test_aborted(self):
+        assert self.mod.aborted is True
+
+class Test_sampleStarts(TestClassSynthetic):
+    def setup_method(self):
+        self.mod = self.createModel(1)
+        self.mod.setMultiStart(5, workers=1, span=10, seed=0)
+        params = Parameters()
+        params.add("tau0", 1.2, min=0.5, max=100)
+        params.add("tau1", 106, min=0.01, max=np.inf)
+        params.add("tau2", 900000, vary=False)
+        self.starts = self.mod.sampleStarts(params, 5)
+
+    def test_shape(self):
+        assert len(self.starts) == 5
+
+    def test_values(self):
+        assert self.starts[0]["tau0"].value == pt.approx(1.2)
+        for start in self.starts:
+            assert 0.5 <= start["tau0"].value <= 12
+            assert 10.6 <= start["tau1"].value <= 1060
+            assert start["tau2"].value == 900000
+
+class Test_calcConfidence(TestClassSynthetic):
+    def setup_method(self):
+        self.mod = self.createModel(0)
+        self.mod.M = self.mod.getM([1.2, 106])
+        self.mod.findTau_fit([(1.2, True), (106, True)], "least_squares")
+        self.confidence = self.mod.calcConfidence("least_squares", n_bootstrap=4,
+                                                  profile=True, workers=1, seed=0)
+
+    def test_shape(self):
+        assert list(self.confidence) == ["tau0", "tau1"]
+        assert self.mod.bootstrap.shape == (4 - self.mod.bootstrap_failed, 2)
+
+    def test_values(self):
+        for values in self.confidence.values():
+            assert values["boot_low"] <= values["boot_high"]
+            assert values["profile_low"] < values["value"] < values["profile_high"]
+
 class Test_calcD_fit(TestClassModel):
     def setup(self):
         model = 0
@@ -543,6 +801,17 @@ class Test_FindNearestIndex(TestClassModel):
         
     def test_values(self):
         assert self.index == [1]
+
+class Test_getPlotter(TestClassSynthetic):
+    def setup_method(self):
+        self.mod = self.createModel(0)
+        self.plotter = self.mod.getPlotter()
+
+    def test_model(self):
+        assert self.plotter.model is self.mod
+
+    def test_values(self):
+        assert self.plotter.model.lambdas is self.mod.lambdas
         
 # class Test_plot1(TestClassModel):
 #     def setup(self):
@@ -561,7 +830,7 @@ class Test_FindNearestIndex(TestClassModel):
 #             figsize=(2.5, 3), constrained_layout=False, dpi=100, frameon=True
 #         )
 #         self.grid = plt.GridSpec(1, 3, wspace=0, width_ratios=[1.0, 0, 0])
-#         self.mod.plot1(self.grid, wave, wave_index, self.mod.spectra)
+#         self.mod.getPlotter().plot1(self.grid, wave, wave_index, self.mod.spectra)
 #         plt.suptitle(self.mod.name + "_test")
 #         plt.close(fig)
         
@@ -0,0 +1,55 @@
+import pytest as pt
+from Controller import Controller
+from Renderer import Renderer
+import os
+import tempfile
+import numpy as np
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+
+class Test_submit:
+    def setup_method(self):
+        path = tempfile.mkdtemp()
+        rng = np.random.default_rng(0)
+        np.savetxt(f"{path}/test_delays.txt", np.geomspace(0.1, 1000, 40))
+        np.savetxt(f"{path}/test_lambda.txt", np.linspace(400, 700, 20))
+        np.savetxt(f"{path}/test_taspectra.txt", rng.normal(size=(20, 40)))
+        self.con = Controller(path)
+        self.con.labels = ["wavelength / nm", "delay / ps", "absorption change"]
+        self.con.createOrigData([None, None], [None, None], None, None)
+        self.con.renderer = Renderer(workers=1, formats=("png", "svg", "pdf"))
+        self.future = self.con.renderer.submit(self.con.origData, "plotHeat",
+                                               [], [], None, None,
+                                               self.con.origData.spectra, 20, 1,
+                                               self.con.labels, add="_Renderer")
+        self.con.renderer.shutdown(wait=True)
+
+    def test_saved(self):
+        saved = self.future.result()
+        assert [filename.split(".")[-1] for filename in saved] == ["png", "svg", "pdf"]
+        assert all(os.path.isfile(filename) for filename in saved)
+
+    def test_job(self):
+        model, method, args, kwargs = self.future.job
+        assert method == "plotHeat"
+        assert kwargs == {"add": "_Renderer"}
+        assert model.iter_cb is None
+        assert model.spectra is self.con.origData.spectra
+
+
+class Test_reportFailure:
+    def setup_method(self):
+        self.renderer = Renderer(workers=1)
+        self.future = Future()
+        self.future.job = (SimpleNamespace(name="test"), "plotHeat", (), {})
+
+    def test_failed(self, capsys):
+        self.future.set_exception(RuntimeError("latex could not be found"))
+        self.renderer.callback(self.future)
+        assert "plotHeat of test could not be saved" in capsys.readouterr().out
+
+    def test_saved(self, capsys):
+        self.future.set_result(["test.png"])
+        self.renderer.callback(self.future)
+        assert capsys.readouterr().out == ""
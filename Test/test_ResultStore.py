@@ -0,0 +1,69 @@
+import pytest as pt
+from ResultStore import ResultStore
+import numpy as np
+import tempfile
+import os
+
+
+class Test_addRun:
+    def setup_method(self):
+        folder = tempfile.mkdtemp()
+        self.store = ResultStore(os.path.join(folder, "test_results"), "npz")
+        self.A_fit = np.arange(12.0).reshape(3, 4)
+        self.runs = [self.store.addRun("GLA", {"A_fit": self.A_fit,
+                                                "tau_fit": np.array([1.5, 20])},
+                                       {"bounds": [[0.01, None]],
+                                        "fit_report": "report"}),
+                     self.store.addRun("GTA", {"A_fit": 2 * self.A_fit},
+                                       {"model": 1})]
+
+    def test_runs(self):
+        assert self.runs == ["GLA_001", "GTA_002"]
+        assert self.store.listRuns() == self.runs
+
+    def test_values(self):
+        arrays, metadata = self.store.loadRun("GLA_001")
+        assert arrays["A_fit"] == pt.approx(self.A_fit)
+        assert arrays["tau_fit"] == pt.approx([1.5, 20])
+        assert metadata == {"bounds": [[0.01, None]], "fit_report": "report"}
+        arrays, metadata = self.store.loadRun()
+        assert arrays["A_fit"] == pt.approx(2 * self.A_fit)
+
+
+class Test_addRunHDF5:
+    def setup_method(self):
+        self.h5py = pt.importorskip("h5py")
+        folder = tempfile.mkdtemp()
+        self.store = ResultStore(os.path.join(folder, "test_results"), "hdf5")
+        self.A_fit = np.arange(12.0).reshape(3, 4)
+        self.runs = [self.store.addRun("GLA", {"A_fit": self.A_fit,
+                                                "alpha": np.float64(0.5),
+                                                "tau_fit": np.array([1.5])},
+                                       {"bounds": [[0.01, None]],
+                                        "tau_fit": np.array([1.5, 20]),
+                                        "fit_report": "report"}),
+                     self.store.addRun("GTA", {"A_fit": 2 * self.A_fit},
+                                       {"model": 1})]
+
+    def test_runs(self):
+        assert self.store.filename.endswith(".h5")
+        assert self.runs == ["GLA_001", "GTA_002"]
+        assert self.store.listRuns() == self.runs
+
+    def test_chunks(self):
+        with self.h5py.File(self.store.filename, "r") as f:
+            assert f["GLA_001/A_fit"].chunks is not None
+            assert f["GLA_001/A_fit"].compression == "gzip"
+            assert f["GLA_001/alpha"].chunks is None
+            assert f["GLA_001/tau_fit"].chunks is None
+
+    def test_values(self):
+        arrays, metadata = self.store.loadRun("GLA_001")
+        assert arrays["A_fit"] == pt.approx(self.A_fit)
+        assert arrays["alpha"] == pt.approx(0.5)
+        assert arrays["tau_fit"] == pt.approx([1.5])
+        assert metadata == {"bounds": [[0.01, None]], "tau_fit": [1.5, 20],
+                            "fit_report": "report"}
+        arrays, metadata = self.store.loadRun()
+        assert arrays["A_fit"] == pt.approx(2 * self.A_fit)
+        assert metadata == {"model": 1}